@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import math
+import operator
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+TIMESTAMP_FIELD = "@timestamp"
+
+# Each window is split into this many time buckets; counts are exact to one bucket's width.
+DEFAULT_BUCKETS = 60
+
+_COMPARE: Dict[str, Callable[[Any, Any], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "=": operator.eq,
+}
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_COUNT_RE = re.compile(
+    r"^count\(\s*([^\s()]*)\s*\)(?:\s+by\s+([^<>=]+?))?\s*(>=|<=|==|=|>|<)\s*(\d+(?:\.\d+)?)$", re.IGNORECASE
+)
+_NEAR_RE = re.compile(r"^near\s+(.+)$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Aggregation:
+    function: str
+    field: Optional[str] = None
+    group_by: Tuple[str, ...] = ()
+    op: str = ">"
+    threshold: float = 0
+    timeframe: Optional[float] = None
+    near: Tuple[str, ...] = ()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        # Fields the stateful stage reads besides the search's own clauses.
+        fields = (TIMESTAMP_FIELD,) + self.group_by
+        return fields + (self.field,) if self.field else fields
+
+
+def parse_timeframe(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    match = re.fullmatch(r"\s*(\d+)\s*([smhd])\s*", str(value))
+    if not match:
+        raise ValueError(f"bad timeframe: {value!r} (expected e.g. 30s, 5m, 1h, 1d)")
+    seconds = int(match.group(1)) * _UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"bad timeframe: {value!r}")
+    return float(seconds)
+
+
+def parse_aggregation(text: str, timeframe: Any = None) -> Aggregation:
+    text = text.strip()
+    window = parse_timeframe(timeframe)
+    match = _COUNT_RE.match(text)
+    if match:
+        field, group_by, op, threshold = match.groups()
+        groups = tuple(g.strip() for g in group_by.split(",")) if group_by else ()
+        if any(not g for g in groups):
+            raise ValueError(f"bad aggregation: {text}")
+        return Aggregation(
+            function="count",
+            field=field or None,
+            group_by=groups,
+            op=op,
+            threshold=float(threshold),
+            timeframe=window,
+        )
+
+    match = _NEAR_RE.match(text)
+    if match:
+        names = re.split(r"\s+and\s+", match.group(1).strip(), flags=re.IGNORECASE)
+        if any(not re.fullmatch(r"[A-Za-z0-9_]+", n) for n in names):
+            raise ValueError(f"near only supports selection names joined by 'and': {text}")
+        if window is None:
+            raise ValueError("near needs a timeframe")
+        return Aggregation(function="near", near=tuple(names), timeframe=window)
+
+    raise ValueError(f"unsupported aggregation: {text}")
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    # Epoch seconds (or milliseconds) and ISO 8601 strings; naive times are taken as UTC.
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        return (value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+        return seconds / 1000.0 if abs(seconds) >= 1e11 else seconds
+    text = str(value).strip()
+    try:
+        return parse_timestamp(float(text))
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def group_key(values: Sequence[Any]) -> Tuple[Any, ...]:
+    return tuple(_freeze(v) for v in values)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class _Bucket:
+    __slots__ = ("key", "count", "values")
+
+    def __init__(self, key: int):
+        self.key = key
+        self.count = 0
+        self.values: Set[Any] = set()
+
+
+class _Group:
+    __slots__ = ("buckets", "keys", "total", "distinct")
+
+    def __init__(self) -> None:
+        self.buckets: List[_Bucket] = []
+        self.keys: List[int] = []
+        self.total = 0
+        self.distinct: Dict[Any, int] = {}
+
+    def add(self, key: int, value: Any, distinct: bool) -> None:
+        keys = self.keys
+        if keys and keys[-1] == key:
+            bucket = self.buckets[-1]
+        else:
+            pos = bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                bucket = self.buckets[pos]
+            else:
+                bucket = _Bucket(key)
+                keys.insert(pos, key)
+                self.buckets.insert(pos, bucket)
+        if not distinct:
+            bucket.count += 1
+            self.total += 1
+        elif value not in bucket.values:
+            bucket.values.add(value)
+            self.distinct[value] = self.distinct.get(value, 0) + 1
+
+    def evict(self, horizon: int) -> None:
+        # Drops buckets at or before `horizon`, the newest bucket that has left the window.
+        while self.keys and self.keys[0] <= horizon:
+            self.keys.pop(0)
+            bucket = self.buckets.pop(0)
+            self.total -= bucket.count
+            for value in bucket.values:
+                left = self.distinct[value] - 1
+                if left:
+                    self.distinct[value] = left
+                else:
+                    del self.distinct[value]
+
+    def size(self, distinct: bool) -> int:
+        return len(self.distinct) if distinct else self.total
+
+
+# `count() by g > N` over a sliding timeframe. Each group keeps per-bucket counters
+# (or value sets for count(field)); buckets older than the window are dropped as
+# the stream's event time advances, and groups with nothing left in the window are
+# dropped with them, so memory is bounded by the groups active in one timeframe.
+# A group that crosses the threshold raises one alert and starts counting afresh.
+class CountWindow:
+    def __init__(self, spec: Aggregation, buckets: int = DEFAULT_BUCKETS):
+        self.spec = spec
+        self.compare = _COMPARE[spec.op]
+        self.distinct = spec.field is not None
+        self.width = spec.timeframe / buckets if spec.timeframe else None
+        self.groups: "OrderedDict[Tuple[Any, ...], _Group]" = OrderedDict()
+        self.watermark = -math.inf
+        self.late = 0
+
+    def _horizon(self) -> int:
+        assert self.spec.timeframe is not None and self.width is not None
+        return math.floor((self.watermark - self.spec.timeframe) / self.width)
+
+    def _expire(self, horizon: int) -> None:
+        groups = self.groups
+        while groups:
+            key, group = next(iter(groups.items()))
+            if group.keys and group.keys[-1] > horizon:
+                return
+            del groups[key]
+
+    def observe(self, timestamp: Optional[float], group: Tuple[Any, ...], value: Any = None) -> bool:
+        if self.distinct:
+            if value is None:
+                return False
+            value = _freeze(value)
+        if self.width is None:
+            bucket = 0
+        else:
+            # Events without a usable timestamp are placed at the latest event time seen.
+            if timestamp is None:
+                timestamp = self.watermark if self.watermark > -math.inf else 0.0
+            if timestamp > self.watermark:
+                self.watermark = timestamp
+                self._expire(self._horizon())
+            bucket = math.floor(timestamp / self.width)
+            if bucket <= self._horizon():
+                self.late += 1
+                return False
+
+        state = self.groups.get(group)
+        if state is None:
+            state = self.groups[group] = _Group()
+        else:
+            self.groups.move_to_end(group)
+        state.add(bucket, value, self.distinct)
+        if self.width is not None:
+            state.evict(self._horizon())
+        if self.compare(state.size(self.distinct), self.spec.threshold):
+            del self.groups[group]
+            return True
+        return False
+
+
+# `search | near a and b`: alerts when the search and every listed selection have
+# each matched some event within one timeframe, then waits for a fresh set.
+class NearWindow:
+    def __init__(self, spec: Aggregation):
+        assert spec.timeframe is not None
+        self.spec = spec
+        self.timeframe = spec.timeframe
+        self.last: List[Optional[float]] = [None] * (1 + len(spec.near))
+        self.watermark = -math.inf
+
+    def observe(self, timestamp: Optional[float], hits: Sequence[bool]) -> bool:
+        if timestamp is None:
+            timestamp = self.watermark if self.watermark > -math.inf else 0.0
+        self.watermark = max(self.watermark, timestamp)
+        last = self.last
+        for pos, hit in enumerate(hits):
+            if hit:
+                seen = last[pos]
+                last[pos] = timestamp if seen is None else max(seen, timestamp)
+        oldest = self.watermark - self.timeframe
+        if all(seen is not None and seen > oldest for seen in last):
+            self.last = [None] * len(last)
+            return True
+        return False
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import shutil
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import yaml
 
-from harness.evaluate import MatchWhy, _parse_field_key, evaluate_sigma_event
+from harness.cache import ResultCache, fingerprint_files
+from harness.engine import RuleTally, replay_rule
+from harness.evaluate import CompiledRule, MatchWhy, _parse_field_key
+from harness.events import iter_jsonl
+from harness.multipattern import PatternRegistry
+from harness.parallel import pool_map
+from harness.perf import Profiler
 from harness.schemas import RULE_DETAIL_SCHEMA, SCHEMAS, validate_json
 from harness.sigma_to_elastic import convert_sigma_to_kql
 
@@ -41,21 +48,23 @@ TACTIC_DISPLAY: Dict[str, str] = {
 }
 
 
+CASE_NAMES = ["benign", "malicious"]
+
+# Bump when the per-rule artifact layout changes; it invalidates incremental manifests.
+ARTIFACTS_VERSION = "1"
+MANIFEST_NAME = ".manifest.json"
+
+
 @dataclass(frozen=True)
 class RuleFile:
     sigma_path: Path
     elastic_path: Path
     sigma: Dict[str, Any]
+    compiled: CompiledRule
 
 
-def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        events.append(json.loads(line))
-    return events
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    return iter_jsonl(path)
 
 
 def _load_expected(path: Path) -> Dict[str, Any]:
@@ -66,6 +75,7 @@ def _iter_sigma_rules(repo_root: Path) -> List[RuleFile]:
     sigma_dir = repo_root / "rules" / "sigma"
     elastic_dir = repo_root / "rules" / "elastic"
     rules: List[RuleFile] = []
+    patterns = PatternRegistry()
     for sigma_path in sorted(sigma_dir.glob("RULE-*.yml")):
         sigma = yaml.safe_load(sigma_path.read_text(encoding="utf-8"))
         rule_id = str(sigma.get("id", "")).strip()
@@ -76,7 +86,11 @@ def _iter_sigma_rules(repo_root: Path) -> List[RuleFile]:
             elastic_dir / f"{basename}.json",
         ]
         elastic_path = next((p for p in elastic_candidates if p.exists()), elastic_candidates[0])
-        rules.append(RuleFile(sigma_path=sigma_path, elastic_path=elastic_path, sigma=sigma))
+        try:
+            compiled = CompiledRule(sigma, patterns=patterns)
+        except ValueError as exc:
+            raise ValueError(f"cannot compile {sigma_path}: {exc}") from exc
+        rules.append(RuleFile(sigma_path=sigma_path, elastic_path=elastic_path, sigma=sigma, compiled=compiled))
         if not rule_id:
             raise ValueError(f"missing id in {sigma_path}")
     return rules
@@ -204,8 +218,13 @@ def _score_breakdown(sigma: Dict[str, Any], passed: bool) -> Dict[str, Any]:
 
 def _compile_sigma_for_client(sigma: Dict[str, Any]) -> Dict[str, Any]:
     detection = sigma.get("detection") or {}
-    condition = str(detection.get("condition", "selection")).strip()
-    compiled: Dict[str, Any] = {"condition": condition, "selections": {}}
+    # The search and the aggregation are kept apart; site/lib/eval.ts windows the aggregation itself.
+    search, pipe, aggregation = str(detection.get("condition", "selection")).partition("|")
+    compiled: Dict[str, Any] = {"condition": search.strip(), "selections": {}}
+    if pipe:
+        compiled["aggregation"] = aggregation.strip()
+        if detection.get("timeframe") is not None:
+            compiled["timeframe"] = str(detection["timeframe"])
 
     for name, body in detection.items():
         if name == "condition" or not isinstance(body, dict):
@@ -219,37 +238,23 @@ def _compile_sigma_for_client(sigma: Dict[str, Any]) -> Dict[str, Any]:
     return compiled
 
 
-def run_rule_case(rule: RuleFile, case_name: str, events: List[Dict[str, Any]], expected_alerts: int) -> Dict[str, Any]:
-    actual = 0
-    first_match_index: Optional[int] = None
-    best_why: Optional[MatchWhy] = None
-
-    for idx, evt in enumerate(events):
-        ok, why = evaluate_sigma_event(rule.sigma, evt)
-        if ok:
-            actual += 1
-            best_why = why
-            if first_match_index is None:
-                first_match_index = idx
-        elif best_why is None:
-            best_why = why
-
+def _case_result(case_name: str, events: int, expected_alerts: int, tally: RuleTally) -> Dict[str, Any]:
     time_to_detect_ms = 0
-    if first_match_index is not None:
-        time_to_detect_ms = first_match_index * 10
+    if tally.first_match_index is not None:
+        time_to_detect_ms = tally.first_match_index * 10
 
-    why_out = best_why or MatchWhy(matched_fields=[], failed_clause=None, missing_fields=[])
+    why_out = tally.why or MatchWhy(matched_fields=[], failed_clause=None, missing_fields=[])
     matched_fields = [
         {"field": mf["field"], "value": str(mf["value"])} for mf in (why_out.matched_fields or [])
     ]
 
     return {
         "case": case_name,
-        "events": len(events),
+        "events": events,
         "expected_alerts": expected_alerts,
-        "actual_alerts": actual,
+        "actual_alerts": tally.alerts,
         "time_to_detect_ms": time_to_detect_ms,
-        "passed": actual == expected_alerts,
+        "passed": tally.alerts == expected_alerts,
         "why": {
             "matched_fields": matched_fields,
             "failed_clause": why_out.failed_clause,
@@ -258,8 +263,146 @@ def run_rule_case(rule: RuleFile, case_name: str, events: List[Dict[str, Any]],
     }
 
 
-def run_all_tests(repo_root: Path, only_rule: Optional[str] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+def run_rule_case(
+    rule: RuleFile,
+    case_name: str,
+    events: Iterable[Dict[str, Any]],
+    expected_alerts: int,
+    test: Optional[Callable[[Any], bool]] = None,
+) -> Dict[str, Any]:
+    tally, seen = replay_rule(rule.compiled, events, test)
+    return _case_result(case_name, seen, expected_alerts, tally)
+
+
+@dataclass(frozen=True)
+class CaseTask:
+    rule_id: str
+    case: str
+    path: Path
+    expected_alerts: int
+
+
+_WORKER_RULES: Dict[str, RuleFile] = {}
+
+
+def _init_case_worker(rules: List[RuleFile]) -> None:
+    _WORKER_RULES.clear()
+    _WORKER_RULES.update({str(r.sigma.get("id")): r for r in rules})
+
+
+def _run_case_task(task: CaseTask) -> Dict[str, Any]:
+    rule = _WORKER_RULES[task.rule_id]
+    return run_rule_case(rule, task.case, _read_jsonl(task.path), task.expected_alerts)
+
+
+def _case_dir(repo_root: Path, rule_id: str) -> Path:
+    return repo_root / "tests" / "cases" / rule_id
+
+
+def _rule_fingerprint(repo_root: Path, rule: RuleFile) -> str:
+    case_dir = _case_dir(repo_root, str(rule.sigma.get("id")))
+    inputs = [rule.sigma_path, case_dir / "expected.json"] + [case_dir / f"{c}.jsonl" for c in CASE_NAMES]
+    return fingerprint_files(inputs)
+
+
+def _fingerprints_path(results_path: Path) -> Path:
+    return results_path.with_name(f"{results_path.stem}.fingerprints.json")
+
+
+def save_results(repo_root: Path, path: Path, results: Dict[str, Any]) -> None:
+    rules = {str(r.sigma.get("id")): r for r in _iter_sigma_rules(repo_root)}
+    fingerprints = {rid: _rule_fingerprint(repo_root, rules[rid]) for rid in sorted(results["by_rule"])}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    _fingerprints_path(path).write_text(json.dumps(fingerprints, indent=2), encoding="utf-8")
+
+
+# A results.json saved by `test --save-results`, served through the ResultCache interface:
+# rules whose fingerprint changed since it was saved miss and are replayed again.
+class SavedResults:
+    def __init__(self, path: Path):
+        results = json.loads(path.read_text(encoding="utf-8"))
+        validate_json(results, SCHEMAS.results)
+        try:
+            fingerprints = json.loads(_fingerprints_path(path).read_text(encoding="utf-8"))
+        except OSError as exc:
+            raise ValueError(f"{path} has no fingerprints; re-run 'test --save-results'") from exc
+        self.path = path
+        self._tests = {
+            fp: results["by_rule"][rid]["tests"] for rid, fp in fingerprints.items() if rid in results["by_rule"]
+        }
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        tests = self._tests.get(key)
+        if tests is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tests
+
+    def put(self, key: str, value: Any) -> None:
+        pass
+
+
+def run_all_tests(
+    repo_root: Path,
+    only_rule: Optional[str] = None,
+    jobs: int = 1,
+    cache: Optional[Union[ResultCache, SavedResults]] = None,
+    profiler: Optional[Profiler] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     rules = _iter_sigma_rules(repo_root)
+    if only_rule:
+        rules = [r for r in rules if str(r.sigma.get("id")) == only_rule]
+    # Profiling times the evaluations themselves: every case runs, in this process.
+    if profiler is not None:
+        cache = None
+        jobs = 1
+
+    tests_by_rule: Dict[str, List[Dict[str, Any]]] = {}
+    fingerprints: Dict[str, str] = {}
+    tasks: List[CaseTask] = []
+    for rule in rules:
+        rid = str(rule.sigma.get("id"))
+        if cache is not None:
+            fingerprints[rid] = _rule_fingerprint(repo_root, rule)
+            cached = cache.get(fingerprints[rid])
+            if cached is not None:
+                tests_by_rule[rid] = cached
+                continue
+
+        case_dir = _case_dir(repo_root, rid)
+        expected = _load_expected(case_dir / "expected.json")
+        for case_name in CASE_NAMES:
+            tasks.append(
+                CaseTask(
+                    rule_id=rid,
+                    case=case_name,
+                    path=case_dir / f"{case_name}.jsonl",
+                    expected_alerts=int(expected[case_name]["expected_alerts"]),
+                )
+            )
+
+    if jobs > 1 and len(tasks) > 1:
+        case_results = pool_map(_run_case_task, tasks, jobs, initializer=_init_case_worker, initargs=(rules,))
+    else:
+        by_id = {str(r.sigma.get("id")): r for r in rules}
+        tests = {rid: profiler.instrument(r.compiled) for rid, r in by_id.items()} if profiler is not None else {}
+        case_results = [
+            run_rule_case(by_id[t.rule_id], t.case, _read_jsonl(t.path), t.expected_alerts, tests.get(t.rule_id))
+            for t in tasks
+        ]
+
+    fresh: Dict[str, List[Dict[str, Any]]] = {}
+    for task, res in zip(tasks, case_results):
+        fresh.setdefault(task.rule_id, []).append(res)
+    for rid, tests in fresh.items():
+        tests_by_rule[rid] = tests
+        if cache is not None:
+            cache.put(fingerprints[rid], tests)
+
     by_rule: Dict[str, Any] = {}
     failures: List[Dict[str, Any]] = []
 
@@ -270,27 +413,16 @@ def run_all_tests(repo_root: Path, only_rule: Optional[str] = None) -> Tuple[Dic
 
     for rule in rules:
         rid = str(rule.sigma.get("id"))
-        if only_rule and rid != only_rule:
-            continue
-
-        case_dir = repo_root / "tests" / "cases" / rid
-        expected = _load_expected(case_dir / "expected.json")
-
-        tests: List[Dict[str, Any]] = []
-        for case_name in ["benign", "malicious"]:
-            events = _read_jsonl(case_dir / f"{case_name}.jsonl")
-            exp_alerts = int(expected[case_name]["expected_alerts"])
-            res = run_rule_case(rule, case_name, events, exp_alerts)
-            tests.append(res)
-
+        tests = tests_by_rule[rid]
+        for res in tests:
             events_total += res["events"]
-            alerts_expected += exp_alerts
+            alerts_expected += int(res["expected_alerts"])
             alerts_actual += int(res["actual_alerts"])
-            if case_name == "malicious" and res["actual_alerts"] > 0:
+            if res["case"] == "malicious" and res["actual_alerts"] > 0:
                 ttd_values.append(int(res["time_to_detect_ms"]))
 
             if not res["passed"]:
-                failures.append({"rule_id": rid, "case": case_name, "result": res})
+                failures.append({"rule_id": rid, "case": res["case"], "result": res})
 
         by_rule[rid] = {
             "tests": tests,
@@ -336,8 +468,143 @@ def _logsource_string(sigma: Dict[str, Any]) -> str:
     return service or product or "unknown"
 
 
-def generate_artifacts(repo_root: Path, out_dir: Path, only_rule: Optional[str] = None) -> Dict[str, Any]:
-    results, _ = run_all_tests(repo_root, only_rule=only_rule)
+def _build_rule_artifacts(rule: RuleFile, rule_res: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    rid = str(rule.sigma.get("id"))
+    status = _status_for_rule(rule.sigma, rule_res)
+    passed = status != "failing"
+
+    confidence, noise_risk, quality_score = _heuristics(rule.sigma, passed=passed)
+
+    tags = list(rule.sigma.get("tags") or [])
+    techniques = _extract_techniques(tags)
+    tactic = _extract_tactic(tags)
+    severity = _severity_from_level(rule.sigma.get("level", "medium"))
+
+    index_entry = {
+        "id": rid,
+        "name": str(rule.sigma.get("title", "")),
+        "description": str(rule.sigma.get("description", "")),
+        "logsource": _logsource_string(rule.sigma),
+        "tactic": tactic,
+        "techniques": techniques,
+        "severity": severity,
+        "status": status,
+        "confidence": confidence,
+        "noise_risk": noise_risk,
+        "quality_score": quality_score,
+    }
+
+    # Per-rule detail artifact (site-specific; not part of the mandated schemas)
+    sigma_text = rule.sigma_path.read_text(encoding="utf-8")
+    elastic_text = ""
+    if rule.elastic_path.exists():
+        elastic_text = rule.elastic_path.read_text(encoding="utf-8").strip()
+    else:
+        elastic_text, _ = convert_sigma_to_kql(rule.sigma)
+
+    compiled = _compile_sigma_for_client(rule.sigma)
+    score_breakdown = _score_breakdown(rule.sigma, passed=passed)
+    detail: Dict[str, Any] = {
+        "id": rid,
+        "name": str(rule.sigma.get("title", "")),
+        "title": str(rule.sigma.get("title", "")),
+        "description": str(rule.sigma.get("description", "")),
+        "sigma_path": str(rule.sigma_path.as_posix()),
+        "elastic_path": str(rule.elastic_path.as_posix()),
+        "sigma_text": sigma_text,
+        "elastic_text": elastic_text,
+        "elastic_kql": elastic_text,
+        "elastic_esql": f"FROM logs | WHERE {elastic_text}",
+        "logsource": _logsource_string(rule.sigma),
+        "tags": tags,
+        "tactic": tactic,
+        "techniques": techniques,
+        "severity": severity,
+        "status": status,
+        "confidence": confidence,
+        "noise_risk": noise_risk,
+        "quality_score": quality_score,
+        "fields_used": _fields_used(rule.sigma),
+        "false_positive_notes": list(rule.sigma.get("falsepositives") or []),
+        "tuning_knobs": _tuning_knobs(rule.sigma),
+        "score_breakdown": score_breakdown,
+        "compiled": compiled,
+        "validation": {
+            "tests": rule_res["tests"],
+            "summary": {
+                "alerts_expected": sum(t["expected_alerts"] for t in rule_res["tests"]),
+                "alerts_actual": sum(t["actual_alerts"] for t in rule_res["tests"]),
+            },
+        },
+    }
+    validate_json(detail, RULE_DETAIL_SCHEMA)
+    return index_entry, detail
+
+
+def _sha256_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _rule_input_hash(repo_root: Path, rule: RuleFile, rule_res: Dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    h.update(f"artifacts={ARTIFACTS_VERSION}\0".encode("utf-8"))
+    h.update(_rule_fingerprint(repo_root, rule).encode("utf-8"))
+    h.update(rule.sigma_path.as_posix().encode("utf-8") + b"\0" + rule.elastic_path.as_posix().encode("utf-8"))
+    h.update(rule.elastic_path.read_bytes() if rule.elastic_path.exists() else b"<missing>")
+    h.update(json.dumps(rule_res, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _output_record(path: Path, sha256: str) -> Dict[str, Any]:
+    st = path.stat()
+    return {"sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _output_unchanged(path: Path, record: Optional[Dict[str, Any]]) -> bool:
+    if not record:
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    if st.st_size != record["size"]:
+        return False
+    if st.st_mtime_ns == record["mtime_ns"]:
+        return True
+    return _sha256_file(path) == record["sha256"]
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, Any]:
+    try:
+        manifest = json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != ARTIFACTS_VERSION:
+        manifest = {"version": ARTIFACTS_VERSION, "rules": {}}
+    return manifest
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    data = text.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+def generate_artifacts(
+    repo_root: Path,
+    out_dir: Path,
+    only_rule: Optional[str] = None,
+    incremental: bool = False,
+    cache: Optional[Union[ResultCache, SavedResults]] = None,
+    results: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    if results is None:
+        results, _ = run_all_tests(repo_root, only_rule=only_rule, cache=cache)
     rules = _iter_sigma_rules(repo_root)
     if only_rule:
         rules = [r for r in rules if str(r.sigma.get("id")) == only_rule]
@@ -354,94 +621,58 @@ def generate_artifacts(repo_root: Path, out_dir: Path, only_rule: Optional[str]
     passing = 0
     failing = 0
 
-    per_rule_status: Dict[str, str] = {}
+    manifest = _load_manifest(out_dir) if incremental else {"version": ARTIFACTS_VERSION, "rules": {}}
+    build = {"rules_written": 0, "rules_skipped": 0, "events_copied": 0, "events_skipped": 0}
 
     for rule in rules:
         rid = str(rule.sigma.get("id"))
         rule_res = results["by_rule"][rid]
-        status = _status_for_rule(rule.sigma, rule_res)
-        per_rule_status[rid] = status
-        passed = status != "failing"
+        detail_path = out_dir / "rules" / f"{rid}.json"
 
-        confidence, noise_risk, quality_score = _heuristics(rule.sigma, passed=passed)
+        input_hash = _rule_input_hash(repo_root, rule, rule_res) if incremental else ""
+        previous = manifest["rules"].get(rid) or {}
+        unchanged = incremental and previous.get("input") == input_hash
 
-        if status == "failing":
+        if unchanged and _output_unchanged(detail_path, previous.get("detail")):
+            index_entry = previous["index_entry"]
+            detail_record = previous["detail"]
+            build["rules_skipped"] += 1
+        else:
+            index_entry, detail = _build_rule_artifacts(rule, rule_res)
+            detail_text = json.dumps(detail, indent=2)
+            detail_path.write_text(detail_text, encoding="utf-8")
+            detail_record = _output_record(detail_path, hashlib.sha256(detail_text.encode("utf-8")).hexdigest())
+            build["rules_written"] += 1
+
+        rules_index_rules.append(index_entry)
+        if index_entry["status"] == "failing":
             failing += 1
         else:
             passing += 1
 
-        tags = list(rule.sigma.get("tags") or [])
-        techniques = _extract_techniques(tags)
-        tactic = _extract_tactic(tags)
-        severity = _severity_from_level(rule.sigma.get("level", "medium"))
-
-        rules_index_rules.append(
-            {
-                "id": rid,
-                "name": str(rule.sigma.get("title", "")),
-                "description": str(rule.sigma.get("description", "")),
-                "logsource": _logsource_string(rule.sigma),
-                "tactic": tactic,
-                "techniques": techniques,
-                "severity": severity,
-                "status": status,
-                "confidence": confidence,
-                "noise_risk": noise_risk,
-                "quality_score": quality_score,
-            }
-        )
-
-        # Per-rule detail artifact (site-specific; not part of the mandated schemas)
-        sigma_text = rule.sigma_path.read_text(encoding="utf-8")
-        elastic_text = ""
-        if rule.elastic_path.exists():
-            elastic_text = rule.elastic_path.read_text(encoding="utf-8").strip()
-        else:
-            elastic_text, _ = convert_sigma_to_kql(rule.sigma)
-
-        compiled = _compile_sigma_for_client(rule.sigma)
-        score_breakdown = _score_breakdown(rule.sigma, passed=passed)
-        detail: Dict[str, Any] = {
-            "id": rid,
-            "name": str(rule.sigma.get("title", "")),
-            "title": str(rule.sigma.get("title", "")),
-            "description": str(rule.sigma.get("description", "")),
-            "sigma_path": str(rule.sigma_path.as_posix()),
-            "elastic_path": str(rule.elastic_path.as_posix()),
-            "sigma_text": sigma_text,
-            "elastic_text": elastic_text,
-            "elastic_kql": elastic_text,
-            "elastic_esql": f"FROM logs | WHERE {elastic_text}",
-            "logsource": _logsource_string(rule.sigma),
-            "tags": tags,
-            "tactic": tactic,
-            "techniques": techniques,
-            "severity": severity,
-            "status": status,
-            "confidence": confidence,
-            "noise_risk": noise_risk,
-            "quality_score": quality_score,
-            "fields_used": _fields_used(rule.sigma),
-            "false_positive_notes": list(rule.sigma.get("falsepositives") or []),
-            "tuning_knobs": _tuning_knobs(rule.sigma),
-            "score_breakdown": score_breakdown,
-            "compiled": compiled,
-            "validation": {
-                "tests": results["by_rule"][rid]["tests"],
-                "summary": {
-                    "alerts_expected": sum(t["expected_alerts"] for t in results["by_rule"][rid]["tests"]),
-                    "alerts_actual": sum(t["actual_alerts"] for t in results["by_rule"][rid]["tests"]),
-                },
-            },
-        }
-        validate_json(detail, RULE_DETAIL_SCHEMA)
-        (out_dir / "rules" / f"{rid}.json").write_text(json.dumps(detail, indent=2), encoding="utf-8")
-
-        case_dir = repo_root / "tests" / "cases" / rid
-        for case_name in ["benign", "malicious"]:
+        case_dir = _case_dir(repo_root, rid)
+        event_records: Dict[str, Any] = {}
+        for case_name in CASE_NAMES:
             src = case_dir / f"{case_name}.jsonl"
             dst = out_dir / "events" / f"{rid}_{case_name}.jsonl"
+            # The input hash already covers the case files, so an intact copy is current.
+            record = (previous.get("events") or {}).get(dst.name)
+            if unchanged and _output_unchanged(dst, record):
+                event_records[dst.name] = record
+                build["events_skipped"] += 1
+                continue
             shutil.copyfile(src, dst)
+            build["events_copied"] += 1
+            if incremental:
+                event_records[dst.name] = _output_record(dst, _sha256_file(dst))
+
+        if incremental:
+            manifest["rules"][rid] = {
+                "input": input_hash,
+                "index_entry": index_entry,
+                "detail": detail_record,
+                "events": event_records,
+            }
 
     rules_index = {"rules": rules_index_rules}
     validate_json(rules_index, SCHEMAS.rules_index)
@@ -492,8 +723,18 @@ def generate_artifacts(repo_root: Path, out_dir: Path, only_rule: Optional[str]
     validate_json(coverage, SCHEMAS.coverage)
 
     (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
-    (out_dir / "results.json").write_text(json.dumps(results, indent=2), encoding="utf-8")
-    (out_dir / "coverage.json").write_text(json.dumps(coverage, indent=2), encoding="utf-8")
-    (out_dir / "rules_index.json").write_text(json.dumps(rules_index, indent=2), encoding="utf-8")
-
-    return {"meta": meta, "results": results, "coverage": coverage, "rules_index": rules_index}
+    if incremental:
+        if not only_rule:
+            manifest["rules"] = {rid: manifest["rules"][rid] for rid in sorted(results["by_rule"])}
+        _write_if_changed(out_dir / "results.json", json.dumps(results, indent=2))
+        _write_if_changed(out_dir / "coverage.json", json.dumps(coverage, indent=2))
+        _write_if_changed(out_dir / "rules_index.json", json.dumps(rules_index, indent=2))
+        tmp = out_dir / f"{MANIFEST_NAME}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, out_dir / MANIFEST_NAME)
+    else:
+        (out_dir / "results.json").write_text(json.dumps(results, indent=2), encoding="utf-8")
+        (out_dir / "coverage.json").write_text(json.dumps(coverage, indent=2), encoding="utf-8")
+        (out_dir / "rules_index.json").write_text(json.dumps(rules_index, indent=2), encoding="utf-8")
+
+    return {"meta": meta, "results": results, "coverage": coverage, "rules_index": rules_index, "build": build}
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from harness.events import available_decoders, get_decoder, iter_jsonl
+
+
+def _fixture_lines() -> List[bytes]:
+    lines: List[bytes] = []
+    for path in sorted((REPO_ROOT / "tests" / "cases").glob("RULE-*/*.jsonl")):
+        lines.extend(line.strip() for line in path.read_bytes().splitlines() if line.strip())
+    return lines
+
+
+def run(scale: int, batch_size: int) -> List[Dict[str, Any]]:
+    lines = _fixture_lines() * scale
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.jsonl"
+        path.write_bytes(b"\n".join(lines) + b"\n")
+
+        for name in available_decoders():
+            decoder = get_decoder(name)
+
+            started = time.perf_counter()
+            for i in range(0, len(lines), batch_size):
+                decoder.decode_batch(lines[i : i + batch_size])
+            decode_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            count = sum(1 for _ in iter_jsonl(path, decoder=decoder, batch_size=batch_size))
+            read_s = time.perf_counter() - started
+
+            rows.append(
+                {
+                    "decoder": name,
+                    "events": count,
+                    "decode_events_per_sec": round(len(lines) / decode_s),
+                    "iter_jsonl_events_per_sec": round(count / read_s),
+                }
+            )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.bench.decoders")
+    parser.add_argument("--scale", type=int, default=2000, help="Repeat tests/cases events this many times")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a text table")
+    args = parser.parse_args()
+
+    rows = run(args.scale, args.batch_size)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    columns = list(rows[0].keys())
+    print("  ".join(f"{c:>26}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{row[c]:>26}" for c in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from harness.evaluate import _stringify
+from harness.multipattern import _pyahocorasick, PatternSet
+
+TEXT_FIELDS = ("CommandLine", "ScriptBlockText", "TaskContent", "TargetFilename", "ImagePath", "Details")
+
+
+def _fixture_texts() -> List[str]:
+    texts: List[str] = []
+    for path in sorted((REPO_ROOT / "tests" / "cases").glob("RULE-*/*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            evt = json.loads(line)
+            texts.extend(str(evt[f]) for f in TEXT_FIELDS if f in evt)
+    return texts
+
+
+def _needles(rng: random.Random, count: int) -> List[str]:
+    base = ["-enc", "encodedcommand", "comsvcs.dll", "minidump", "powershell", "\\appdata\\", "\\users\\"]
+    out = list(base[:count])
+    while len(out) < count:
+        out.append("".join(rng.choice(string.ascii_lowercase + "\\.-") for _ in range(rng.randint(4, 14))))
+    return out
+
+
+def _time_per_value(fn: Callable[[str], Any], texts: List[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def run(counts: List[int], repeat: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    texts = _fixture_texts()
+    rows: List[Dict[str, Any]] = []
+    for count in counts:
+        needles = _needles(rng, count)
+
+        def per_value_loop(text: str) -> bool:
+            return any(n in _stringify(text).lower() for n in needles)
+
+        def lowered_once_loop(text: str) -> bool:
+            lowered = _stringify(text).lower()
+            return any(n in lowered for n in needles)
+
+        row: Dict[str, Any] = {
+            "patterns": count,
+            "per_value_loop_us": _time_per_value(per_value_loop, texts, repeat),
+            "lowered_once_loop_us": _time_per_value(lowered_once_loop, texts, repeat),
+        }
+        backends = ["python"] + (["pyahocorasick"] if _pyahocorasick is not None else [])
+        for backend in backends:
+            ps = PatternSet(needles, backend=backend)
+            row[f"{backend}_automaton_us"] = _time_per_value(lambda t: ps.scan((_stringify(t).lower(),)), texts, repeat)
+        rows.append(row)
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.bench.multipattern")
+    parser.add_argument("--patterns", default="2,8,32,128,512,2048", help="Comma-separated pattern counts")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a text table")
+    args = parser.parse_args()
+
+    rows = run([int(c) for c in args.patterns.split(",")], args.repeat, args.seed)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    columns = list(rows[0].keys())
+    print("  ".join(f"{c:>24}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{row[c]:>24.2f}" if isinstance(row[c], float) else f"{row[c]:>24}" for c in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore[assignment]
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from harness.artifacts import _iter_sigma_rules, _read_jsonl
+from harness.columnar import ColumnarEngine
+from harness.engine import Engine, referenced_fields
+from harness.evaluate import CompiledRule, _match_op, evaluate_sigma_event
+
+BENCH_VERSION = "1"
+DEFAULT_SCALE = 2000
+DEFAULT_MATCH_RATE = 0.1
+DEFAULT_MAX_SLOWDOWN = 10.0
+
+Event = Dict[str, Any]
+
+
+def _case_events(rule_id: str) -> List[Event]:
+    events: List[Event] = []
+    for path in sorted((REPO_ROOT / "tests" / "cases" / rule_id).glob("*.jsonl")):
+        events.extend(_read_jsonl(path))
+    return events
+
+
+def _scramble(value: Any, rng: random.Random) -> Any:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return rng.randint(0, max(10, 2 * abs(value)))
+    if isinstance(value, float):
+        return rng.uniform(0, max(10.0, 2 * abs(value)))
+    if isinstance(value, str):
+        return "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(len(value)))
+    if isinstance(value, list):
+        return [_scramble(v, rng) for v in value]
+    if isinstance(value, dict):
+        return {k: _scramble(v, rng) for k, v in value.items()}
+    return value
+
+
+def _randomize(event: Event, keep: Set[str], rng: random.Random) -> Event:
+    # Fields the rule reads keep their values so the verdict is unchanged; the rest are
+    # scrambled so caches and dictionary encoding see realistic cardinality.
+    out = copy.deepcopy(event)
+    for key in list(out):
+        if key not in keep:
+            out[key] = _scramble(out[key], rng)
+    return out
+
+
+def synthesize(rule: CompiledRule, size: int, match_rate: float, rng: random.Random) -> List[Event]:
+    keep = {field.split(".", 1)[0] for field in referenced_fields([rule])}
+    events = _case_events(rule.rule_id)
+    hits = [e for e in events if rule.matches(e)]
+    misses = [e for e in events if not rule.matches(e)]
+    wanted = round(size * match_rate) if hits else 0
+    if not misses:
+        wanted = size
+    picked = [rng.choice(hits) for _ in range(wanted)] + [rng.choice(misses) for _ in range(size - wanted)]
+    rng.shuffle(picked)
+    return [_randomize(e, keep, rng) for e in picked]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _peak_alloc_kb(fn: Callable[[], Any]) -> float:
+    # Peak Python memory allocated during one extra, untimed pass: tracemalloc slows every
+    # allocation, so the timed passes run without it.
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def _percentile(ordered: List[int], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000 if ordered else 0.0
+
+
+def _per_item(
+    fn: Callable[[Any], Any], items: Sequence[Any], repeat: int, before: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
+    # Times every call; the fastest of `repeat` passes is reported. `before` runs ahead of
+    # each pass (e.g. Engine.reset_windows) so every pass does the same work.
+    best: Optional[List[int]] = None
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        spent = []
+        for item in items:
+            started = clock()
+            fn(item)
+            spent.append(clock() - started)
+        if best is None or sum(spent) < sum(best):
+            best = spent
+    assert best is not None
+    total = sum(best)
+    ordered = sorted(best)
+
+    def each() -> None:
+        if before is not None:
+            before()
+        for item in items:
+            fn(item)
+
+    return {
+        "events": len(items),
+        "events_per_sec": round(len(items) / (total / 1e9), 1) if total else None,
+        "p50_us": round(_percentile(ordered, 0.5), 3),
+        "p99_us": round(_percentile(ordered, 0.99), 3),
+        "peak_alloc_kb": _peak_alloc_kb(each),
+    }
+
+
+def _whole(fn: Callable[[], int], repeat: int, before: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    # Throughput of one call that processes a whole corpus and returns its size.
+    best = None
+    events = 0
+
+    def once() -> int:
+        if before is not None:
+            before()
+        return fn()
+
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        events = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    return {
+        "events": events,
+        "events_per_sec": round(events / best, 1) if best else None,
+        "p50_us": None,
+        "p99_us": None,
+        "peak_alloc_kb": _peak_alloc_kb(once),
+    }
+
+
+def _match_op_calls(rules: Sequence[CompiledRule], corpus: Sequence[Event]) -> List[Tuple[Any, str, Any]]:
+    calls: List[Tuple[Any, str, Any]] = []
+    clauses = [c for rule in rules for sel in rule.selections.values() for c in sel.clauses]
+    for event, clause in zip(corpus, clauses * (len(corpus) // max(1, len(clauses)) + 1)):
+        value = clause.accessor.resolve(event)
+        if value is not None:
+            # Every expected value, as a clause with several values may test them all.
+            calls.extend((value, clause.op, expected) for expected in clause.values)
+    return calls
+
+
+def run(
+    scale: int = DEFAULT_SCALE,
+    match_rate: float = DEFAULT_MATCH_RATE,
+    seed: int = 7,
+    repeat: int = 3,
+    only: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    rules = [rf.compiled for rf in _iter_sigma_rules(REPO_ROOT)]
+    if only:
+        rules = [r for r in rules if r.rule_id in only]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    corpus: List[Event] = []
+    pairs: List[Tuple[Dict[str, Any], Event]] = []
+    for rule in rules:
+        events = synthesize(rule, scale, match_rate, rng)
+        corpus.extend(events)
+        pairs.extend((rule.sigma, e) for e in events[: max(1, scale // 20)])
+        row = _per_item(rule.matches, events, repeat)
+        row["matched"] = sum(1 for e in events if rule.matches(e))
+        results[f"rule:{rule.rule_id}"] = row
+    rng.shuffle(corpus)
+
+    # Aggregation windows carry over between calls; each pass starts from empty windows.
+    engine = Engine(rules)
+    results["pack:replay"] = _whole(lambda: engine.replay(corpus).events, repeat, engine.reset_windows)
+    results["pack:evaluate"] = _per_item(engine.evaluate, corpus, repeat, engine.reset_windows)
+    columnar = ColumnarEngine(rules)
+    results["pack:columnar"] = _whole(lambda: columnar.replay(corpus).events, repeat, columnar.reset_windows)
+
+    # The uncompiled helpers: one-shot evaluation, a single operator, and fixture reading.
+    results["evaluate_sigma_event"] = _per_item(lambda pair: evaluate_sigma_event(*pair), pairs, repeat)
+    calls = _match_op_calls(rules, corpus)
+    results["_match_op"] = _per_item(lambda call: _match_op(*call), calls, repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "corpus.jsonl"
+        path.write_text("\n".join(json.dumps(e) for e in corpus) + "\n", encoding="utf-8")
+        results["_read_jsonl"] = _whole(lambda: sum(1 for _ in _read_jsonl(path)), repeat)
+
+    return {
+        "version": BENCH_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "match_rate": match_rate,
+            "seed": seed,
+            "repeat": repeat,
+            # Process-wide, so only meaningful for the suite as a whole.
+            "peak_rss_mb": _peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_slowdown: float) -> List[Dict[str, Any]]:
+    # Benchmarks in both runs whose throughput dropped by more than `max_slowdown` percent.
+    regressions: List[Dict[str, Any]] = []
+    for name, base in sorted(baseline.get("results", {}).items()):
+        row = current.get("results", {}).get(name)
+        if not row or not base.get("events_per_sec") or not row.get("events_per_sec"):
+            continue
+        slowdown = (base["events_per_sec"] - row["events_per_sec"]) / base["events_per_sec"] * 100
+        if slowdown > max_slowdown:
+            regressions.append(
+                {
+                    "benchmark": name,
+                    "baseline_events_per_sec": base["events_per_sec"],
+                    "events_per_sec": row["events_per_sec"],
+                    "slowdown_pct": round(slowdown, 1),
+                }
+            )
+    return regressions
+
+
+def _fmt(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.1f}"
+    return str(value)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.bench.suite")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="Synthetic events per rule")
+    parser.add_argument("--match-rate", type=float, default=DEFAULT_MATCH_RATE, help="Share of each rule's events that match it")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per benchmark; the fastest is reported")
+    parser.add_argument("--rule", action="append", help="Only benchmark these rule ids (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a text table")
+    parser.add_argument("--out", help="Also write the JSON report to this path")
+    parser.add_argument("--baseline", help="Compare against a report written by --out")
+    parser.add_argument(
+        "--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN, help="Fail when events/sec drops more than this percent"
+    )
+    args = parser.parse_args()
+    if not 0 <= args.match_rate <= 1:
+        raise ValueError("--match-rate must be between 0 and 1")
+
+    report = run(args.scale, args.match_rate, args.seed, args.repeat, set(args.rule) if args.rule else None)
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.max_slowdown)
+        report["regressions"] = regressions
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        columns = ["events", "events_per_sec", "p50_us", "p99_us", "peak_alloc_kb"]
+        print(f"{'benchmark':<24}" + "".join(f"{c:>16}" for c in columns))
+        for name, row in report["results"].items():
+            print(f"{name:<24}" + "".join(f"{_fmt(row.get(c)):>16}" for c in columns))
+        print(f"peak RSS: {_fmt(report['meta']['peak_rss_mb'])} MB")
+        for reg in regressions:
+            print(
+                f"REGRESSION {reg['benchmark']}: {reg['events_per_sec']:,.0f} events/sec vs "
+                f"{reg['baseline_events_per_sec']:,.0f} baseline (-{reg['slowdown_pct']}%)"
+            )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
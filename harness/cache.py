@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from harness.evaluate import EVALUATOR_VERSION
+
+DEFAULT_CACHE_DIR = ".detpack-cache"
+
+
+def fingerprint_files(paths: Sequence[Path]) -> str:
+    h = hashlib.sha256()
+    h.update(f"evaluator={EVALUATOR_VERSION}\0".encode("utf-8"))
+    for path in paths:
+        h.update(path.name.encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(path.read_bytes()).digest() if path.exists() else b"<missing>")
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, root: Path, namespace: str = "results"):
+        self.dir = root / namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(value), encoding="utf-8")
+        os.replace(tmp, path)
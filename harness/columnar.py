@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import operator
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as _np  # type: ignore[import-not-found]
+except ImportError:
+    _np = None
+
+from harness.aggregate import TIMESTAMP_FIELD
+from harness.engine import ReplayResult, RuleTally, RuleWindow, referenced_fields, rule_windows
+from harness.evaluate import (
+    _NUMERIC_OPS,
+    AndNode,
+    CompiledClause,
+    CompiledRule,
+    ConditionNode,
+    EventView,
+    NameNode,
+    NotNode,
+    OrNode,
+    _coerce_number,
+)
+
+DEFAULT_COLUMNAR_BATCH = 65536
+
+# A mask is a NumPy bool array when NumPy is installed, else a list of bools.
+Mask = Any
+
+_COMPARE: Dict[str, Callable[[Any, Any], Any]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+_PLAIN = (str, type(None))
+
+
+def _dedupe_key(value: Any) -> Any:
+    if value.__class__ in _PLAIN:
+        return value
+    # 1, 1.0 and True compare equal but stringify differently, as do 0.0 and -0.0.
+    if isinstance(value, float):
+        return (float, repr(value))
+    return (type(value), value)
+
+
+# One field across a batch, dictionary-encoded: clauses are evaluated once per
+# distinct value and broadcast back to the rows through `codes`.
+class Column:
+    __slots__ = ("uniques", "codes", "_numbers")
+
+    def __init__(self, values: Iterable[Any]):
+        index: Dict[Any, int] = {}
+        uniques: List[Any] = []
+        codes: List[int] = []
+        get = index.get
+        for value in values:
+            key = _dedupe_key(value)
+            try:
+                code = get(key)
+            except TypeError:
+                # Lists and dicts are not hashable; each one keeps its own slot.
+                code = None
+                key = None
+            if code is None:
+                code = len(uniques)
+                uniques.append(value)
+                if key is not None or value is None:
+                    index[key] = code
+            codes.append(code)
+        self.uniques = uniques
+        self.codes: Any = _np.asarray(codes, dtype=_np.intp) if _np is not None else codes
+        self._numbers: Any = None
+
+    def numbers(self) -> Any:
+        # Distinct values as floats (NaN when not numeric); None if any value is list-valued.
+        if self._numbers is None:
+            if any(isinstance(u, list) for u in self.uniques):
+                self._numbers = False
+            else:
+                nums = [_coerce_number(u) for u in self.uniques]
+                self._numbers = _np.asarray([float("nan") if n is None else n for n in nums], dtype=float)
+        return self._numbers if self._numbers is not False else None
+
+    def value(self, row: int) -> Any:
+        return self.uniques[self.codes[row]]
+
+    def gather(self, unique_mask: List[bool]) -> Mask:
+        if _np is not None:
+            return _np.asarray(unique_mask, dtype=bool)[self.codes]
+        return [unique_mask[c] for c in self.codes]
+
+
+def _clause_unique_mask(clause: CompiledClause, column: Column) -> List[bool]:
+    if _np is not None and clause.op in _NUMERIC_OPS:
+        numbers = column.numbers()
+        if numbers is not None:
+            compare = _COMPARE[clause.op]
+            hits = _np.zeros(len(numbers), dtype=bool)
+            for exp in clause.needles:
+                hits |= compare(numbers, exp)
+            return hits.tolist()
+    return [u is not None and clause.matches(u) for u in column.uniques]
+
+
+def _walk(value: Any, parts: Tuple[str, ...]) -> Any:
+    for part in parts:
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _clause_key(clause: CompiledClause) -> Any:
+    # Identical clauses in different rules share one mask per batch.
+    try:
+        hash(clause)
+    except TypeError:
+        return id(clause)
+    return clause
+
+
+def _full(n: int, value: bool) -> Mask:
+    if _np is not None:
+        return _np.full(n, value, dtype=bool)
+    return [value] * n
+
+
+def _and(a: Mask, b: Mask) -> Mask:
+    return a & b if _np is not None else [x and y for x, y in zip(a, b)]
+
+
+def _or(a: Mask, b: Mask) -> Mask:
+    return a | b if _np is not None else [x or y for x, y in zip(a, b)]
+
+
+def _not(a: Mask) -> Mask:
+    return ~a if _np is not None else [not x for x in a]
+
+
+def _rows(mask: Mask) -> List[int]:
+    if _np is not None:
+        return _np.flatnonzero(mask).tolist()
+    return [i for i, x in enumerate(mask) if x]
+
+
+def _summary(mask: Mask) -> Tuple[int, Optional[int], Optional[int]]:
+    if _np is not None:
+        hits = _np.flatnonzero(mask)
+        if not len(hits):
+            return 0, None, None
+        return len(hits), int(hits[0]), int(hits[-1])
+    hits = [i for i, x in enumerate(mask) if x]
+    if not hits:
+        return 0, None, None
+    return len(hits), hits[0], hits[-1]
+
+
+class ColumnarEngine:
+    index = None
+    index_stats = None
+
+    def __init__(self, rules: Sequence[CompiledRule], batch_size: int = DEFAULT_COLUMNAR_BATCH):
+        self.rules: List[CompiledRule] = list(rules)
+        self.batch_size = batch_size
+        self.fields = referenced_fields(self.rules)
+        self.windows: List[Optional[RuleWindow]] = rule_windows(self.rules)
+
+    @property
+    def stateful(self) -> bool:
+        return any(window is not None for window in self.windows)
+
+    def reset_windows(self) -> None:
+        self.windows = rule_windows(self.rules)
+
+    @classmethod
+    def from_rule_files(cls, rule_files: Iterable[Any], batch_size: int = DEFAULT_COLUMNAR_BATCH) -> "ColumnarEngine":
+        return cls([rf.compiled for rf in rule_files], batch_size=batch_size)
+
+    def columns(self, events: Sequence[Dict[str, Any]]) -> Dict[str, Column]:
+        columns: Dict[str, Column] = {}
+        for field, accessor in self.fields.items():
+            if accessor.nested:
+                resolve = accessor.resolve
+                columns[field] = Column([resolve(e) for e in events])
+            else:
+                columns[field] = Column([e.get(field) for e in events])
+        return columns
+
+    def _condition_mask(self, node: ConditionNode, selections: Dict[str, Mask], n: int) -> Mask:
+        if isinstance(node, NameNode):
+            mask = selections.get(node.name)
+            return mask if mask is not None else _full(n, False)
+        if isinstance(node, NotNode):
+            return _not(self._condition_mask(node.child, selections, n))
+        if isinstance(node, AndNode):
+            return _and(self._condition_mask(node.left, selections, n), self._condition_mask(node.right, selections, n))
+        if isinstance(node, OrNode):
+            return _or(self._condition_mask(node.left, selections, n), self._condition_mask(node.right, selections, n))
+        raise ValueError(f"unsupported condition node: {type(node).__name__}")
+
+    def arrow_columns(self, batch: Any) -> Dict[str, Column]:
+        names = set(batch.schema.names)
+        columns: Dict[str, Column] = {}
+        for field, accessor in self.fields.items():
+            parts = accessor.parts
+            if field in names:
+                values = batch.column(field).to_pylist()
+            elif accessor.nested and parts[0] in names:
+                values = [_walk(v, parts[1:]) for v in batch.column(parts[0]).to_pylist()]
+            else:
+                values = [None] * batch.num_rows
+            columns[field] = Column(values)
+        return columns
+
+    def evaluate_columns(self, columns: Dict[str, Column], n: int) -> List[Mask]:
+        return self._rule_masks(columns, n)[0]
+
+    def _rule_masks(self, columns: Dict[str, Column], n: int) -> Tuple[List[Mask], List[Dict[str, Mask]]]:
+        # The search mask of every rule, plus its per-selection masks for near windows.
+        clause_masks: Dict[Any, Mask] = {}
+        masks: List[Mask] = []
+        per_rule: List[Dict[str, Mask]] = []
+        for rule in self.rules:
+            if rule.ast is None:
+                masks.append(_full(n, False))
+                per_rule.append({})
+                continue
+            selections: Dict[str, Mask] = {}
+            for name, selection in rule.selections.items():
+                mask = _full(n, True)
+                for clause in selection.clauses:
+                    key = _clause_key(clause)
+                    clause_mask = clause_masks.get(key)
+                    if clause_mask is None:
+                        column = columns[clause.field]
+                        clause_mask = clause_masks[key] = column.gather(_clause_unique_mask(clause, column))
+                    mask = _and(mask, clause_mask)
+                selections[name] = mask
+            masks.append(self._condition_mask(rule.ast, selections, n))
+            per_rule.append(selections)
+        return masks, per_rule
+
+    def _window_mask(
+        self, window: RuleWindow, search: Mask, selections: Dict[str, Mask], columns: Dict[str, Column]
+    ) -> Mask:
+        # Feeds the window the rows that reach it, in order; the mask marks rows that raised an alert.
+        near = [selections[name] for name in window.spec.near]
+        feeding = search
+        for mask in near:
+            feeding = _or(feeding, mask)
+        timestamps = columns[TIMESTAMP_FIELD]
+        group_by = [columns[name] for name in window.spec.group_by]
+        field = columns[window.spec.field] if window.spec.field else None
+        alerts = [False] * len(search)
+        for row in _rows(feeding):
+            hits = [bool(search[row])] + [bool(mask[row]) for mask in near]
+            group = [column.value(row) for column in group_by]
+            value = field.value(row) if field is not None else None
+            alerts[row] = window.push(timestamps.value(row), group, value, hits)
+        return _np.asarray(alerts, dtype=bool) if _np is not None else alerts
+
+    def evaluate_batch(self, events: Sequence[Dict[str, Any]]) -> List[Mask]:
+        return self.evaluate_columns(self.columns(events), len(events))
+
+    def _replay_columns(
+        self, columns: Dict[str, Column], n: int, row: Callable[[int], Dict[str, Any]], first_batch: bool
+    ) -> ReplayResult:
+        result = ReplayResult(events=n)
+        masks, selections = self._rule_masks(columns, n)
+        for rule, mask, window, rule_selections in zip(self.rules, masks, self.windows, selections):
+            if window is not None:
+                mask = self._window_mask(window, mask, rule_selections, columns)
+            alerts, first, last = _summary(mask)
+            tally = result.tallies[rule.rule_id] = RuleTally(alerts=alerts, first_match_index=first)
+            # The row engine reports why for the last match, or for the first event if nothing fired.
+            if last is not None:
+                tally.why = rule.match(EventView(row(last)))[1]
+            elif first_batch:
+                tally.why = rule.match(EventView(row(0)))[1]
+        return result
+
+    def _batches(self, events: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        it = iter(events)
+        while True:
+            batch = list(islice(it, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def replay(self, events: Iterable[Dict[str, Any]]) -> ReplayResult:
+        result = ReplayResult(tallies={rule.rule_id: RuleTally() for rule in self.rules})
+        for batch in self._batches(events):
+            columns = self.columns(batch)
+            result.merge(self._replay_columns(columns, len(batch), batch.__getitem__, first_batch=result.events == 0))
+        return result
+
+    def replay_record_batches(self, batches: Iterable[Any]) -> ReplayResult:
+        # Arrow record batches are turned into columns directly; rows are only built to explain a match.
+        result = ReplayResult(tallies={rule.rule_id: RuleTally() for rule in self.rules})
+        for batch in batches:
+            if not batch.num_rows:
+                continue
+            columns = self.arrow_columns(batch)
+
+            def row(i: int, batch: Any = batch) -> Dict[str, Any]:
+                return batch.slice(i, 1).to_pylist()[0]
+
+            result.merge(self._replay_columns(columns, batch.num_rows, row, first_batch=result.events == 0))
+        return result
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from harness.aggregate import TIMESTAMP_FIELD, CountWindow, NearWindow, group_key, parse_timestamp
+from harness.evaluate import (
+    CompiledRule,
+    EventView,
+    FieldAccessor,
+    MatchWhy,
+    PassRates,
+    clause_keys,
+    field_accessor,
+)
+from harness.index import IndexStats, RuleIndex
+from harness.perf import Profiler
+
+
+@dataclass
+class RuleTally:
+    alerts: int = 0
+    first_match_index: Optional[int] = None
+    why: Optional[MatchWhy] = None
+
+    def observe(self, idx: int, matched: bool, why: MatchWhy) -> None:
+        if matched:
+            self.alerts += 1
+            self.why = why
+            if self.first_match_index is None:
+                self.first_match_index = idx
+        elif self.why is None:
+            self.why = why
+
+    def count(self, idx: int) -> None:
+        self.alerts += 1
+        if self.first_match_index is None:
+            self.first_match_index = idx
+
+    def explain(self, rule: CompiledRule, last_match: Optional[Dict[str, Any]], first: Optional[Dict[str, Any]]) -> None:
+        # Same why as observe(): the last match, else the first event; only that event is explained.
+        event = last_match if last_match is not None else first
+        if event is not None:
+            self.why = rule.explain(event)
+
+    def merge(self, other: "RuleTally", offset: int) -> None:
+        # `other` covers the events that follow this tally's, starting at index `offset`.
+        if other.alerts:
+            if self.first_match_index is None and other.first_match_index is not None:
+                self.first_match_index = offset + other.first_match_index
+            self.why = other.why
+        elif self.why is None:
+            self.why = other.why
+        self.alerts += other.alerts
+
+
+@dataclass
+class ReplayResult:
+    events: int = 0
+    tallies: Dict[str, RuleTally] = field(default_factory=dict)
+
+    @property
+    def alerts(self) -> int:
+        return sum(t.alerts for t in self.tallies.values())
+
+    def merge(self, other: "ReplayResult") -> None:
+        for rule_id, tally in other.tallies.items():
+            self.tallies.setdefault(rule_id, RuleTally()).merge(tally, self.events)
+        self.events += other.events
+
+
+def referenced_fields(rules: Iterable[CompiledRule]) -> Dict[str, FieldAccessor]:
+    fields: Dict[str, FieldAccessor] = {}
+    for rule in rules:
+        for selection in rule.selections.values():
+            for clause in selection.clauses:
+                fields.setdefault(clause.field, clause.accessor)
+        if rule.aggregation is not None:
+            for name in rule.aggregation.fields:
+                fields.setdefault(name, field_accessor(name))
+    return fields
+
+
+# Streaming state of one aggregation rule. Only events that pass the search (or,
+# for near, one of its selections) reach the window, so pruning by the index does
+# not change results.
+class RuleWindow:
+    def __init__(self, rule: CompiledRule, test: Optional[Callable[[Any], bool]] = None):
+        spec = rule.aggregation
+        if spec is None:
+            raise ValueError(f"{rule.rule_id} has no aggregation")
+        self.rule = rule
+        self.spec = spec
+        self.test = test or rule.matches
+        self.timestamp = field_accessor(TIMESTAMP_FIELD)
+        self.group_by = [field_accessor(name) for name in spec.group_by]
+        self.field = field_accessor(spec.field) if spec.field else None
+        self.near = [rule.selections[name].test for name in spec.near]
+        self.state: Union[CountWindow, NearWindow] = NearWindow(spec) if spec.near else CountWindow(spec)
+
+    def push(self, timestamp: Any, group: Sequence[Any], value: Any, hits: Sequence[bool]) -> bool:
+        ts = parse_timestamp(timestamp)
+        if isinstance(self.state, NearWindow):
+            return self.state.observe(ts, hits)
+        return self.state.observe(ts, group_key(group), value)
+
+    def feed(self, event: Any) -> bool:
+        view = event if isinstance(event, EventView) else EventView(event)
+        hits = [self.test(view)]
+        if self.near:
+            hits.extend(test(view) for test in self.near)
+            if not any(hits):
+                return False
+        elif not hits[0]:
+            return False
+        group = [view.get(accessor) for accessor in self.group_by]
+        value = view.get(self.field) if self.field is not None else None
+        return self.push(view.get(self.timestamp), group, value, hits)
+
+
+def rule_windows(rules: Sequence[CompiledRule]) -> List[Optional[RuleWindow]]:
+    return [RuleWindow(rule) if rule.aggregation is not None else None for rule in rules]
+
+
+class Engine:
+    def __init__(self, rules: Sequence[CompiledRule], use_index: bool = True, profiler: Optional[Profiler] = None):
+        self.rules: List[CompiledRule] = list(rules)
+        # With a profiler every rule is tested through its instrumented copy.
+        self.profiler = profiler
+        self.fields = referenced_fields(self.rules)
+        self.index: Optional[RuleIndex] = RuleIndex(self.rules) if use_index else None
+        self._all_positions = list(range(len(self.rules)))
+        # Aggregation state carries over between replay() calls, so a stream split
+        # across files is windowed as one; reset_windows() starts afresh.
+        self.windows: List[Optional[RuleWindow]] = []
+        self.reset_windows()
+
+    @classmethod
+    def from_rule_files(
+        cls, rule_files: Iterable[Any], use_index: bool = True, profiler: Optional[Profiler] = None
+    ) -> "Engine":
+        return cls([rf.compiled for rf in rule_files], use_index=use_index, profiler=profiler)
+
+    @property
+    def stateful(self) -> bool:
+        return any(window is not None for window in self.windows)
+
+    def reset_windows(self) -> None:
+        profiler = self.profiler
+        matchers = [rule.matches if profiler is None else profiler.instrument(rule) for rule in self.rules]
+        self.windows = [
+            RuleWindow(rule, test) if rule.aggregation is not None else None for rule, test in zip(self.rules, matchers)
+        ]
+        self._tests: List[Callable[[Any], bool]] = [
+            window.feed if window is not None else test for test, window in zip(matchers, self.windows)
+        ]
+
+    @property
+    def index_stats(self) -> Optional[IndexStats]:
+        return self.index.stats if self.index is not None else None
+
+    def _positions(self, view: EventView) -> List[int]:
+        if self.index is None:
+            return self._all_positions
+        return self.index.candidates(view)
+
+    def calibrate(self, events: Iterable[Dict[str, Any]]) -> PassRates:
+        # Measures how often each clause passes on a sample and reorders every rule's boolean path.
+        clauses = {
+            key: clause
+            for rule in self.rules
+            for selection in rule.selections.values()
+            for key, clause in clause_keys(rule.rule_id, selection)
+        }
+        passed = dict.fromkeys(clauses, 0)
+        sampled = 0
+        for event in events:
+            view = EventView(event)
+            for key, clause in clauses.items():
+                actual = view.get(clause.accessor)
+                if actual is not None and clause.matches(actual, view):
+                    passed[key] += 1
+            sampled += 1
+
+        # Laplace smoothing keeps a clause that never passed in the sample from ranking as free.
+        rates = {key: (count + 1) / (sampled + 2) for key, count in passed.items()}
+        for rule in self.rules:
+            rule.replan(rates)
+        if self.profiler is not None:
+            # Instrumented tests are built from a plan; rebuild them from the new ones.
+            self.reset_windows()
+        return rates
+
+    def evaluate(
+        self,
+        event: Dict[str, Any],
+        timings: Optional[List[int]] = None,
+        evaluated: Optional[List[int]] = None,
+    ) -> List[Tuple[CompiledRule, MatchWhy]]:
+        # `timings` and `evaluated`, one slot per rule, accumulate the nanoseconds spent
+        # testing each rule and how often it was tested (index-pruned rules are not).
+        view = EventView(event)
+        alerts: List[Tuple[CompiledRule, MatchWhy]] = []
+        for pos in self._positions(view):
+            rule = self.rules[pos]
+            if evaluated is not None:
+                evaluated[pos] += 1
+            if timings is None:
+                matched = self._tests[pos](view)
+            else:
+                started = time.perf_counter_ns()
+                matched = self._tests[pos](view)
+                timings[pos] += time.perf_counter_ns() - started
+            if matched:
+                alerts.append((rule, rule.explain(view)))
+        return alerts
+
+    def replay(self, events: Iterable[Dict[str, Any]]) -> ReplayResult:
+        result = ReplayResult(tallies={rule.rule_id: RuleTally() for rule in self.rules})
+        tallies = [result.tallies[rule.rule_id] for rule in self.rules]
+        last_match: List[Optional[Dict[str, Any]]] = [None] * len(self.rules)
+        first: Optional[Dict[str, Any]] = None
+        tests = self._tests
+
+        for idx, event in enumerate(events):
+            if idx == 0:
+                first = event
+            view = EventView(event)
+            for pos in self._positions(view):
+                if tests[pos](view):
+                    tallies[pos].count(idx)
+                    last_match[pos] = event
+            result.events += 1
+
+        for pos, tally in enumerate(tallies):
+            tally.explain(self.rules[pos], last_match[pos], first)
+        return result
+
+
+def replay_rule(
+    rule: CompiledRule, events: Iterable[Dict[str, Any]], test: Optional[Callable[[Any], bool]] = None
+) -> Tuple[RuleTally, int]:
+    tally = RuleTally()
+    last_match: Optional[Dict[str, Any]] = None
+    first: Optional[Dict[str, Any]] = None
+    seen = 0
+    test = test or rule.matches
+    if rule.aggregation is not None:
+        test = RuleWindow(rule, test).feed
+    for idx, event in enumerate(events):
+        if idx == 0:
+            first = event
+        if test(event):
+            tally.count(idx)
+            last_match = event
+        seen += 1
+    tally.explain(rule, last_match, first)
+    return tally, seen
+
+
+def replay_windows(
+    rules: Sequence[CompiledRule], windows: Sequence[Optional[RuleWindow]], events: Iterable[Dict[str, Any]]
+) -> ReplayResult:
+    # Feeds only the aggregation rules, in order, through an engine's own windows, so their
+    # state stays shared with its replay(). Tallies cover just those rules.
+    windowed = [(rule, window) for rule, window in zip(rules, windows) if window is not None]
+    result = ReplayResult(tallies={rule.rule_id: RuleTally() for rule, _ in windowed})
+    tallies = [result.tallies[rule.rule_id] for rule, _ in windowed]
+    last_match: List[Optional[Dict[str, Any]]] = [None] * len(windowed)
+    first: Optional[Dict[str, Any]] = None
+    for idx, event in enumerate(events):
+        if idx == 0:
+            first = event
+        view = EventView(event)
+        for pos, (_, window) in enumerate(windowed):
+            if window.feed(view):
+                tallies[pos].count(idx)
+                last_match[pos] = event
+        result.events += 1
+    for pos, tally in enumerate(tallies):
+        tally.explain(windowed[pos][0], last_match[pos], first)
+    return result
@@ -1,19 +1,83 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field as dc_field
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from harness.aggregate import Aggregation, parse_aggregation
+from harness.multipattern import Hits, PatternRegistry, PatternSet
+
+
+# Bump when a change alters evaluation output; it keys the on-disk result cache.
+EVALUATOR_VERSION = "2"
+
+REGEX_CACHE_SIZE = 1024
+NORMALIZE_BUDGET = 1 << 20
+
+
+_MISSING = object()
+
+
+# Compiled once per distinct field and shared by every clause, index key and column
+# that reads it. A literal dotted key always wins over walking nested dicts.
+class FieldAccessor:
+    __slots__ = ("field", "parts", "nested", "resolve")
+
+    def __init__(self, field: str):
+        self.field = field
+        self.parts: Tuple[str, ...] = tuple(field.split("."))
+        self.nested = len(self.parts) > 1
+        self.resolve: Callable[[Dict[str, Any]], Any] = self._nested_resolver() if self.nested else self._flat_resolver()
+
+    def _flat_resolver(self) -> Callable[[Dict[str, Any]], Any]:
+        field = self.field
+
+        def resolve(event: Dict[str, Any]) -> Any:
+            return event.get(field)
+
+        return resolve
+
+    def _nested_resolver(self) -> Callable[[Dict[str, Any]], Any]:
+        field = self.field
+        parts = self.parts
+
+        def resolve(event: Dict[str, Any]) -> Any:
+            # No per-shape memo to skip this lookup: a literal dotted key wins whenever an
+            # event has one, so it is checked on every event either way.
+            value = event.get(field, _MISSING)
+            if value is not _MISSING:
+                return value
+            # A missing key and an explicit null both end the walk with None.
+            cur: Any = event
+            for part in parts:
+                if not isinstance(cur, dict):
+                    return None
+                cur = cur.get(part)
+            return cur
+
+        return resolve
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FieldAccessor) and other.field == self.field
+
+    def __hash__(self) -> int:
+        return hash(self.field)
+
+    def __repr__(self) -> str:
+        return f"FieldAccessor({self.field!r})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return field_accessor, (self.field,)
+
+
+@lru_cache(maxsize=None)
+def field_accessor(field: str) -> FieldAccessor:
+    return FieldAccessor(field)
 
 
 def _get_path(event: Dict[str, Any], dotted: str) -> Any:
-    if dotted in event:
-        return event[dotted]
-    cur: Any = event
-    for part in dotted.split("."):
-        if not isinstance(cur, dict) or part not in cur:
-            return None
-        cur = cur[part]
-    return cur
+    return field_accessor(dotted).resolve(event)
 
 
 def _stringify(value: Any) -> str:
@@ -105,17 +169,14 @@ class OrNode(ConditionNode):
         self.right = right
 
     def evaluate(self, mapping: Dict[str, SelectionResult]) -> Tuple[bool, Optional[str]]:
-        ok_left, _ = self.left.evaluate(mapping)
+        ok_left, reason_left = self.left.evaluate(mapping)
         if ok_left:
             return True, None
         ok_right, _ = self.right.evaluate(mapping)
         if ok_right:
             return True, None
-        ok_left2, reason_left = self.left.evaluate(mapping)
-        if not ok_left2:
-            return False, reason_left
-        ok_right2, reason_right = self.right.evaluate(mapping)
-        return False, reason_right
+        # When both sides fail the left side's reason is reported.
+        return False, reason_left
 
 
 class ConditionParser:
@@ -181,6 +242,11 @@ class ConditionParser:
         return NameNode(tok)
 
 
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile_regex(pattern: str) -> Pattern[str]:
+    return re.compile(pattern)
+
+
 def _match_op(field_value: Any, op: str, expected: Any) -> bool:
     values = list(_as_iter(field_value))
 
@@ -218,7 +284,7 @@ def _match_op(field_value: Any, op: str, expected: Any) -> bool:
         return False
 
     if op == "re":
-        pattern = re.compile(str(expected))
+        pattern = _compile_regex(str(expected))
         return any(pattern.search(_stringify(v)) is not None for v in values)
 
     raise ValueError(f"unsupported operator: {op}")
@@ -244,82 +310,492 @@ def _parse_field_key(field_key: str) -> Tuple[str, str]:
     return field_key, "eq"
 
 
-def evaluate_selection(event: Dict[str, Any], selection: Dict[str, Any]) -> SelectionResult:
-    matched_fields: List[Dict[str, str]] = []
-    missing_fields: List[str] = []
-
-    for key, expected in selection.items():
-        field, op = _parse_field_key(str(key))
-        actual = _get_path(event, field)
-        if actual is None:
-            missing_fields.append(field)
-            return SelectionResult(
-                matched=False,
-                matched_fields=matched_fields,
-                missing_fields=missing_fields,
-                failed_clause=f"missing field: {field}",
-            )
-
-        any_ok = False
-        expected_values = list(_as_iter(expected))
-        if op == "eq" and isinstance(expected, list):
-            any_ok = any(_match_op(actual, "eq", v) for v in expected_values)
-        else:
-            any_ok = any(_match_op(actual, op, v) for v in expected_values)
-
-        if not any_ok:
-            return SelectionResult(
-                matched=False,
-                matched_fields=matched_fields,
-                missing_fields=missing_fields,
-                failed_clause=f"{field} {op} {expected_values}",
-            )
+_KEYWORDS = {"and", "or", "not", "(", ")"}
+_STRING_OPS = {"contains", "startswith", "endswith"}
+_HIT_SLOT = {"contains": 0, "startswith": 1, "endswith": 2}
+_NUMERIC_OPS = {"gt", "gte", "lt", "lte"}
+
+
+# Rules evaluated against the same view share field extraction, so a field
+# referenced by many rules is resolved once per event. The stringified, lowercased
+# and numeric forms string/numeric clauses compare against are cached the same way,
+# up to NORMALIZE_BUDGET characters of text per event.
+class EventView:
+    __slots__ = ("event", "_values", "_scans", "_strings", "_lowered", "_numbers", "_budget")
+
+    def __init__(self, event: Dict[str, Any]):
+        self.event = event
+        self._values: Dict[str, Any] = {}
+        self._scans: Optional[Dict[PatternSet, Hits]] = None
+        self._strings: Optional[Dict[str, List[str]]] = None
+        self._lowered: Optional[Dict[str, List[str]]] = None
+        self._numbers: Optional[Dict[str, List[float]]] = None
+        self._budget = NORMALIZE_BUDGET
+
+    def get(self, accessor: FieldAccessor) -> Any:
+        values = self._values
+        field = accessor.field
+        if field in values:
+            return values[field]
+        value = values[field] = accessor.resolve(self.event)
+        return value
 
-        matched_fields.append({"field": field, "value": _stringify(actual)})
+    def _charge(self, texts: List[str]) -> bool:
+        size = sum(map(len, texts))
+        if size > self._budget:
+            return False
+        self._budget -= size
+        return True
+
+    def strings(self, field: str, actual: Any) -> List[str]:
+        if self._strings is None:
+            self._strings = {}
+        elif field in self._strings:
+            return self._strings[field]
+        values = actual if isinstance(actual, list) else (actual,)
+        strings = [_stringify(v) for v in values]
+        if self._charge(strings):
+            self._strings[field] = strings
+        return strings
+
+    def lowered(self, field: str, actual: Any) -> List[str]:
+        if self._lowered is None:
+            self._lowered = {}
+        elif field in self._lowered:
+            return self._lowered[field]
+        lowered = [s.lower() for s in self.strings(field, actual)]
+        if self._charge(lowered):
+            self._lowered[field] = lowered
+        return lowered
+
+    def numbers(self, field: str, actual: Any) -> List[float]:
+        if self._numbers is None:
+            self._numbers = {}
+        elif field in self._numbers:
+            return self._numbers[field]
+        values = actual if isinstance(actual, list) else (actual,)
+        numbers = self._numbers[field] = [n for n in (_coerce_number(v) for v in values) if n is not None]
+        return numbers
+
+    def scan(self, patterns: PatternSet, field: str, actual: Any) -> Hits:
+        if self._scans is None:
+            self._scans = {}
+        hits = self._scans.get(patterns)
+        if hits is None:
+            hits = self._scans[patterns] = patterns.scan(self.lowered(field, actual))
+        return hits
+
+
+def _as_view(event: Any) -> EventView:
+    return event if isinstance(event, EventView) else EventView(event)
+
+
+@dataclass(frozen=True)
+class CompiledClause:
+    field: str
+    accessor: FieldAccessor
+    op: str
+    values: Tuple[Any, ...]
+    needles: Tuple[Any, ...]
+    description: str
+    pattern_ids: FrozenSet[int] = frozenset()
+    patterns: Optional[PatternRegistry] = dc_field(default=None, compare=False, repr=False)
+
+    @property
+    def path(self) -> Tuple[str, ...]:
+        return self.accessor.parts
+
+    def matches(self, actual: Any, view: Optional["EventView"] = None) -> bool:
+        values = actual if isinstance(actual, list) else (actual,)
+        op = self.op
+
+        if op == "eq":
+            return any(v == exp for exp in self.needles for v in values)
+
+        if op in _STRING_OPS:
+            if view is None:
+                lowered = [_stringify(v).lower() for v in values]
+            else:
+                if self.patterns is not None:
+                    pattern_set = self.patterns.pattern_set(self.field)
+                    if pattern_set is not None:
+                        hits = view.scan(pattern_set, self.field, actual)[_HIT_SLOT[op]]
+                        return not hits.isdisjoint(self.pattern_ids)
+                lowered = view.lowered(self.field, actual)
+            if op == "contains":
+                return any(exp in s for exp in self.needles for s in lowered)
+            if op == "startswith":
+                return any(s.startswith(exp) for exp in self.needles for s in lowered)
+            return any(s.endswith(exp) for exp in self.needles for s in lowered)
+
+        if op in _NUMERIC_OPS:
+            if view is None:
+                numbers = [n for n in (_coerce_number(v) for v in values) if n is not None]
+            else:
+                numbers = view.numbers(self.field, actual)
+            for exp_num in self.needles:
+                for v_num in numbers:
+                    if op == "gt" and v_num > exp_num:
+                        return True
+                    if op == "gte" and v_num >= exp_num:
+                        return True
+                    if op == "lt" and v_num < exp_num:
+                        return True
+                    if op == "lte" and v_num <= exp_num:
+                        return True
+            return False
 
-    return SelectionResult(
-        matched=True,
-        matched_fields=matched_fields,
-        missing_fields=missing_fields,
-        failed_clause=None,
+        if op == "re":
+            strings = [_stringify(v) for v in values] if view is None else view.strings(self.field, actual)
+            return any(p.search(s) is not None for p in self.needles for s in strings)
+
+        raise ValueError(f"unsupported operator: {op}")
+
+
+def compile_clause(field_key: str, expected: Any, patterns: Optional[PatternRegistry] = None) -> CompiledClause:
+    field, op = _parse_field_key(field_key)
+    expected_values = list(_as_iter(expected))
+
+    needles: Tuple[Any, ...]
+    pattern_ids: FrozenSet[int] = frozenset()
+    if op in _STRING_OPS:
+        needles = tuple(_stringify(v).lower() for v in expected_values)
+        if patterns is not None:
+            pattern_ids = patterns.register(field, needles)
+    elif op in _NUMERIC_OPS:
+        needles = tuple(n for n in (_coerce_number(v) for v in expected_values) if n is not None)
+    elif op == "re":
+        try:
+            needles = tuple(_compile_regex(str(v)) for v in expected_values)
+        except re.error as exc:
+            raise ValueError(f"invalid regex for {field}: {exc}") from exc
+    else:
+        needles = tuple(expected_values)
+
+    return CompiledClause(
+        field=field,
+        accessor=field_accessor(field),
+        op=op,
+        values=tuple(expected_values),
+        needles=needles,
+        description=f"{field} {op} {expected_values}",
+        pattern_ids=pattern_ids,
+        patterns=patterns if pattern_ids else None,
     )
 
 
-def evaluate_sigma_event(sigma: Dict[str, Any], event: Dict[str, Any]) -> Tuple[bool, MatchWhy]:
-    detection = sigma.get("detection") or {}
-    condition = str(detection.get("condition", "selection")).strip()
+@dataclass(frozen=True)
+class CompiledSelection:
+    name: str
+    clauses: Tuple[CompiledClause, ...]
+    # Order used by the boolean path; `clauses` keeps YAML order for explanations.
+    order: Tuple[CompiledClause, ...] = dc_field(default=(), compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.order:
+            object.__setattr__(self, "order", self.clauses)
+
+    def evaluate(self, event: Any) -> SelectionResult:
+        view = _as_view(event)
+        matched_fields: List[Dict[str, str]] = []
+        missing_fields: List[str] = []
+
+        for clause in self.clauses:
+            actual = view.get(clause.accessor)
+            if actual is None:
+                missing_fields.append(clause.field)
+                return SelectionResult(
+                    matched=False,
+                    matched_fields=matched_fields,
+                    missing_fields=missing_fields,
+                    failed_clause=f"missing field: {clause.field}",
+                )
+
+            if not clause.matches(actual, view):
+                return SelectionResult(
+                    matched=False,
+                    matched_fields=matched_fields,
+                    missing_fields=missing_fields,
+                    failed_clause=clause.description,
+                )
+
+            matched_fields.append({"field": clause.field, "value": _stringify(actual)})
+
+        return SelectionResult(
+            matched=True,
+            matched_fields=matched_fields,
+            missing_fields=missing_fields,
+            failed_clause=None,
+        )
 
-    selection_results: Dict[str, SelectionResult] = {}
-    for name, body in detection.items():
-        if name == "condition":
-            continue
-        if not isinstance(body, dict):
+    def test(self, event: Any) -> bool:
+        view = _as_view(event)
+        for clause in self.order:
+            actual = view.get(clause.accessor)
+            if actual is None or not clause.matches(actual, view):
+                return False
+        return True
+
+
+def compile_selection(
+    name: str, selection: Dict[str, Any], patterns: Optional[PatternRegistry] = None
+) -> CompiledSelection:
+    return CompiledSelection(
+        name=name,
+        clauses=tuple(compile_clause(str(key), expected, patterns) for key, expected in selection.items()),
+    )
+
+
+# Relative cost of testing one clause; with observed pass rates it orders the boolean path.
+OP_COST = {
+    "eq": 1.0,
+    "gt": 2.0,
+    "gte": 2.0,
+    "lt": 2.0,
+    "lte": 2.0,
+    "startswith": 3.0,
+    "endswith": 3.0,
+    "contains": 4.0,
+    "re": 10.0,
+}
+DEFAULT_PASS_RATE = 0.5
+
+# (rule id, selection name, clause position in YAML order) -> fraction of sampled
+# events the clause passed on. Plain values, so rates survive pickling and recompiles.
+ClauseKey = Tuple[str, str, int]
+PassRates = Dict[ClauseKey, float]
+
+
+def clause_cost(clause: CompiledClause) -> float:
+    return OP_COST.get(clause.op, OP_COST["re"]) + 0.1 * len(clause.needles)
+
+
+def clause_keys(rule_id: str, selection: CompiledSelection) -> List[Tuple[ClauseKey, CompiledClause]]:
+    return [((rule_id, selection.name, pos), clause) for pos, clause in enumerate(selection.clauses)]
+
+
+def _rank(cost: float, rejects: float) -> float:
+    # Cheapest per rejected event first: the classic ordering for independent filters.
+    return cost / max(rejects, 1e-9)
+
+
+def plan_selection(
+    selection: CompiledSelection, rates: PassRates, rule_id: str = ""
+) -> Tuple[CompiledSelection, float, float]:
+    rated = [(clause, rates.get(key, DEFAULT_PASS_RATE)) for key, clause in clause_keys(rule_id, selection)]
+    rated.sort(key=lambda cr: _rank(clause_cost(cr[0]), 1.0 - cr[1]))
+    cost, passed = 0.0, 1.0
+    for clause, rate in rated:
+        cost += passed * clause_cost(clause)
+        passed *= rate
+    order = tuple(clause for clause, _ in rated)
+    return CompiledSelection(name=selection.name, clauses=selection.clauses, order=order), cost, passed
+
+
+# Optimized conditions use a flat IR of plain tuples so they pickle with the rule:
+#   ("const", bool) | ("sel", name, positive) | ("and", children) | ("or", children)
+Plan = Tuple[Any, ...]
+TRUE: Plan = ("const", True)
+FALSE: Plan = ("const", False)
+
+
+def _join(kind: str, children: List[Plan]) -> Plan:
+    absorbing, identity = (FALSE, TRUE) if kind == "and" else (TRUE, FALSE)
+    flat: List[Plan] = []
+    for child in children:
+        flat.extend(child[1] if child[0] == kind else (child,))
+    out: List[Plan] = []
+    literals: Dict[str, bool] = {}
+    for child in flat:
+        if child == absorbing:
+            return absorbing
+        if child == identity or child in out:
             continue
-        selection_results[name] = evaluate_selection(event, body)
+        if child[0] == "sel":
+            if literals.get(child[1], child[2]) != child[2]:
+                # `a and not a` can never match; `a or not a` always does.
+                return absorbing
+            literals[child[1]] = child[2]
+        out.append(child)
+    if not out:
+        return identity
+    return out[0] if len(out) == 1 else (kind, tuple(out))
+
+
+def optimize_condition(node: ConditionNode, known: Iterable[str], negate: bool = False) -> Plan:
+    # Pushes `not` down to selections (De Morgan), flattens and/or chains, folds constants
+    # (unknown selections never match) and drops repeated selection references.
+    if isinstance(node, NameNode):
+        if node.name not in known:
+            return TRUE if negate else FALSE
+        return ("sel", node.name, not negate)
+    if isinstance(node, NotNode):
+        return optimize_condition(node.child, known, not negate)
+    if isinstance(node, (AndNode, OrNode)):
+        kind = "and" if isinstance(node, AndNode) != negate else "or"
+        return _join(kind, [optimize_condition(node.left, known, negate), optimize_condition(node.right, known, negate)])
+    raise ValueError(f"unsupported condition node: {type(node).__name__}")
+
+
+def order_plan(plan: Plan, estimates: Dict[str, Tuple[float, float]]) -> Tuple[Plan, float, float]:
+    # Returns `plan` with and/or operands reordered, plus its expected cost and pass rate.
+    kind = plan[0]
+    if kind == "const":
+        return plan, 0.0, 1.0 if plan[1] else 0.0
+    if kind == "sel":
+        cost, passed = estimates.get(plan[1], (0.0, 0.0))
+        return plan, cost, passed if plan[2] else 1.0 - passed
+
+    ranked = [order_plan(child, estimates) for child in plan[1]]
+    if kind == "and":
+        ranked.sort(key=lambda r: _rank(r[1], 1.0 - r[2]))
+    else:
+        ranked.sort(key=lambda r: _rank(r[1], r[2]))
+    cost, reached, passed = 0.0, 1.0, 1.0
+    for _, child_cost, child_pass in ranked:
+        cost += reached * child_cost
+        if kind == "and":
+            reached *= child_pass
+            passed = reached
+        else:
+            reached *= 1.0 - child_pass
+            passed = 1.0 - reached
+    return (kind, tuple(r[0] for r in ranked)), cost, passed
+
+
+def compile_plan(plan: Plan, selections: Dict[str, "CompiledSelection"]) -> Callable[["EventView"], bool]:
+    kind = plan[0]
+    if kind == "const":
+        value = plan[1]
+        return lambda view: value
+    if kind == "sel":
+        test = selections[plan[1]].test
+        if plan[2]:
+            return test
+        return lambda view: not test(view)
+
+    tests = tuple(compile_plan(child, selections) for child in plan[1])
+    if len(tests) == 2:
+        first, second = tests
+        if kind == "and":
+            return lambda view: first(view) and second(view)
+        return lambda view: first(view) or second(view)
+
+    if kind == "and":
+
+        def all_of(view: "EventView") -> bool:
+            for test in tests:
+                if not test(view):
+                    return False
+            return True
+
+        return all_of
+
+    def any_of(view: "EventView") -> bool:
+        for test in tests:
+            if test(view):
+                return True
+        return False
 
-    try:
-        ast = ConditionParser(condition).parse()
-        matched, failed_sel = ast.evaluate(selection_results)
-    except Exception as exc:
-        return False, MatchWhy(matched_fields=[], failed_clause=f"bad condition: {exc}", missing_fields=[])
+    return any_of
+
+
+class CompiledRule:
+    def __init__(self, sigma: Dict[str, Any], patterns: Optional[PatternRegistry] = None):
+        detection = sigma.get("detection") or {}
+        self.sigma = sigma
+        self.rule_id = str(sigma.get("id", ""))
+        self.condition = str(detection.get("condition", "selection")).strip()
+        # Rules compiled against one registry share a per-field automaton for string clauses.
+        self.patterns = patterns if patterns is not None else PatternRegistry()
+        self.selections: Dict[str, CompiledSelection] = {
+            name: compile_selection(name, body, self.patterns)
+            for name, body in detection.items()
+            if name != "condition" and isinstance(body, dict)
+        }
+
+        # `search | count() by f > N` / `search | near a and b`: the search is the per-event
+        # filter, the aggregation a stateful stage run by the replay engines.
+        search, pipe, aggregation = self.condition.partition("|")
+        self.aggregation: Optional[Aggregation] = None
+        self.ast: Optional[ConditionNode] = None
+        self.condition_error: Optional[str] = None
+        try:
+            if pipe:
+                self.aggregation = parse_aggregation(aggregation, detection.get("timeframe"))
+                unknown = [n for n in self.aggregation.near if n not in self.selections]
+                if unknown:
+                    raise ValueError(f"unknown selection: {unknown[0]}")
+            self.ast = ConditionParser(search).parse()
+        except Exception as exc:
+            self.condition_error = f"bad condition: {exc}"
+            self.aggregation = None
 
-    if matched:
         # Prefer fields from the first selection mentioned in the condition.
-        primary = None
-        for tok in ConditionParser._tokenize(condition):
-            if tok not in {"and", "or", "not", "(", ")"} and tok in selection_results:
-                primary = tok
+        self.primary: Optional[str] = None
+        for tok in ConditionParser._tokenize(search):
+            if tok not in _KEYWORDS and tok in self.selections:
+                self.primary = tok
                 break
-        matched_fields = selection_results.get(primary, SelectionResult(False, [], [], None)).matched_fields
-        return True, MatchWhy(matched_fields=matched_fields, failed_clause=None, missing_fields=[])
-
-    if failed_sel and failed_sel in selection_results:
-        res = selection_results[failed_sel]
-        return False, MatchWhy(
-            matched_fields=res.matched_fields,
-            failed_clause=res.failed_clause or failed_sel,
-            missing_fields=res.missing_fields,
-        )
 
-    missing = sorted({f for r in selection_results.values() for f in r.missing_fields})
-    return False, MatchWhy(matched_fields=[], failed_clause=failed_sel, missing_fields=missing)
+        self.plan: Plan = FALSE
+        self._test: Callable[[EventView], bool] = compile_plan(FALSE, self.selections)
+        self.replan()
+
+    def replan(self, rates: Optional[PassRates] = None) -> None:
+        # Only the boolean path is reordered; match()/explain() keep YAML and condition order.
+        estimates: Dict[str, Tuple[float, float]] = {}
+        for name, selection in list(self.selections.items()):
+            self.selections[name], cost, passed = plan_selection(selection, rates or {}, self.rule_id)
+            estimates[name] = (cost, passed)
+        if self.ast is not None:
+            self.plan = order_plan(optimize_condition(self.ast, self.selections), estimates)[0]
+        self._test = compile_plan(self.plan, self.selections)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The compiled closure does not pickle; workers rebuild it from the plan.
+        state = self.__dict__.copy()
+        del state["_test"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._test = compile_plan(self.plan, self.selections)
+
+    def matches(self, event: Any) -> bool:
+        return self._test(_as_view(event))
+
+    def explain(self, event: Any) -> MatchWhy:
+        return self.match(event)[1]
+
+    def match(self, event: Any) -> Tuple[bool, MatchWhy]:
+        view = _as_view(event)
+        selection_results = {name: sel.evaluate(view) for name, sel in self.selections.items()}
+
+        if self.ast is None:
+            return False, MatchWhy(matched_fields=[], failed_clause=self.condition_error, missing_fields=[])
+        matched, failed_sel = self.ast.evaluate(selection_results)
+
+        if matched:
+            primary = selection_results.get(self.primary) if self.primary else None
+            matched_fields = primary.matched_fields if primary else []
+            return True, MatchWhy(matched_fields=matched_fields, failed_clause=None, missing_fields=[])
+
+        if failed_sel and failed_sel in selection_results:
+            res = selection_results[failed_sel]
+            return False, MatchWhy(
+                matched_fields=res.matched_fields,
+                failed_clause=res.failed_clause or failed_sel,
+                missing_fields=res.missing_fields,
+            )
+
+        missing = sorted({f for r in selection_results.values() for f in r.missing_fields})
+        return False, MatchWhy(matched_fields=[], failed_clause=failed_sel, missing_fields=missing)
+
+
+def evaluate_selection(event: Dict[str, Any], selection: Dict[str, Any]) -> SelectionResult:
+    return compile_selection("selection", selection).evaluate(event)
+
+
+def evaluate_sigma_event(sigma: Dict[str, Any], event: Dict[str, Any]) -> Tuple[bool, MatchWhy]:
+    return CompiledRule(sigma).match(event)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import mmap
+import sys
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import zstandard as _zstandard  # type: ignore[import-not-found]
+except ImportError:
+    _zstandard = None
+
+try:
+    import orjson as _orjson  # type: ignore[import-not-found]
+except ImportError:
+    _orjson = None
+
+try:
+    import msgspec as _msgspec  # type: ignore[import-not-found]
+except ImportError:
+    _msgspec = None
+
+try:
+    import pyarrow as _pyarrow  # type: ignore[import-not-found]
+    import pyarrow.ipc as _pyarrow_ipc  # type: ignore[import-not-found]
+    import pyarrow.parquet as _pyarrow_parquet  # type: ignore[import-not-found]
+except ImportError:
+    _pyarrow = None
+
+
+EventSource = Union[str, Path]
+
+STDIN = "-"
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_ARROW_BATCH_SIZE = 65536
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".arrows", ".feather", ".ipc")
+
+
+@dataclass(frozen=True)
+class Decoder:
+    name: str
+    loads: Callable[[bytes], Any]
+    loads_lines: Optional[Callable[[bytes], List[Any]]] = None
+
+    def decode_batch(self, lines: List[bytes]) -> List[Any]:
+        if self.loads_lines is not None:
+            return self.loads_lines(b"\n".join(lines))
+        loads = self.loads
+        return [loads(line) for line in lines]
+
+
+def available_decoders() -> List[str]:
+    names = []
+    if _orjson is not None:
+        names.append("orjson")
+    if _msgspec is not None:
+        names.append("msgspec")
+    names.append("json")
+    return names
+
+
+def get_decoder(name: Optional[str] = None) -> Decoder:
+    name = name or available_decoders()[0]
+    if name == "orjson" and _orjson is not None:
+        return Decoder(name="orjson", loads=_orjson.loads)
+    if name == "msgspec" and _msgspec is not None:
+        decoder = _msgspec.json.Decoder()
+        return Decoder(name="msgspec", loads=decoder.decode, loads_lines=getattr(decoder, "decode_lines", None))
+    if name == "json":
+        return Decoder(name="json", loads=json.loads)
+    raise ValueError(f"JSON decoder not available: {name} (available: {', '.join(available_decoders())})")
+
+
+def open_binary(source: EventSource) -> IO[bytes]:
+    if str(source) == STDIN:
+        return sys.stdin.buffer
+
+    path = Path(source)
+    name = path.name.lower()
+    if name.endswith(".gz"):
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if name.endswith(".zst"):
+        if _zstandard is None:
+            raise ValueError(f"cannot read {path}: install 'zstandard' for .zst support")
+        reader = _zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        return io.BufferedReader(reader)  # type: ignore[arg-type]
+    return path.open("rb")
+
+
+def is_seekable_file(source: EventSource) -> bool:
+    name = str(source).lower()
+    if name == STDIN or is_arrow_file(source):
+        return False
+    return not name.endswith((".gz", ".zst")) and Path(source).is_file()
+
+
+def is_arrow_file(source: EventSource) -> bool:
+    return str(source).lower().endswith(PARQUET_SUFFIXES + ARROW_SUFFIXES)
+
+
+def arrow_projection(names: Sequence[str], fields: Iterable[str]) -> List[str]:
+    # A dotted field is read from a flat column of that name or from the struct column of its first part.
+    wanted = set()
+    for field in fields:
+        wanted.add(field)
+        wanted.add(field.split(".")[0])
+    return [name for name in names if name in wanted]
+
+
+def iter_record_batches(
+    source: EventSource,
+    fields: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+) -> Iterator[Any]:
+    path = Path(source)
+    if _pyarrow is None:
+        raise ValueError(f"cannot read {path}: install 'pyarrow' for Parquet/Arrow support")
+    fields = None if fields is None else list(fields)
+
+    if path.name.lower().endswith(PARQUET_SUFFIXES):
+        pf = _pyarrow_parquet.ParquetFile(path)
+        try:
+            columns = None if fields is None else arrow_projection(pf.schema_arrow.names, fields)
+            yield from pf.iter_batches(batch_size=batch_size, columns=columns)
+        finally:
+            pf.close()
+        return
+
+    with _pyarrow.memory_map(str(path)) as mm:
+        try:
+            reader = _pyarrow_ipc.open_file(mm)
+            batches: Iterable[Any] = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except _pyarrow.ArrowInvalid:
+            mm.seek(0)
+            batches = _pyarrow_ipc.open_stream(mm)
+        for batch in batches:
+            if fields is not None:
+                batch = batch.select(arrow_projection(batch.schema.names, fields))
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+def iter_arrow(
+    source: EventSource,
+    fields: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    for batch in iter_record_batches(source, fields=fields, batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def split_ranges(path: Path, shards: int) -> List[Tuple[int, int]]:
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    bounds = [0]
+    with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, shards):
+            target = max(size * i // shards, bounds[-1])
+            nl = mm.find(b"\n", target)
+            bounds.append(size if nl == -1 else nl + 1)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _decode_lines(
+    source: EventSource, dec: Decoder, numbered: List[Tuple[int, bytes]]
+) -> List[Dict[str, Any]]:
+    lines = [line for _, line in numbered if line]
+    try:
+        return dec.decode_batch(lines)
+    except Exception:
+        # Re-decode line by line to report where the bad input is.
+        for n, line in numbered:
+            if not line:
+                continue
+            try:
+                dec.loads(line)
+            except Exception as exc:
+                raise ValueError(f"{source}:{n}: invalid JSON: {exc}") from exc
+        raise
+
+
+def iter_jsonl_range(
+    path: Path,
+    start: int,
+    end: int,
+    decoder: Union[Decoder, str, None] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    dec = decoder if isinstance(decoder, Decoder) else get_decoder(decoder)
+    with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        lineno = 0
+        while pos < end:
+            numbered: List[Tuple[int, bytes]] = []
+            while pos < end and len(numbered) < batch_size:
+                nl = mm.find(b"\n", pos, end)
+                stop = end if nl == -1 else nl + 1
+                lineno += 1
+                numbered.append((lineno, mm[pos:stop].strip()))
+                pos = stop
+            # Line numbers are relative to the shard starting at byte `start`.
+            yield from _decode_lines(f"{path}@{start}", dec, numbered)
+
+
+def iter_jsonl(
+    source: EventSource,
+    decoder: Union[Decoder, str, None] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    dec = decoder if isinstance(decoder, Decoder) else get_decoder(decoder)
+    fh = open_binary(source)
+    try:
+        lineno = 0
+        while True:
+            raw = list(islice(fh, batch_size))
+            if not raw:
+                break
+            numbered = [(lineno + i, line.strip()) for i, line in enumerate(raw, start=1)]
+            lineno += len(raw)
+            yield from _decode_lines(source, dec, numbered)
+    finally:
+        if fh is not sys.stdin.buffer:
+            fh.close()
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import copy
+import gzip
+import io
+import json
+import random
+import string
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard as _zstandard  # type: ignore[import-not-found]
+except ImportError:
+    _zstandard = None
+
+try:
+    import pyarrow as _pyarrow  # type: ignore[import-not-found]
+    import pyarrow.parquet as _pyarrow_parquet  # type: ignore[import-not-found]
+except ImportError:
+    _pyarrow = None
+
+from harness.aggregate import TIMESTAMP_FIELD, parse_timestamp
+from harness.artifacts import RuleFile, _iter_sigma_rules, _read_jsonl
+from harness.engine import Engine, referenced_fields
+from harness.evaluate import EventView
+from harness.events import DEFAULT_ARROW_BATCH_SIZE, PARQUET_SUFFIXES, STDIN
+from harness.index import _logsource_key
+
+DEFAULT_MALICIOUS_RATE = 0.01
+DEFAULT_EVENTS_PER_SECOND = 1000.0
+DEFAULT_START = "2026-01-01T00:00:00Z"
+
+# Synthesized values kept per free field, so identifiers repeat like real hosts and users do.
+POOL_SIZE = 256
+
+Event = Dict[str, Any]
+Path_ = Tuple[str, ...]
+
+
+@dataclass
+class LogsourceModel:
+    name: str
+    rule_ids: List[str]
+    # Case events no rule fires on, and case events some rule fires on.
+    benign: List[Event] = field(default_factory=list)
+    malicious: List[Event] = field(default_factory=list)
+    # Every value seen at each leaf path of the benign events, with repeats.
+    values: Dict[Path_, List[Any]] = field(default_factory=dict)
+
+
+@dataclass
+class GenerateStats:
+    events: int = 0
+    malicious: int = 0
+    by_logsource: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "malicious": self.malicious,
+            "malicious_rate": round(self.malicious / self.events, 6) if self.events else 0.0,
+            "by_logsource": dict(sorted(self.by_logsource.items())),
+        }
+
+
+def _leaves(value: Any, path: Path_ = ()) -> Iterator[Tuple[Path_, Any]]:
+    # List items share their list's path, like the engine's any-element semantics.
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _leaves(item, path + (key,))
+    elif isinstance(value, list):
+        for item in value:
+            yield from _leaves(item, path)
+    else:
+        yield path, value
+
+
+def search_hit(engine: Engine, event: Event) -> bool:
+    # Whether any rule's search matches. Not engine.evaluate(): aggregation windows would
+    # make the verdict depend on the events drawn before.
+    view = EventView(event)
+    positions = engine.index.candidates(view) if engine.index is not None else range(len(engine.rules))
+    return any(engine.rules[pos].matches(view) for pos in positions)
+
+
+def _selected(name: str, wanted: Optional[Sequence[str]]) -> bool:
+    # "windows/sysmon", "sysmon" or "windows" all select the Sysmon logsource.
+    if not wanted:
+        return True
+    parts = name.lower().split("/")
+    return any(w.lower() == name.lower() or w.lower() in parts for w in wanted)
+
+
+def learn(repo_root: Path, logsources: Optional[Sequence[str]] = None) -> Tuple[List[LogsourceModel], Engine]:
+    rules: List[RuleFile] = _iter_sigma_rules(repo_root)
+    engine = Engine.from_rule_files(rules)
+    models: Dict[str, LogsourceModel] = {}
+    for rf in rules:
+        name = _logsource_key(rf.compiled)
+        if not _selected(name, logsources):
+            continue
+        model = models.setdefault(name, LogsourceModel(name=name, rule_ids=[]))
+        model.rule_ids.append(rf.compiled.rule_id)
+        for path in sorted((repo_root / "tests" / "cases" / rf.compiled.rule_id).glob("*.jsonl")):
+            for event in _read_jsonl(path):
+                # Pools follow the pack's verdict, not the file name: a benign case can fire another rule.
+                if search_hit(engine, event):
+                    model.malicious.append(event)
+                else:
+                    model.benign.append(event)
+                    for leaf, value in _leaves(event):
+                        if leaf != (TIMESTAMP_FIELD,):
+                            model.values.setdefault(leaf, []).append(value)
+    if not models:
+        raise ValueError(f"no rules for logsource(s): {', '.join(logsources or [])}")
+    empty = [m.name for m in models.values() if not m.benign]
+    if empty:
+        raise ValueError(f"no benign case events to learn from for: {', '.join(empty)}")
+    return [models[name] for name in sorted(models)], engine
+
+
+def _variant(value: Any, rng: random.Random) -> Any:
+    # Same shape, new content: digits stay digits, letters keep their case, punctuation is kept.
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        digits = len(str(abs(value)))
+        return rng.randint(10 ** (digits - 1) if digits > 1 else 0, 10**digits - 1)
+    if isinstance(value, float):
+        return round(rng.uniform(0, 2 * abs(value) or 1.0), 3)
+    if isinstance(value, str):
+        out = []
+        for ch in value:
+            if ch.isdigit():
+                out.append(rng.choice(string.digits))
+            elif ch in string.ascii_lowercase:
+                out.append(rng.choice(string.ascii_lowercase))
+            elif ch in string.ascii_uppercase:
+                out.append(rng.choice(string.ascii_uppercase))
+            else:
+                out.append(ch)
+        return "".join(out)
+    return value
+
+
+def _needs_variants(values: Sequence[Any]) -> bool:
+    # Numbers and digit-bearing strings (IPs, ids, sizes) get fresh values; plain words
+    # such as user or type names are categorical and keep their observed distribution.
+    return any(
+        (isinstance(v, (int, float)) and not isinstance(v, bool)) or (isinstance(v, str) and any(c.isdigit() for c in v))
+        for v in values
+    )
+
+
+def parse_start(value: Any) -> datetime:
+    seconds = parse_timestamp(value)
+    if seconds is None:
+        raise ValueError(f"bad start time: {value!r}")
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def format_timestamp(when: datetime) -> str:
+    return when.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# Endless events from learned logsource models. Benign events take a benign case event
+# as a template: fields the pack reads are redrawn from values seen at that path in
+# the logsource's benign cases, and the rest from a per-field pool of values with the
+# observed shape. A draw that any rule's search matches falls back to the template's own
+# values, so only injected events are search hits. Injected events are malicious case
+# events with their unread fields redrawn the same way. Event time advances at
+# `events_per_second`, and `disorder` moves each timestamp back by up to that many seconds.
+class Generator:
+    def __init__(
+        self,
+        models: Sequence[LogsourceModel],
+        engine: Engine,
+        seed: int = 0,
+        malicious_rate: float = DEFAULT_MALICIOUS_RATE,
+        events_per_second: float = DEFAULT_EVENTS_PER_SECOND,
+        start: Any = DEFAULT_START,
+        disorder: float = 0.0,
+    ):
+        if not 0 <= malicious_rate <= 1:
+            raise ValueError("malicious rate must be between 0 and 1")
+        if events_per_second <= 0:
+            raise ValueError("events per second must be positive")
+        if disorder < 0:
+            raise ValueError("disorder must be >= 0")
+        self.models = list(models)
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.malicious_rate = malicious_rate
+        self.events_per_second = events_per_second
+        self.start = parse_start(start)
+        self.disorder = disorder
+        self.hostile = [m for m in self.models if m.malicious]
+        if malicious_rate > 0 and not self.hostile:
+            raise ValueError("selected logsources have no malicious case events to inject")
+        self.read = set(referenced_fields(engine.rules))
+        self.pools: Dict[Tuple[str, Path_], List[Any]] = {}
+        for model in self.models:
+            for path in sorted(model.values):
+                observed = model.values[path]
+                if self._is_read(path) or not _needs_variants(observed):
+                    pool = observed
+                else:
+                    pool = [_variant(self.rng.choice(observed), self.rng) for _ in range(POOL_SIZE)]
+                self.pools[(model.name, path)] = pool
+        self.stats = GenerateStats()
+
+    def _is_read(self, path: Path_) -> bool:
+        # Joined back with dots, so {"a.b": ..} and {"a": {"b": ..}} both count as reading a.b,
+        # like the engine's accessors that try the literal dotted key first.
+        return any(".".join(path[:i]) in self.read for i in range(1, len(path) + 1))
+
+    def _fill(self, model: LogsourceModel, value: Any, path: Path_, redraw_read: bool) -> Any:
+        if isinstance(value, dict):
+            return {k: self._fill(model, v, path + (k,), redraw_read) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._fill(model, v, path, redraw_read) for v in value]
+        if path == (TIMESTAMP_FIELD,) or (not redraw_read and self._is_read(path)):
+            return value
+        pool = self.pools.get((model.name, path))
+        return copy.deepcopy(self.rng.choice(pool)) if pool else value
+
+    def _benign(self, model: LogsourceModel) -> Event:
+        template = self.rng.choice(model.benign)
+        event = self._fill(model, template, (), True)
+        if search_hit(self.engine, event):
+            event = self._fill(model, template, (), False)
+        return event
+
+    def _timestamp(self, n: int) -> str:
+        offset = n / self.events_per_second
+        if self.disorder:
+            offset = max(0.0, offset - self.rng.uniform(0, self.disorder))
+        return format_timestamp(self.start + timedelta(seconds=offset))
+
+    def events(self, count: int) -> Iterator[Event]:
+        stats = self.stats
+        rng = self.rng
+        for n in range(count):
+            if self.hostile and rng.random() < self.malicious_rate:
+                model = rng.choice(self.hostile)
+                event = self._fill(model, rng.choice(model.malicious), (), False)
+                stats.malicious += 1
+            else:
+                model = rng.choice(self.models)
+                event = self._benign(model)
+            event[TIMESTAMP_FIELD] = self._timestamp(n)
+            stats.events += 1
+            stats.by_logsource[model.name] = stats.by_logsource.get(model.name, 0) + 1
+            yield event
+
+
+def _open_text(path: str) -> IO[str]:
+    if path == STDIN:
+        return sys.stdout
+    name = path.lower()
+    if name.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")  # type: ignore[return-value]
+    if name.endswith(".zst"):
+        if _zstandard is None:
+            raise ValueError(f"cannot write {path}: install 'zstandard' for .zst support")
+        writer = _zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+        return io.TextIOWrapper(writer, encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def write_jsonl(events: Iterable[Event], path: str) -> int:
+    out = _open_text(path)
+    written = 0
+    try:
+        for event in events:
+            out.write(json.dumps(event, separators=(",", ":")) + "\n")
+            written += 1
+    finally:
+        if out is sys.stdout:
+            out.flush()
+        else:
+            out.close()
+    return written
+
+
+def parquet_schema(models: Sequence[LogsourceModel]) -> Any:
+    if _pyarrow is None:
+        raise ValueError("install 'pyarrow' to write Parquet")
+    # One schema for the whole file: the union of every template's fields.
+    templates = [e for m in models for e in m.benign + m.malicious]
+    return _pyarrow.schema(list(_pyarrow.array(templates).type))
+
+
+def write_parquet(
+    events: Iterable[Event], path: str, schema: Any, batch_size: int = DEFAULT_ARROW_BATCH_SIZE
+) -> int:
+    if _pyarrow is None:
+        raise ValueError("install 'pyarrow' to write Parquet")
+    written = 0
+    batch: List[Event] = []
+    with _pyarrow_parquet.ParquetWriter(path, schema) as writer:
+        for event in events:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                writer.write_table(_pyarrow.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(_pyarrow.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def is_parquet_path(path: str) -> bool:
+    return path.lower().endswith(PARQUET_SUFFIXES)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set
+
+from harness.evaluate import (
+    AndNode,
+    CompiledClause,
+    CompiledRule,
+    ConditionNode,
+    EventView,
+    FieldAccessor,
+    NameNode,
+    OrNode,
+)
+
+
+@dataclass(frozen=True)
+class LiteralKey:
+    field: str
+    accessor: FieldAccessor
+    values: FrozenSet[Any]
+
+
+@dataclass
+class IndexStats:
+    events: int = 0
+    evaluated: int = 0
+    skipped: int = 0
+    rules_by_logsource: Dict[str, int] = field(default_factory=dict)
+    evaluated_by_logsource: Dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: "IndexStats") -> None:
+        self.events += other.events
+        self.evaluated += other.evaluated
+        self.skipped += other.skipped
+        for logsource, rules in other.rules_by_logsource.items():
+            self.rules_by_logsource.setdefault(logsource, rules)
+        for logsource, count in other.evaluated_by_logsource.items():
+            self.evaluated_by_logsource[logsource] = self.evaluated_by_logsource.get(logsource, 0) + count
+
+    @property
+    def pruning_ratio(self) -> float:
+        total = self.evaluated + self.skipped
+        return 0.0 if total == 0 else self.skipped / total
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "evaluated": self.evaluated,
+            "skipped": self.skipped,
+            "pruning_ratio": round(self.pruning_ratio, 4),
+            "by_logsource": {
+                logsource: {
+                    "evaluated": self.evaluated_by_logsource.get(logsource, 0),
+                    "skipped": self.events * rules - self.evaluated_by_logsource.get(logsource, 0),
+                }
+                for logsource, rules in sorted(self.rules_by_logsource.items())
+            },
+        }
+
+
+def _required_selections(node: Optional[ConditionNode]) -> Set[str]:
+    if isinstance(node, NameNode):
+        return {node.name}
+    if isinstance(node, AndNode):
+        return _required_selections(node.left) | _required_selections(node.right)
+    if isinstance(node, OrNode):
+        return _required_selections(node.left) & _required_selections(node.right)
+    return set()
+
+
+def _literal_clauses(rule: CompiledRule) -> List[CompiledClause]:
+    out: List[CompiledClause] = []
+    if rule.aggregation is not None and rule.aggregation.near:
+        # near also tracks selections outside the search, so every event may feed it.
+        return out
+    for name in sorted(_required_selections(rule.ast)):
+        selection = rule.selections.get(name)
+        if selection is None:
+            continue
+        for clause in selection.clauses:
+            if clause.op != "eq" or not clause.needles:
+                continue
+            try:
+                frozenset(clause.needles)
+            except TypeError:
+                continue
+            out.append(clause)
+    return out
+
+
+def _logsource_key(rule: CompiledRule) -> str:
+    logsource = rule.sigma.get("logsource") or {}
+    product = str(logsource.get("product", "")).strip()
+    service = str(logsource.get("service", "")).strip()
+    if product and service:
+        return f"{product}/{service}"
+    return service or product or "unknown"
+
+
+class RuleIndex:
+    def __init__(self, rules: Sequence[CompiledRule]):
+        self.rules: List[CompiledRule] = list(rules)
+        self.logsources: List[str] = [_logsource_key(r) for r in self.rules]
+        self.keys: List[Optional[LiteralKey]] = [None] * len(self.rules)
+        self.stats = IndexStats(rules_by_logsource=dict(Counter(self.logsources)))
+
+        per_rule = [_literal_clauses(r) for r in self.rules]
+        # A literal shared by fewer rules prunes more, so eventName beats eventSource.
+        shared = Counter((c.field, frozenset(c.needles)) for clauses in per_rule for c in clauses)
+
+        self._fields: Dict[FieldAccessor, Dict[Any, List[int]]] = {}
+        self.unindexed: List[int] = []
+        for pos, clauses in enumerate(per_rule):
+            if self.rules[pos].ast is None:
+                continue
+            if not clauses:
+                self.unindexed.append(pos)
+                continue
+            best = min(clauses, key=lambda c: (shared[(c.field, frozenset(c.needles))], len(c.needles)))
+            key = LiteralKey(field=best.field, accessor=best.accessor, values=frozenset(best.needles))
+            self.keys[pos] = key
+            by_value = self._fields.setdefault(key.accessor, {})
+            for value in key.values:
+                by_value.setdefault(value, []).append(pos)
+
+    def reset_stats(self) -> IndexStats:
+        stats = self.stats
+        self.stats = IndexStats(rules_by_logsource=dict(stats.rules_by_logsource))
+        return stats
+
+    def candidates(self, view: EventView) -> List[int]:
+        found: Set[int] = set(self.unindexed)
+        for accessor, by_value in self._fields.items():
+            actual = view.get(accessor)
+            if actual is None:
+                continue
+            for value in actual if isinstance(actual, list) else (actual,):
+                try:
+                    hits = by_value.get(value)
+                except TypeError:
+                    continue
+                if hits:
+                    found.update(hits)
+
+        stats = self.stats
+        stats.events += 1
+        stats.evaluated += len(found)
+        stats.skipped += len(self.rules) - len(found)
+        by_logsource = stats.evaluated_by_logsource
+        for pos in found:
+            logsource = self.logsources[pos]
+            by_logsource[logsource] = by_logsource.get(logsource, 0) + 1
+        return sorted(found)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import ahocorasick as _pyahocorasick  # type: ignore[import-not-found]
+except ImportError:
+    _pyahocorasick = None
+
+
+BACKENDS = ("python", "pyahocorasick")
+
+# Below these sizes the C-level `needle in value` loop beats one automaton scan
+# (see `python -m harness.bench.multipattern`; the python crossover is ~128-512).
+# No field in the shipped pack has more than a handful of needles, so the python
+# backend only engages for large imported packs and in the benchmark.
+MIN_PATTERNS = {"python": 256, "pyahocorasick": 16}
+
+Hits = Tuple[Set[int], Set[int], Set[int]]
+
+
+def default_backend() -> str:
+    return "pyahocorasick" if _pyahocorasick is not None else "python"
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for pid, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (pid,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int]]:
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                yield end, pid
+
+
+class PatternSet:
+    def __init__(self, patterns: Sequence[str], backend: Optional[str] = None):
+        self.patterns = tuple(patterns)
+        self.backend = backend or default_backend()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"unknown multi-pattern backend: {self.backend}")
+        self._lengths = tuple(len(p) for p in self.patterns)
+        self._empty = frozenset(pid for pid, p in enumerate(self.patterns) if not p)
+
+        non_empty = [(pid, p) for pid, p in enumerate(self.patterns) if p]
+        self._pids = [pid for pid, _ in non_empty]
+        self._automaton: Optional[object] = None
+        if self.backend == "pyahocorasick":
+            if _pyahocorasick is None:
+                raise ValueError("pyahocorasick backend requested but not installed")
+            if non_empty:
+                automaton = _pyahocorasick.Automaton()
+                for pid, pattern in non_empty:
+                    automaton.add_word(pattern, pid)
+                automaton.make_automaton()
+                self._automaton = automaton
+        else:
+            self._automaton = AhoCorasick([p for _, p in non_empty])
+
+    def _iter(self, text: str) -> Iterator[Tuple[int, int]]:
+        automaton = self._automaton
+        if automaton is None:
+            return iter(())
+        if isinstance(automaton, AhoCorasick):
+            pids = self._pids
+            return ((end, pids[i]) for end, i in automaton.iter(text))
+        return automaton.iter(text)  # type: ignore[attr-defined]
+
+    def scan(self, texts: Iterable[str], hits: Optional[Hits] = None) -> Hits:
+        contains, prefix, suffix = hits if hits is not None else (set(), set(), set())
+        lengths = self._lengths
+        for text in texts:
+            contains.update(self._empty)
+            prefix.update(self._empty)
+            suffix.update(self._empty)
+            last = len(text) - 1
+            for end, pid in self._iter(text):
+                contains.add(pid)
+                if end + 1 == lengths[pid]:
+                    prefix.add(pid)
+                if end == last:
+                    suffix.add(pid)
+        return contains, prefix, suffix
+
+
+# Per-field pool of lowercased needles shared by every clause compiled against it.
+class PatternRegistry:
+    def __init__(self, backend: Optional[str] = None, min_patterns: Optional[int] = None):
+        self.backend = backend or default_backend()
+        self.min_patterns = MIN_PATTERNS[self.backend] if min_patterns is None else min_patterns
+        self._ids: Dict[str, Dict[str, int]] = {}
+        self._sets: Dict[str, Optional[PatternSet]] = {}
+
+    def register(self, field: str, needles: Iterable[str]) -> FrozenSet[int]:
+        ids = self._ids.setdefault(field, {})
+        out = frozenset(ids.setdefault(n, len(ids)) for n in needles)
+        self._sets.pop(field, None)
+        return out
+
+    def pattern_set(self, field: str) -> Optional[PatternSet]:
+        try:
+            return self._sets[field]
+        except KeyError:
+            ids = self._ids.get(field, {})
+            ps = PatternSet(list(ids), backend=self.backend) if len(ids) >= self.min_patterns else None
+            self._sets[field] = ps
+            return ps
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from harness.columnar import ColumnarEngine
+from harness.engine import Engine, ReplayResult, RuleTally, replay_windows
+from harness.evaluate import CompiledRule, MatchWhy
+from harness.events import iter_jsonl, iter_jsonl_range, split_ranges
+from harness.index import IndexStats
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    if not jobs or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def pool_map(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    jobs: int,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = (),
+) -> List[R]:
+    workers = max(1, min(jobs, len(items)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        # map() keeps input order, so merged results do not depend on scheduling.
+        return list(pool.map(fn, items))
+
+
+_WORKER_ENGINE: Optional[Union[Engine, ColumnarEngine]] = None
+
+
+def _init_replay_worker(rules: List[CompiledRule], use_index: bool, columnar: bool = False) -> None:
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = ColumnarEngine(rules) if columnar else Engine(rules, use_index=use_index)
+
+
+def _replay_range(task: Tuple[str, int, int, Optional[str]]) -> Tuple[ReplayResult, Optional[IndexStats]]:
+    path, start, end, decoder = task
+    engine = _WORKER_ENGINE
+    if engine is None:
+        raise RuntimeError("replay worker was not initialized")
+    result = engine.replay(iter_jsonl_range(Path(path), start, end, decoder=decoder))
+    stats = engine.index.reset_stats() if engine.index is not None else None
+    return result, stats
+
+
+# (event position in the batch, rule id, why) for every alert, plus per-rule test time and counts.
+BatchAlerts = Tuple[List[Tuple[int, str, MatchWhy]], List[int], List[int]]
+
+
+def _evaluate_events(events: List[Dict[str, Any]]) -> BatchAlerts:
+    engine = _WORKER_ENGINE
+    if not isinstance(engine, Engine):
+        raise RuntimeError("evaluation worker was not initialized")
+    timings = [0] * len(engine.rules)
+    evaluated = [0] * len(engine.rules)
+    alerts = [
+        (pos, rule.rule_id, why)
+        for pos, event in enumerate(events)
+        for rule, why in engine.evaluate(event, timings=timings, evaluated=evaluated)
+    ]
+    return alerts, timings, evaluated
+
+
+def replay_file_sharded(
+    engine: Union[Engine, ColumnarEngine],
+    path: Path,
+    jobs: int,
+    shards: Optional[int] = None,
+    decoder: Optional[str] = None,
+) -> ReplayResult:
+    ranges = split_ranges(path, shards or jobs)
+    tasks = [(str(path), start, end, decoder) for start, end in ranges]
+    # Aggregation windows need every event in order: like Pipeline, only the stateless rules
+    # are sharded, and the windowed ones read the whole file in this process meanwhile.
+    pooled = [rule for rule, window in zip(engine.rules, engine.windows) if window is None]
+    if jobs <= 1 or len(tasks) <= 1 or not pooled:
+        # Windows carry over between replay() calls, so in-order ranges replay like the whole file.
+        shard_results = [(engine.replay(iter_jsonl_range(path, start, end, decoder=decoder)), None) for start, end in ranges]
+        ordered: Optional[ReplayResult] = None
+    else:
+        use_index = engine.index is not None
+        columnar = isinstance(engine, ColumnarEngine)
+        workers = min(jobs, len(tasks))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_replay_worker, initargs=(pooled, use_index, columnar)
+        ) as pool:
+            pending = pool.map(_replay_range, tasks)
+            ordered = replay_windows(engine.rules, engine.windows, iter_jsonl(path, decoder=decoder)) if engine.stateful else None
+            shard_results = list(pending)
+
+    merged = ReplayResult(tallies={rule.rule_id: RuleTally() for rule in engine.rules})
+    for result, stats in shard_results:
+        merged.merge(result)
+        if stats is not None and engine.index is not None:
+            engine.index.stats.merge(stats)
+    if ordered is not None:
+        merged.tallies.update(ordered.tallies)
+    return merged
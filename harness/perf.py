@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from harness.evaluate import CompiledRule, CompiledSelection, EventView, _as_view, compile_plan
+from harness.schemas import PERF_SCHEMA, validate_json
+
+PERF_VERSION = "1"
+PERF_NAME = "perf.json"
+
+# A rule whose average evaluation takes longer than this is flagged.
+DEFAULT_BUDGET_US = 50.0
+
+SUBSTRING_OPS = ("contains", "startswith", "endswith")
+
+
+@dataclass
+class ClauseProfile:
+    field: str
+    op: str
+    description: str
+    evaluations: int = 0
+    rejections: int = 0
+    total_ns: int = 0
+
+    @property
+    def avg_us(self) -> float:
+        return self.total_ns / self.evaluations / 1000 if self.evaluations else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "field": self.field,
+            "op": self.op,
+            "clause": self.description,
+            "evaluations": self.evaluations,
+            "rejections": self.rejections,
+            "total_ms": round(self.total_ns / 1e6, 4),
+            "avg_us": round(self.avg_us, 3),
+        }
+
+
+@dataclass
+class SelectionProfile:
+    name: str
+    # In the boolean path's order when first instrumented.
+    clauses: List[ClauseProfile] = field(default_factory=list)
+    evaluations: int = 0
+    rejections: int = 0
+    total_ns: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "rejections": self.rejections,
+            "total_ms": round(self.total_ns / 1e6, 4),
+            "clauses": [c.as_dict() for c in self.clauses],
+        }
+
+
+@dataclass
+class RuleProfile:
+    rule_id: str
+    selections: Dict[str, SelectionProfile] = field(default_factory=dict)
+    evaluations: int = 0
+    # Evaluations the search rejected; for aggregation rules, before the window.
+    rejections: int = 0
+    total_ns: int = 0
+
+    @property
+    def avg_us(self) -> float:
+        return self.total_ns / self.evaluations / 1000 if self.evaluations else 0.0
+
+    def _clauses(self) -> List[ClauseProfile]:
+        return [c for s in self.selections.values() for c in s.clauses]
+
+    def share(self, ops: Tuple[str, ...]) -> float:
+        # Fraction of the rule's clause time spent in clauses with these operators.
+        clauses = self._clauses()
+        total = sum(c.total_ns for c in clauses)
+        return sum(c.total_ns for c in clauses if c.op in ops) / total if total else 0.0
+
+    def costliest(self) -> Optional[ClauseProfile]:
+        return max(self._clauses(), key=lambda c: c.total_ns, default=None)
+
+    def as_dict(self, budget_us: float) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "rejections": self.rejections,
+            "total_ms": round(self.total_ns / 1e6, 4),
+            "avg_us": round(self.avg_us, 3),
+            "regex_share": round(self.share(("re",)), 4),
+            "contains_share": round(self.share(SUBSTRING_OPS), 4),
+            "over_budget": self.avg_us > budget_us,
+            "selections": {name: s.as_dict() for name, s in self.selections.items()},
+        }
+
+
+class _TimedSelection:
+    # Stands in for a CompiledSelection in compile_plan(), timing each clause it tries.
+    def __init__(self, selection: CompiledSelection, profile: SelectionProfile):
+        by_clause = {c.description: c for c in profile.clauses}
+        self.pairs = [(clause, by_clause[clause.description]) for clause in selection.order]
+        self.profile = profile
+
+    def test(self, event: Any) -> bool:
+        view = _as_view(event)
+        clock = time.perf_counter_ns
+        started = clock()
+        passed = True
+        for clause, stats in self.pairs:
+            clause_started = clock()
+            actual = view.get(clause.accessor)
+            ok = actual is not None and clause.matches(actual, view)
+            stats.total_ns += clock() - clause_started
+            stats.evaluations += 1
+            if not ok:
+                stats.rejections += 1
+                passed = False
+                break
+        profile = self.profile
+        profile.total_ns += clock() - started
+        profile.evaluations += 1
+        if not passed:
+            profile.rejections += 1
+        return passed
+
+
+# Collects per-rule, per-selection and per-clause costs. instrument() returns a drop-in
+# replacement for rule.matches that runs the same plan with every step timed, so only
+# the evaluations and short-circuits of the boolean path are counted. Timing each clause
+# adds overhead; compare rules against each other rather than against an uninstrumented run.
+class Profiler:
+    def __init__(self, budget_us: float = DEFAULT_BUDGET_US):
+        if budget_us <= 0:
+            raise ValueError("cost budget must be positive")
+        self.budget_us = budget_us
+        self.rules: Dict[str, RuleProfile] = {}
+
+    def instrument(self, rule: CompiledRule) -> Callable[[Any], bool]:
+        profile = self.rules.setdefault(rule.rule_id, RuleProfile(rule_id=rule.rule_id))
+        timed: Dict[str, Any] = {}
+        for name, selection in rule.selections.items():
+            stats = profile.selections.get(name)
+            if stats is None:
+                stats = profile.selections[name] = SelectionProfile(
+                    name=name, clauses=[ClauseProfile(c.field, c.op, c.description) for c in selection.order]
+                )
+            timed[name] = _TimedSelection(selection, stats)
+        test = compile_plan(rule.plan, timed)
+
+        def profiled(event: Any) -> bool:
+            view = event if isinstance(event, EventView) else EventView(event)
+            started = time.perf_counter_ns()
+            matched = test(view)
+            profile.total_ns += time.perf_counter_ns() - started
+            profile.evaluations += 1
+            if not matched:
+                profile.rejections += 1
+            return matched
+
+        return profiled
+
+    def over_budget(self) -> List[str]:
+        return sorted(rid for rid, p in self.rules.items() if p.avg_us > self.budget_us)
+
+    def ranked(self) -> List[RuleProfile]:
+        return sorted(self.rules.values(), key=lambda p: -p.total_ns)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": PERF_VERSION,
+            "budget_us": self.budget_us,
+            "over_budget": self.over_budget(),
+            "rules": {p.rule_id: p.as_dict(self.budget_us) for p in self.ranked()},
+        }
+
+
+def perf_path(results_path: Path) -> Path:
+    return results_path.with_name(PERF_NAME)
+
+
+def save_perf(path: Path, profiler: Profiler) -> Dict[str, Any]:
+    report = profiler.as_dict()
+    validate_json(report, PERF_SCHEMA)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from harness.engine import Engine
+from harness.evaluate import CompiledRule, MatchWhy
+from harness.events import Decoder, get_decoder
+from harness.parallel import BatchAlerts, _evaluate_events, _init_replay_worker
+from harness.stream import DEFAULT_POLL_INTERVAL, RuleLatency, StreamStats, alert_record, decode_lines
+
+DEFAULT_PIPELINE_BATCH = 512
+DEFAULT_PIPELINE_QUEUE = 8
+
+STAGES = ("read", "decode", "evaluate", "sink")
+
+# seq, events, and when the chunk each event came from was received (perf_counter_ns).
+Batch = Tuple[int, List[Dict[str, Any]], List[int]]
+
+
+@dataclass
+class StageStats:
+    events: int = 0
+    busy: float = 0.0
+    # Depth of the queue this stage reads from; the read stage has none.
+    queue_depth: int = 0
+    queue_max: int = 0
+
+    def as_dict(self, elapsed: float, parallelism: int = 1) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "busy_s": round(self.busy, 4),
+            # What the stage could sustain on its own, and how much of the run it was working.
+            "capacity_eps": round(self.events / self.busy, 1) if self.busy > 0 else None,
+            "utilization": round(self.busy / (elapsed * parallelism), 4) if elapsed > 0 else 0.0,
+            "queue_depth": self.queue_depth,
+            "queue_max": self.queue_max,
+        }
+
+
+@dataclass
+class PipelineStats(StreamStats):
+    workers: int = 1
+    stages: Dict[str, StageStats] = field(default_factory=lambda: {name: StageStats() for name in STAGES})
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = super().as_dict()
+        elapsed = time.perf_counter() - self.started
+        out["stages"] = {
+            name: stage.as_dict(elapsed, self.workers if name == "evaluate" else 1)
+            for name, stage in self.stages.items()
+        }
+        return out
+
+    @property
+    def bottleneck(self) -> str:
+        # The busiest stage, with evaluate's time spread over its workers.
+        return max(
+            STAGES,
+            key=lambda name: self.stages[name].busy / (self.workers if name == "evaluate" else 1),
+        )
+
+
+# reader -> decoder -> evaluator pool -> alert sink, connected by bounded asyncio
+# queues so a slow stage fills the queue in front of it and stalls the ones upstream.
+# Decoded events are batched so each hop to a worker process carries many events.
+# Aggregation rules need every event in order, so they run in the sink instead of the pool.
+class Pipeline:
+    def __init__(
+        self,
+        engine: Engine,
+        sink: IO[str],
+        workers: int = 1,
+        batch_size: int = DEFAULT_PIPELINE_BATCH,
+        queue_size: int = DEFAULT_PIPELINE_QUEUE,
+        decoder: Optional[str] = None,
+    ):
+        use_index = engine.index is not None
+        self.sink = sink
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.decoder: Decoder = get_decoder(decoder)
+        self.pooled: List[CompiledRule] = [r for r in engine.rules if r.aggregation is None]
+        self.ordered = Engine([r for r in engine.rules if r.aggregation is not None], use_index=use_index)
+        self.use_index = use_index
+        self.by_id: Dict[str, CompiledRule] = {r.rule_id: r for r in self.pooled}
+        self.stats = PipelineStats(workers=self.workers, by_rule={r.rule_id: RuleLatency() for r in engine.rules})
+
+    def run(
+        self,
+        source: Iterator[List[bytes]],
+        stop: threading.Event,
+        max_events: int = 0,
+        idle_timeout: float = 0.0,
+        on_tick: Optional[Callable[[PipelineStats], None]] = None,
+        tick_interval: float = 5.0,
+    ) -> PipelineStats:
+        asyncio.run(self._run(source, stop, max_events, idle_timeout, on_tick, tick_interval))
+        return self.stats
+
+    async def _run(
+        self,
+        source: Iterator[List[bytes]],
+        stop: threading.Event,
+        max_events: int,
+        idle_timeout: float,
+        on_tick: Optional[Callable[[PipelineStats], None]],
+        tick_interval: float,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        stages = stats.stages
+        raw: "asyncio.Queue[Optional[Tuple[List[bytes], int]]]" = asyncio.Queue(self.queue_size)
+        batches: "asyncio.Queue[Optional[Batch]]" = asyncio.Queue(self.queue_size)
+        results: "asyncio.Queue[Optional[Tuple[Batch, BatchAlerts]]]" = asyncio.Queue(self.queue_size)
+        queues = {"decode": raw, "evaluate": batches, "sink": results}
+        last_input = [time.monotonic()]
+
+        # The source is read on a daemon thread of its own: a blocking source (stdin, a socket)
+        # must not hold an executor thread that asyncio.run() waits for at shutdown. `slots`
+        # bounds the chunks in flight, so a full pipeline still stalls the reader.
+        inbox: "asyncio.Queue[Optional[Tuple[List[bytes], int]]]" = asyncio.Queue()
+        slots = threading.Semaphore(self.queue_size)
+        failure: List[BaseException] = []
+
+        def post(chunk: Optional[Tuple[List[bytes], int]]) -> None:
+            try:
+                loop.call_soon_threadsafe(inbox.put_nowait, chunk)
+            except RuntimeError:
+                pass  # The loop has already closed.
+
+        def reader() -> None:
+            it = iter(source)
+            try:
+                while True:
+                    # Time blocked in the source is the read stage's busy time, so a slow source can be the bottleneck.
+                    started = time.perf_counter()
+                    lines = next(it, None)
+                    stages["read"].busy += time.perf_counter() - started
+                    if lines is None:
+                        break
+                    received = time.perf_counter_ns()
+                    while not slots.acquire(timeout=DEFAULT_POLL_INTERVAL):
+                        if stop.is_set():
+                            return
+                    post((lines, received))
+                    if stop.is_set():
+                        return
+            except BaseException as exc:
+                failure.append(exc)
+            finally:
+                post(None)
+
+        async def read() -> None:
+            try:
+                while not stop.is_set():
+                    try:
+                        chunk = await asyncio.wait_for(inbox.get(), DEFAULT_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        continue
+                    if chunk is None:
+                        break
+                    slots.release()
+                    last_input[0] = time.monotonic()
+                    stages["read"].events += len(chunk[0])
+                    await raw.put(chunk)
+            finally:
+                await raw.put(None)
+
+        async def decode() -> None:
+            seq = 0
+            events: List[Dict[str, Any]] = []
+            received: List[int] = []
+            while True:
+                chunk = await raw.get()
+                if chunk is not None:
+                    lines, received_ns = chunk
+                    started = time.perf_counter()
+                    decoded, malformed = decode_lines(self.decoder, lines)
+                    stages["decode"].busy += time.perf_counter() - started
+                    stages["decode"].events += len(decoded)
+                    stats.malformed += malformed
+                    events.extend(decoded)
+                    received.extend([received_ns] * len(decoded))
+                # Batches fill up under load; when input is idle a partial batch goes out at once.
+                while len(events) >= self.batch_size or (events and (chunk is None or raw.empty())):
+                    await batches.put((seq, events[: self.batch_size], received[: self.batch_size]))
+                    seq += 1
+                    del events[: self.batch_size], received[: self.batch_size]
+                if chunk is None:
+                    for _ in range(self.workers):
+                        await batches.put(None)
+                    return
+
+        async def evaluate(pool: ProcessPoolExecutor) -> None:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    await results.put(None)
+                    return
+                started = time.perf_counter()
+                alerts = await loop.run_in_executor(pool, _evaluate_events, batch[1])
+                stages["evaluate"].busy += time.perf_counter() - started
+                stages["evaluate"].events += len(batch[1])
+                await results.put((batch, alerts))
+
+        async def write() -> None:
+            pending: Dict[int, Tuple[Batch, BatchAlerts]] = {}
+            next_seq = 0
+            finished = 0
+            while finished < self.workers:
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                pending[item[0][0]] = item
+                # Workers finish out of order; alerts are written in input order.
+                while next_seq in pending:
+                    started = time.perf_counter()
+                    self._emit(*pending.pop(next_seq))
+                    stages["sink"].busy += time.perf_counter() - started
+                    next_seq += 1
+                if max_events and stats.events >= max_events:
+                    stop.set()
+
+        async def monitor() -> None:
+            last_tick = time.monotonic()
+            while True:
+                await asyncio.sleep(DEFAULT_POLL_INTERVAL)
+                for name, q in queues.items():
+                    stages[name].queue_depth = q.qsize()
+                    stages[name].queue_max = max(stages[name].queue_max, q.qsize())
+                now = time.monotonic()
+                if idle_timeout and now - last_input[0] >= idle_timeout:
+                    stop.set()
+                if on_tick is not None and now - last_tick >= tick_interval:
+                    on_tick(stats)
+                    last_tick = now
+
+        # Workers start while the reader thread runs; a forked worker could inherit a lock it holds and hang at exit.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_replay_worker,
+            initargs=(self.pooled, self.use_index),
+        )
+        thread = threading.Thread(target=reader, name="pipeline-reader", daemon=True)
+        thread.start()
+        watcher = asyncio.create_task(monitor())
+        try:
+            await asyncio.gather(read(), decode(), write(), *(evaluate(pool) for _ in range(self.workers)))
+        finally:
+            stop.set()
+            watcher.cancel()
+            pool.shutdown(wait=True, cancel_futures=True)
+            thread.join(timeout=1.0)
+        for name, q in queues.items():
+            stages[name].queue_depth = q.qsize()
+        if failure:
+            raise failure[0]
+
+    def _emit(self, batch: Batch, alerts: BatchAlerts) -> None:
+        _, events, received = batch
+        hits, timings, evaluated = alerts
+        stats = self.stats
+        stats.add_timings(self.pooled, timings, evaluated)
+        by_event: Dict[int, List[Tuple[CompiledRule, MatchWhy]]] = {}
+        for pos, rule_id, why in hits:
+            by_event.setdefault(pos, []).append((self.by_id[rule_id], why))
+
+        written = 0
+        ordered = self.ordered
+        timed = [0] * len(ordered.rules)
+        counts = [0] * len(ordered.rules)
+        for pos, event in enumerate(events):
+            fired = by_event.get(pos, [])
+            if ordered.rules:
+                fired = fired + ordered.evaluate(event, timings=timed, evaluated=counts)
+            latency = time.perf_counter_ns() - received[pos]
+            stats.events += 1
+            stats.latencies.append(latency)
+            for rule, why in fired:
+                stats.alerts += 1
+                stats.by_rule[rule.rule_id].alerts += 1
+                self.sink.write(alert_record(rule, event, why, latency))
+                written += 1
+        stats.add_timings(ordered.rules, timed, counts)
+        stats.stages["sink"].events += len(events)
+        if written:
+            self.sink.flush()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import threading
+import time
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 
 from rich.console import Console
 from rich.table import Table
@@ -13,18 +16,43 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from harness.artifacts import generate_artifacts, run_all_tests
+from harness.artifacts import SavedResults, _iter_sigma_rules, generate_artifacts, run_all_tests, save_results
+from harness.cache import DEFAULT_CACHE_DIR, ResultCache
+from harness.columnar import ColumnarEngine
+from harness.engine import Engine, ReplayResult, RuleTally
+from harness.events import (
+    STDIN,
+    available_decoders,
+    is_arrow_file,
+    is_seekable_file,
+    iter_arrow,
+    iter_jsonl,
+    iter_record_batches,
+)
+from harness.generate import (
+    DEFAULT_EVENTS_PER_SECOND,
+    DEFAULT_MALICIOUS_RATE,
+    DEFAULT_START,
+    Generator,
+    is_parquet_path,
+    learn,
+    parquet_schema,
+    write_jsonl,
+    write_parquet,
+)
+from harness.parallel import replay_file_sharded, resolve_jobs
+from harness.perf import DEFAULT_BUDGET_US, PERF_NAME, Profiler, perf_path, save_perf
+from harness.pipeline import DEFAULT_PIPELINE_BATCH, DEFAULT_PIPELINE_QUEUE, Pipeline, PipelineStats
+from harness.stream import DEFAULT_QUEUE_SIZE, StreamDetector, StreamStats, open_source, run_stream
 
 
 def _repo_root() -> Path:
     return REPO_ROOT
 
 
-def cmd_test(rule: Optional[str]) -> int:
-    console = Console()
-    repo_root = _repo_root()
-    results, failures = run_all_tests(repo_root, only_rule=rule)
-
+def _print_test_results(
+    console: Console, results: Dict[str, Any], failures: List[Dict[str, Any]], cache: Optional[ResultCache]
+) -> int:
     table = Table(title="detpack-lab harness")
     table.add_column("Rule")
     table.add_column("Case")
@@ -48,6 +76,8 @@ def cmd_test(rule: Optional[str]) -> int:
     console.print(
         f"pass_rate={results['summary']['pass_rate']}% events_total={results['summary']['events_total']} alerts_expected={results['summary']['alerts_expected']} alerts_actual={results['summary']['alerts_actual']}"
     )
+    if cache is not None:
+        console.print(f"cache hits={cache.hits} misses={cache.misses} dir={cache.dir}")
 
     if failures:
         console.print(f"[red]FAIL[/red] {len(failures)} failing test(s)")
@@ -59,11 +89,351 @@ def cmd_test(rule: Optional[str]) -> int:
     return 0
 
 
-def cmd_artifacts(rule: Optional[str], out_dir: Optional[str]) -> int:
+def _print_perf(console: Console, profiler: Profiler, path: Path) -> None:
+    table = Table(title="detpack-lab rule cost")
+    table.add_column("Rule")
+    table.add_column("Evaluated")
+    table.add_column("Rejected")
+    table.add_column("Total (ms)")
+    table.add_column("Avg (us)")
+    table.add_column("Regex")
+    table.add_column("Contains")
+    table.add_column("Costliest clause")
+    table.add_column("Budget")
+    for p in profiler.ranked():
+        costliest = p.costliest()
+        over = p.avg_us > profiler.budget_us
+        table.add_row(
+            p.rule_id,
+            str(p.evaluations),
+            str(p.rejections),
+            f"{p.total_ns / 1e6:.3f}",
+            f"{p.avg_us:.2f}",
+            f"{p.share(('re',)) * 100:.0f}%",
+            f"{p.share(('contains', 'startswith', 'endswith')) * 100:.0f}%",
+            "-" if costliest is None else f"{costliest.field}|{costliest.op}",
+            "[red]over[/red]" if over else "ok",
+        )
+    console.print(table)
+    over_budget = profiler.over_budget()
+    if over_budget:
+        console.print(
+            f"[yellow]WARN[/yellow] {len(over_budget)} rule(s) over the {profiler.budget_us:g}us budget: {', '.join(over_budget)}"
+        )
+    console.print(f"wrote {path}")
+
+
+def cmd_test(
+    rule: Optional[str],
+    jobs: int = 1,
+    use_cache: bool = True,
+    save_to: Optional[str] = None,
+    profile: bool = False,
+    budget_us: float = DEFAULT_BUDGET_US,
+    profile_to: Optional[str] = None,
+) -> int:
+    # Without a results path there is no "next to results.json"; never default into the tracked site data.
+    if profile and not profile_to and not save_to:
+        raise ValueError("--profile needs a PATH when --save-results is not given")
+    console = Console()
+    repo_root = _repo_root()
+    cache = ResultCache(repo_root / DEFAULT_CACHE_DIR) if use_cache and not profile else None
+    profiler = Profiler(budget_us) if profile else None
+    results, failures = run_all_tests(
+        repo_root, only_rule=rule, jobs=resolve_jobs(jobs), cache=cache, profiler=profiler
+    )
+    if save_to:
+        save_results(repo_root, Path(save_to), results)
+    code = _print_test_results(console, results, failures, cache)
+    if profiler is not None:
+        # perf.json goes to --profile PATH, or next to the results.json of this run.
+        if profile_to:
+            path = Path(profile_to)
+        else:
+            assert save_to is not None
+            path = perf_path(Path(save_to))
+        save_perf(path, profiler)
+        _print_perf(console, profiler, path)
+    return code
+
+
+def _artifacts_dir(out_dir: Optional[str]) -> Path:
+    return Path(out_dir) if out_dir else _repo_root() / "site" / "public" / "data"
+
+
+def _print_artifacts(console: Console, out: Path, build: Dict[str, int], incremental: bool) -> None:
+    console.print(f"[green]Wrote[/green] artifacts to {out}")
+    if incremental:
+        console.print(
+            f"rules written={build['rules_written']} unchanged={build['rules_skipped']} "
+            f"events copied={build['events_copied']} unchanged={build['events_skipped']}"
+        )
+
+
+def cmd_artifacts(
+    rule: Optional[str], out_dir: Optional[str], incremental: bool = False, from_results: Optional[str] = None
+) -> int:
+    console = Console()
     repo_root = _repo_root()
-    out = Path(out_dir) if out_dir else repo_root / "site" / "public" / "data"
-    generate_artifacts(repo_root, out, only_rule=rule)
-    Console().print(f"[green]Wrote[/green] artifacts to {out}")
+    out = _artifacts_dir(out_dir)
+    cache: Optional[Union[ResultCache, SavedResults]] = None
+    if from_results:
+        cache = SavedResults(Path(from_results))
+    elif incremental:
+        cache = ResultCache(repo_root / DEFAULT_CACHE_DIR)
+    build = generate_artifacts(repo_root, out, only_rule=rule, incremental=incremental, cache=cache)["build"]
+    if isinstance(cache, SavedResults):
+        console.print(f"reused {cache.hits} rule result(s) from {cache.path}, replayed {cache.misses} stale")
+    _print_artifacts(console, out, build, incremental)
+    return 0
+
+
+def cmd_test_artifacts(
+    rule: Optional[str],
+    out_dir: Optional[str],
+    jobs: int = 1,
+    use_cache: bool = True,
+    incremental: bool = False,
+    profile: bool = False,
+    budget_us: float = DEFAULT_BUDGET_US,
+) -> int:
+    console = Console()
+    repo_root = _repo_root()
+    cache = ResultCache(repo_root / DEFAULT_CACHE_DIR) if use_cache and not profile else None
+    profiler = Profiler(budget_us) if profile else None
+    results, failures = run_all_tests(
+        repo_root, only_rule=rule, jobs=resolve_jobs(jobs), cache=cache, profiler=profiler
+    )
+    code = _print_test_results(console, results, failures, cache)
+    if code != 0:
+        return code
+
+    out = _artifacts_dir(out_dir)
+    build = generate_artifacts(repo_root, out, only_rule=rule, incremental=incremental, results=results)["build"]
+    _print_artifacts(console, out, build, incremental)
+    if profiler is not None:
+        save_perf(out / PERF_NAME, profiler)
+        _print_perf(console, profiler, out / PERF_NAME)
+    return 0
+
+
+def cmd_replay(
+    paths: List[str],
+    rule: Optional[str],
+    use_index: bool = True,
+    decoder: Optional[str] = None,
+    jobs: int = 1,
+    columnar: bool = False,
+    calibrate: int = 0,
+) -> int:
+    if columnar and calibrate:
+        # The columnar engine evaluates every clause once per distinct value; there is no order to calibrate.
+        raise ValueError("--calibrate does not apply to --columnar")
+    console = Console()
+    rules = _iter_sigma_rules(_repo_root())
+    if rule:
+        rules = [r for r in rules if str(r.sigma.get("id")) == rule]
+    engine: Union[Engine, ColumnarEngine]
+    if columnar:
+        engine = ColumnarEngine.from_rule_files(rules)
+    else:
+        engine = Engine.from_rule_files(rules, use_index=use_index)
+
+    if calibrate and isinstance(engine, Engine):
+        files = [p for p in paths if p != STDIN]
+        if not files:
+            raise ValueError("--calibrate needs at least one event file (stdin cannot be read twice)")
+        events = iter_arrow(files[0], engine.fields) if is_arrow_file(files[0]) else iter_jsonl(files[0], decoder=decoder)
+        engine.calibrate(islice(events, calibrate))
+
+    started = time.perf_counter()
+    result = ReplayResult(tallies={r.rule_id: RuleTally() for r in engine.rules})
+    for p in paths:
+        if is_arrow_file(p):
+            # Only the columns the pack references are read from Parquet/Arrow files.
+            if isinstance(engine, ColumnarEngine):
+                result.merge(engine.replay_record_batches(iter_record_batches(p, engine.fields, engine.batch_size)))
+            else:
+                result.merge(engine.replay(iter_arrow(p, engine.fields)))
+        elif jobs > 1 and is_seekable_file(p):
+            result.merge(replay_file_sharded(engine, Path(p), jobs, decoder=decoder))
+        else:
+            result.merge(engine.replay(iter_jsonl(p, decoder=decoder)))
+    elapsed = time.perf_counter() - started
+
+    table = Table(title="detpack-lab replay")
+    table.add_column("Rule")
+    table.add_column("Alerts")
+    table.add_column("First match")
+
+    for rid, tally in sorted(result.tallies.items()):
+        first = "-" if tally.first_match_index is None else str(tally.first_match_index)
+        table.add_row(rid, str(tally.alerts), first)
+
+    console.print(table)
+    eps = 0.0 if elapsed <= 0 else result.events / elapsed
+    console.print(
+        f"events_total={result.events} rules={len(engine.rules)} alerts_total={result.alerts} events_per_sec={eps:.0f}"
+    )
+    stats = engine.index_stats
+    if stats is not None:
+        console.print(
+            f"index evaluated={stats.evaluated} skipped={stats.skipped} pruning={stats.pruning_ratio * 100:.1f}%"
+        )
+        for logsource, counts in stats.as_dict()["by_logsource"].items():
+            console.print(f" - {logsource}: evaluated={counts['evaluated']} skipped={counts['skipped']}")
+    return 0
+
+
+def _print_stream_stats(console: Console, stats: StreamStats, depth: int) -> None:
+    console.print(
+        f"events={stats.events} alerts={stats.alerts} malformed={stats.malformed} "
+        f"events_per_sec={stats.events_per_sec:.0f} queue={depth} "
+        f"latency_p50={stats.percentile_ms(0.5):.2f}ms p99={stats.percentile_ms(0.99):.2f}ms"
+    )
+    if isinstance(stats, PipelineStats):
+        depths = " ".join(f"{name}={stage.queue_depth}" for name, stage in stats.stages.items() if name != "read")
+        console.print(f"queues {depths} bottleneck={stats.bottleneck}")
+
+
+def cmd_stream(
+    source: str,
+    rule: Optional[str],
+    out: Optional[str] = None,
+    use_index: bool = True,
+    decoder: Optional[str] = None,
+    from_start: bool = True,
+    queue_size: Optional[int] = None,
+    max_events: int = 0,
+    idle_timeout: float = 0.0,
+    stats_interval: float = 5.0,
+    workers: int = 0,
+    batch_size: int = DEFAULT_PIPELINE_BATCH,
+    profile_to: Optional[str] = None,
+    budget_us: float = DEFAULT_BUDGET_US,
+) -> int:
+    # Alerts go to stdout (or --out) as JSONL, so progress and the summary go to stderr.
+    console = Console(stderr=True)
+    if profile_to and workers:
+        raise ValueError("--profile times rules in this process; drop --workers")
+    if queue_size is None:
+        # Pipeline queues sit between every stage and hold batches, so they are shorter.
+        queue_size = DEFAULT_PIPELINE_QUEUE if workers else DEFAULT_QUEUE_SIZE
+    rules = _iter_sigma_rules(_repo_root())
+    if rule:
+        rules = [r for r in rules if str(r.sigma.get("id")) == rule]
+    profiler = Profiler(budget_us) if profile_to else None
+    engine = Engine.from_rule_files(rules, use_index=use_index, profiler=profiler)
+
+    stop = threading.Event()
+    sink = open(out, "a", encoding="utf-8") if out else sys.stdout
+    try:
+        events = open_source(source, stop, from_start=from_start)
+        runner: Union[StreamDetector, Pipeline]
+        if workers:
+            runner = Pipeline(
+                engine, sink, workers=workers, batch_size=batch_size, queue_size=queue_size, decoder=decoder
+            )
+        else:
+            runner = StreamDetector(engine, sink, decoder=decoder)
+        try:
+            if isinstance(runner, Pipeline):
+                stats = runner.run(
+                    events,
+                    stop,
+                    max_events=max_events,
+                    idle_timeout=idle_timeout,
+                    on_tick=lambda st: _print_stream_stats(console, st, st.stages["decode"].queue_depth),
+                    tick_interval=stats_interval,
+                )
+            else:
+                stats = run_stream(
+                    runner,
+                    events,
+                    stop,
+                    queue_size=queue_size,
+                    max_events=max_events,
+                    idle_timeout=idle_timeout,
+                    on_tick=lambda st, depth: _print_stream_stats(console, st, depth),
+                    tick_interval=stats_interval,
+                )
+        except KeyboardInterrupt:
+            stop.set()
+            stats = runner.stats
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    table = Table(title="detpack-lab stream")
+    table.add_column("Rule")
+    table.add_column("Evaluated")
+    table.add_column("Avg (us)")
+    table.add_column("Alerts")
+    for rid, latency in sorted(stats.by_rule.items(), key=lambda kv: -kv[1].total_ns):
+        table.add_row(rid, str(latency.evaluations), f"{latency.avg_us:.2f}", str(latency.alerts))
+    console.print(table)
+    if isinstance(stats, PipelineStats):
+        stages = Table(title="pipeline stages")
+        stages.add_column("Stage")
+        stages.add_column("Events")
+        stages.add_column("Busy (s)")
+        stages.add_column("Capacity (ev/s)")
+        stages.add_column("Utilization")
+        stages.add_column("Queue max")
+        for name, row in stats.as_dict()["stages"].items():
+            capacity = "-" if row["capacity_eps"] is None else f"{row['capacity_eps']:.0f}"
+            stages.add_row(
+                name,
+                str(row["events"]),
+                f"{row['busy_s']:.3f}",
+                capacity,
+                f"{row['utilization'] * 100:.1f}%",
+                "-" if name == "read" else f"{row['queue_max']}/{queue_size}",
+            )
+        console.print(stages)
+        _print_stream_stats(console, stats, 0)
+        return 0
+    _print_stream_stats(console, stats, 0)
+    console.print(f"queue_high_water={stats.queue_high_water}/{queue_size}")
+    if profiler is not None and profile_to:
+        save_perf(Path(profile_to), profiler)
+        _print_perf(console, profiler, Path(profile_to))
+    return 0
+
+
+def cmd_generate(
+    out: str,
+    count: int,
+    seed: int = 0,
+    logsources: Optional[List[str]] = None,
+    malicious_rate: float = DEFAULT_MALICIOUS_RATE,
+    events_per_second: float = DEFAULT_EVENTS_PER_SECOND,
+    start: str = DEFAULT_START,
+    disorder: float = 0.0,
+) -> int:
+    console = Console(stderr=True)
+    models, engine = learn(_repo_root(), logsources)
+    generator = Generator(
+        models,
+        engine,
+        seed=seed,
+        malicious_rate=malicious_rate,
+        events_per_second=events_per_second,
+        start=start,
+        disorder=disorder,
+    )
+    started = time.perf_counter()
+    if is_parquet_path(out):
+        write_parquet(generator.events(count), out, parquet_schema(models))
+    else:
+        write_jsonl(generator.events(count), out)
+    elapsed = time.perf_counter() - started
+
+    stats = generator.stats
+    eps = 0.0 if elapsed <= 0 else stats.events / elapsed
+    console.print(f"events={stats.events} malicious={stats.malicious} events_per_sec={eps:.0f} out={out}")
+    for name, events in sorted(stats.by_logsource.items()):
+        console.print(f" - {name}: {events}")
     return 0
 
 
@@ -73,16 +443,176 @@ def main() -> int:
 
     p_test = sub.add_parser("test", help="Run all rule replay tests")
     p_test.add_argument("--rule", help="Only run a single rule id (e.g., RULE-001)")
+    p_test.add_argument("--jobs", type=int, default=1, help="Worker processes for rule/case replay (0 = all CPUs)")
+    p_test.add_argument("--no-cache", action="store_true", help=f"Ignore and do not update {DEFAULT_CACHE_DIR}/")
+    p_test.add_argument(
+        "--save-results", metavar="PATH", help="Write results.json (+ rule fingerprints) for 'artifacts --from-results'"
+    )
+    p_test.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help=f"Time every rule, selection and clause (no cache, in-process) and write {PERF_NAME} to PATH, "
+        "or next to the --save-results file",
+    )
+    p_test.add_argument(
+        "--budget-us", type=float, default=DEFAULT_BUDGET_US, help="Flag rules averaging more than this per evaluation"
+    )
 
     p_art = sub.add_parser("artifacts", help="Generate site artifacts into site/public/data")
     p_art.add_argument("--rule", help="Only generate for a single rule id (e.g., RULE-001)")
     p_art.add_argument("--out", help="Output directory (defaults to site/public/data)")
+    p_art.add_argument(
+        "--incremental", action="store_true", help="Only rewrite outputs of rules whose inputs changed (tracked in .manifest.json)"
+    )
+    p_art.add_argument(
+        "--from-results", metavar="PATH", help="Reuse a results.json from 'test --save-results'; stale rules are replayed"
+    )
+
+    p_both = sub.add_parser("test+artifacts", help="Run the replay tests once and generate artifacts from the results")
+    p_both.add_argument("--rule", help="Only run a single rule id (e.g., RULE-001)")
+    p_both.add_argument("--out", help="Output directory (defaults to site/public/data)")
+    p_both.add_argument("--jobs", type=int, default=1, help="Worker processes for rule/case replay (0 = all CPUs)")
+    p_both.add_argument("--no-cache", action="store_true", help=f"Ignore and do not update {DEFAULT_CACHE_DIR}/")
+    p_both.add_argument("--incremental", action="store_true", help="Only rewrite outputs of rules whose inputs changed")
+    p_both.add_argument("--profile", action="store_true", help=f"Also write {PERF_NAME} with per-rule and per-clause costs")
+    p_both.add_argument(
+        "--budget-us", type=float, default=DEFAULT_BUDGET_US, help="Flag rules averaging more than this per evaluation"
+    )
+
+    p_replay = sub.add_parser("replay", help="Replay JSONL event files against the whole rule pack in one pass")
+    p_replay.add_argument("paths", nargs="+", help="Event files (.jsonl, .jsonl.gz, .jsonl.zst, .parquet, .arrow) or '-' for stdin")
+    p_replay.add_argument("--rule", help="Only replay a single rule id (e.g., RULE-001)")
+    p_replay.add_argument("--no-index", action="store_true", help="Evaluate every rule on every event")
+    p_replay.add_argument(
+        "--columnar", action="store_true", help="Evaluate batches of events as columns (vectorized with NumPy if installed)"
+    )
+    p_replay.add_argument(
+        "--calibrate",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Order clauses by pass rates measured on the first N events of the first file",
+    )
+    p_replay.add_argument("--decoder", choices=available_decoders(), help="JSON decoder (defaults to the fastest installed)")
+    p_replay.add_argument(
+        "--jobs", type=int, default=1, help="Split each uncompressed file into byte ranges across N workers (0 = all CPUs)"
+    )
+
+    p_stream = sub.add_parser("stream", help="Evaluate a live event stream and write alerts as JSONL")
+    p_stream.add_argument(
+        "source", help="JSONL file to follow, '-' for stdin, or tcp://HOST:PORT / udp://HOST:PORT to listen on"
+    )
+    p_stream.add_argument("--rule", help="Only evaluate a single rule id (e.g., RULE-001)")
+    p_stream.add_argument("--out", help="Append alerts to this file instead of stdout")
+    p_stream.add_argument("--no-index", action="store_true", help="Evaluate every rule on every event")
+    p_stream.add_argument("--decoder", choices=available_decoders(), help="JSON decoder (defaults to the fastest installed)")
+    p_stream.add_argument("--from-end", action="store_true", help="Only read lines appended after startup (files)")
+    p_stream.add_argument(
+        "--queue",
+        type=int,
+        help=f"Chunks buffered between reader and evaluator before the reader blocks "
+        f"(default {DEFAULT_QUEUE_SIZE}, or {DEFAULT_PIPELINE_QUEUE} per stage with --workers)",
+    )
+    p_stream.add_argument("--max-events", type=int, default=0, help="Stop after N events (0 = run until interrupted)")
+    p_stream.add_argument("--idle-timeout", type=float, default=0.0, help="Stop after S seconds without input (0 = never)")
+    p_stream.add_argument("--stats-interval", type=float, default=5.0, help="Seconds between progress lines on stderr")
+    p_stream.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Run the asyncio pipeline with N evaluation processes (0 = all CPUs); default evaluates in-process",
+    )
+    p_stream.add_argument(
+        "--batch-size", type=int, default=DEFAULT_PIPELINE_BATCH, help="Events per batch sent to a pipeline worker"
+    )
+    p_stream.add_argument("--profile", metavar="PATH", help=f"Time every rule, selection and clause and write a {PERF_NAME} here")
+    p_stream.add_argument(
+        "--budget-us", type=float, default=DEFAULT_BUDGET_US, help="Flag rules averaging more than this per evaluation"
+    )
+
+    p_gen = sub.add_parser("generate", help="Write synthetic events learned from the test cases, for load testing")
+    p_gen.add_argument("out", help="Output file (.jsonl, .jsonl.gz, .jsonl.zst, .parquet) or '-' for stdout")
+    p_gen.add_argument("--events", type=int, default=1_000_000, help="Number of events to write")
+    p_gen.add_argument("--seed", type=int, default=0, help="Same seed, same events")
+    p_gen.add_argument(
+        "--logsource",
+        action="append",
+        help="Only generate this logsource (e.g. aws/cloudtrail, sysmon, windows); repeatable",
+    )
+    p_gen.add_argument(
+        "--malicious-rate", type=float, default=DEFAULT_MALICIOUS_RATE, help="Share of events drawn from malicious cases"
+    )
+    p_gen.add_argument(
+        "--events-per-second", type=float, default=DEFAULT_EVENTS_PER_SECOND, help="Event-time rate of @timestamp"
+    )
+    p_gen.add_argument("--start", default=DEFAULT_START, help="@timestamp of the first event")
+    p_gen.add_argument(
+        "--disorder", type=float, default=0.0, help="Move each @timestamp back by up to S seconds (0 = strictly ordered)"
+    )
 
     args = parser.parse_args()
     if args.cmd == "test":
-        return cmd_test(args.rule)
+        return cmd_test(
+            args.rule,
+            args.jobs,
+            use_cache=not args.no_cache,
+            save_to=args.save_results,
+            profile=args.profile is not None,
+            budget_us=args.budget_us,
+            profile_to=args.profile or None,
+        )
     if args.cmd == "artifacts":
-        return cmd_artifacts(args.rule, args.out)
+        return cmd_artifacts(args.rule, args.out, incremental=args.incremental, from_results=args.from_results)
+    if args.cmd == "test+artifacts":
+        return cmd_test_artifacts(
+            args.rule,
+            args.out,
+            args.jobs,
+            use_cache=not args.no_cache,
+            incremental=args.incremental,
+            profile=args.profile,
+            budget_us=args.budget_us,
+        )
+    if args.cmd == "replay":
+        return cmd_replay(
+            args.paths,
+            args.rule,
+            use_index=not args.no_index,
+            decoder=args.decoder,
+            jobs=resolve_jobs(args.jobs),
+            columnar=args.columnar,
+            calibrate=args.calibrate,
+        )
+    if args.cmd == "stream":
+        return cmd_stream(
+            args.source,
+            args.rule,
+            out=args.out,
+            use_index=not args.no_index,
+            decoder=args.decoder,
+            from_start=not args.from_end,
+            queue_size=args.queue,
+            max_events=args.max_events,
+            idle_timeout=args.idle_timeout,
+            stats_interval=args.stats_interval,
+            workers=0 if args.workers is None else resolve_jobs(args.workers),
+            batch_size=args.batch_size,
+            profile_to=args.profile,
+            budget_us=args.budget_us,
+        )
+    if args.cmd == "generate":
+        return cmd_generate(
+            args.out,
+            args.events,
+            seed=args.seed,
+            logsources=args.logsource,
+            malicious_rate=args.malicious_rate,
+            events_per_second=args.events_per_second,
+            start=args.start,
+            disorder=args.disorder,
+        )
     return 2
 
 
@@ -257,6 +257,8 @@ RULE_DETAIL_SCHEMA: Dict[str, Any] = {
             "additionalProperties": False,
             "properties": {
                 "condition": {"type": "string"},
+                "aggregation": {"type": "string"},
+                "timeframe": {"type": "string"},
                 "selections": {
                     "type": "object",
                     "additionalProperties": {
@@ -298,5 +300,82 @@ RULE_DETAIL_SCHEMA: Dict[str, Any] = {
 }
 
 
+PERF_SCHEMA: Dict[str, Any] = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "required": ["version", "budget_us", "over_budget", "rules"],
+    "additionalProperties": False,
+    "properties": {
+        "version": {"type": "string"},
+        "budget_us": {"type": "number"},
+        "over_budget": {"type": "array", "items": {"type": "string"}},
+        "rules": {
+            "type": "object",
+            "additionalProperties": {
+                "type": "object",
+                "required": [
+                    "evaluations",
+                    "rejections",
+                    "total_ms",
+                    "avg_us",
+                    "regex_share",
+                    "contains_share",
+                    "over_budget",
+                    "selections",
+                ],
+                "additionalProperties": False,
+                "properties": {
+                    "evaluations": {"type": "number"},
+                    "rejections": {"type": "number"},
+                    "total_ms": {"type": "number"},
+                    "avg_us": {"type": "number"},
+                    "regex_share": {"type": "number"},
+                    "contains_share": {"type": "number"},
+                    "over_budget": {"type": "boolean"},
+                    "selections": {
+                        "type": "object",
+                        "additionalProperties": {
+                            "type": "object",
+                            "required": ["evaluations", "rejections", "total_ms", "clauses"],
+                            "additionalProperties": False,
+                            "properties": {
+                                "evaluations": {"type": "number"},
+                                "rejections": {"type": "number"},
+                                "total_ms": {"type": "number"},
+                                "clauses": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "required": [
+                                            "field",
+                                            "op",
+                                            "clause",
+                                            "evaluations",
+                                            "rejections",
+                                            "total_ms",
+                                            "avg_us",
+                                        ],
+                                        "additionalProperties": False,
+                                        "properties": {
+                                            "field": {"type": "string"},
+                                            "op": {"type": "string"},
+                                            "clause": {"type": "string"},
+                                            "evaluations": {"type": "number"},
+                                            "rejections": {"type": "number"},
+                                            "total_ms": {"type": "number"},
+                                            "avg_us": {"type": "number"},
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+
 def validate_json(instance: Any, schema: Dict[str, Any]) -> None:
     Draft202012Validator(schema).validate(instance)
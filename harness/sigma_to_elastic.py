@@ -76,7 +76,8 @@ def _extract_names(condition: str) -> List[str]:
 
 def convert_sigma_to_kql(sigma: Dict[str, Any]) -> Tuple[str, List[str]]:
     detection = sigma.get("detection") or {}
-    condition = str(detection.get("condition", "selection")).strip()
+    # Aggregations (`| count() ...`) have no KQL form; only the search part is converted.
+    condition = str(detection.get("condition", "selection")).partition("|")[0].strip()
     names = _extract_names(condition)
 
     selection_kql: Dict[str, str] = {}
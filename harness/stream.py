@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from harness.engine import Engine
+from harness.evaluate import CompiledRule, MatchWhy
+from harness.events import STDIN, Decoder, get_decoder
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_POLL_INTERVAL = 0.25
+DEFAULT_READ_SIZE = 1 << 16
+LATENCY_SAMPLES = 10_000
+
+# A batch of raw lines and when the reader received them (perf_counter_ns).
+Chunk = Tuple[List[bytes], int]
+
+
+def _split(buffer: bytearray) -> List[bytes]:
+    # Removes and returns the complete lines in `buffer`; a trailing partial line stays.
+    end = buffer.rfind(b"\n")
+    if end == -1:
+        return []
+    lines = bytes(buffer[:end]).split(b"\n")
+    del buffer[: end + 1]
+    return [line for line in (raw.strip() for raw in lines) if line]
+
+
+def tail_file(
+    path: Path,
+    stop: threading.Event,
+    from_start: bool = True,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> Iterator[List[bytes]]:
+    # Follows a growing file like `tail -F`: reopens it when it is rotated or truncated.
+    fh: Optional[IO[bytes]] = None
+    buffer = bytearray()
+    seek_end = not from_start
+    try:
+        while not stop.is_set():
+            if fh is None:
+                try:
+                    fh = path.open("rb")
+                except FileNotFoundError:
+                    stop.wait(poll_interval)
+                    continue
+                if seek_end:
+                    fh.seek(0, os.SEEK_END)
+                    seek_end = False
+                buffer.clear()
+            data = fh.read(DEFAULT_READ_SIZE)
+            if data:
+                buffer += data
+                lines = _split(buffer)
+                if lines:
+                    yield lines
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                st = None
+            if st is None or st.st_ino != os.fstat(fh.fileno()).st_ino or st.st_size < fh.tell():
+                fh.close()
+                fh = None
+                continue
+            stop.wait(poll_interval)
+    finally:
+        if fh is not None:
+            fh.close()
+
+
+def read_stdin(stop: threading.Event) -> Iterator[List[bytes]]:
+    # Polls the descriptor instead of blocking in a read, so the reader notices `stop` and
+    # exits while stdin is still open. select() also accepts regular files, unlike epoll.
+    fd = sys.stdin.fileno()
+    sel = selectors.SelectSelector()
+    sel.register(fd, selectors.EVENT_READ)
+    buffer = bytearray()
+    try:
+        while not stop.is_set():
+            if not sel.select(timeout=DEFAULT_POLL_INTERVAL):
+                continue
+            data = os.read(fd, DEFAULT_READ_SIZE)
+            # A final line without a newline still counts at end of input.
+            buffer += data if data else b"\n"
+            lines = _split(buffer)
+            if lines:
+                yield lines
+            if not data:
+                return
+    finally:
+        sel.close()
+
+
+def listen_tcp(host: str, port: int, stop: threading.Event, ready: Optional[threading.Event] = None) -> Iterator[List[bytes]]:
+    # Newline-delimited events from any number of clients. While the queue is full the
+    # reader blocks, the socket buffers fill and TCP flow control slows the senders.
+    server = socket.create_server((host, port))
+    server.setblocking(False)
+    sel = selectors.DefaultSelector()
+    sel.register(server, selectors.EVENT_READ)
+    buffers: Dict[socket.socket, bytearray] = {}
+    if ready is not None:
+        ready.set()
+    try:
+        while not stop.is_set():
+            for key, _ in sel.select(timeout=DEFAULT_POLL_INTERVAL):
+                sock = key.fileobj
+                if sock is server:
+                    conn, _ = server.accept()
+                    conn.setblocking(False)
+                    sel.register(conn, selectors.EVENT_READ)
+                    buffers[conn] = bytearray()
+                    continue
+                assert isinstance(sock, socket.socket)
+                buffer = buffers[sock]
+                data = sock.recv(DEFAULT_READ_SIZE)
+                if not data:
+                    # A final line without a newline still counts once the client hangs up.
+                    buffer += b"\n"
+                    sel.unregister(sock)
+                    sock.close()
+                    del buffers[sock]
+                else:
+                    buffer += data
+                lines = _split(buffer)
+                if lines:
+                    yield lines
+    finally:
+        for sock in list(buffers):
+            sock.close()
+        sel.close()
+        server.close()
+
+
+def listen_udp(host: str, port: int, stop: threading.Event, ready: Optional[threading.Event] = None) -> Iterator[List[bytes]]:
+    # One or more newline-separated events per datagram. UDP has no flow control:
+    # datagrams that arrive while the queue is full are dropped by the kernel.
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    sock.settimeout(DEFAULT_POLL_INTERVAL)
+    if ready is not None:
+        ready.set()
+    try:
+        while not stop.is_set():
+            try:
+                data, _ = sock.recvfrom(DEFAULT_READ_SIZE)
+            except socket.timeout:
+                continue
+            lines = [line for line in (raw.strip() for raw in data.split(b"\n")) if line]
+            if lines:
+                yield lines
+    finally:
+        sock.close()
+
+
+def _address(spec: str) -> Tuple[str, int]:
+    host, _, port = spec.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"expected HOST:PORT, got {spec!r}")
+    return host.strip("[]"), int(port)
+
+
+def open_source(
+    spec: str,
+    stop: threading.Event,
+    from_start: bool = True,
+    ready: Optional[threading.Event] = None,
+) -> Iterator[List[bytes]]:
+    # '-' for stdin, tcp://HOST:PORT or udp://HOST:PORT to listen, anything else is a file to follow.
+    if spec == STDIN:
+        return read_stdin(stop)
+    if spec.startswith("tcp://"):
+        return listen_tcp(*_address(spec[len("tcp://") :]), stop, ready)
+    if spec.startswith("udp://"):
+        return listen_udp(*_address(spec[len("udp://") :]), stop, ready)
+    return tail_file(Path(spec), stop, from_start=from_start)
+
+
+def extract_json(line: bytes) -> Optional[bytes]:
+    # Syslog senders prefix the JSON payload with `<PRI>timestamp host app:`.
+    if line.startswith(b"{"):
+        return line
+    start = line.find(b"{")
+    return line[start:] if start != -1 else None
+
+
+@dataclass
+class RuleLatency:
+    evaluations: int = 0
+    total_ns: int = 0
+    alerts: int = 0
+
+    @property
+    def avg_us(self) -> float:
+        return 0.0 if not self.evaluations else self.total_ns / self.evaluations / 1000
+
+
+@dataclass
+class StreamStats:
+    events: int = 0
+    alerts: int = 0
+    malformed: int = 0
+    queue_high_water: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    by_rule: Dict[str, RuleLatency] = field(default_factory=dict)
+    # Receive-to-verdict latency of the most recent events, in nanoseconds.
+    latencies: Deque[int] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def percentile_ms(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1e6
+
+    @property
+    def events_per_sec(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return 0.0 if elapsed <= 0 else self.events / elapsed
+
+    def add_timings(self, rules: Sequence[CompiledRule], timings: Sequence[int], evaluated: Sequence[int]) -> None:
+        for rule, spent, count in zip(rules, timings, evaluated):
+            latency = self.by_rule.setdefault(rule.rule_id, RuleLatency())
+            latency.total_ns += spent
+            latency.evaluations += count
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "alerts": self.alerts,
+            "malformed": self.malformed,
+            "events_per_sec": round(self.events_per_sec, 1),
+            "queue_high_water": self.queue_high_water,
+            "latency_ms": {"p50": round(self.percentile_ms(0.5), 3), "p99": round(self.percentile_ms(0.99), 3)},
+            "by_rule": {
+                rid: {"evaluations": r.evaluations, "avg_us": round(r.avg_us, 2), "alerts": r.alerts}
+                for rid, r in sorted(self.by_rule.items())
+            },
+        }
+
+
+def decode_lines(decoder: Decoder, lines: List[bytes]) -> Tuple[List[Dict[str, Any]], int]:
+    # Returns the decoded events and how many lines were not a JSON object.
+    payloads = [p for p in (extract_json(line) for line in lines) if p is not None]
+    try:
+        decoded = decoder.decode_batch(payloads)
+    except Exception:
+        decoded = []
+        for payload in payloads:
+            try:
+                decoded.append(decoder.loads(payload))
+            except Exception:
+                continue
+    events = [e for e in decoded if isinstance(e, dict)]
+    return events, len(lines) - len(events)
+
+
+def alert_record(rule: CompiledRule, event: Dict[str, Any], why: MatchWhy, latency_ns: int) -> str:
+    record = {
+        "rule_id": rule.rule_id,
+        "title": rule.sigma.get("title"),
+        "level": rule.sigma.get("level"),
+        "detected_at": datetime.now(timezone.utc).isoformat(),
+        "latency_ms": round(latency_ns / 1e6, 3),
+        "event": event,
+        "why": asdict(why),
+    }
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+class StreamDetector:
+    def __init__(self, engine: Engine, sink: IO[str], decoder: Optional[str] = None):
+        self.engine = engine
+        self.sink = sink
+        self.decoder: Decoder = get_decoder(decoder)
+        self.stats = StreamStats(by_rule={rule.rule_id: RuleLatency() for rule in engine.rules})
+        self._timings = [0] * len(engine.rules)
+        self._counts = [0] * len(engine.rules)
+
+    def process(self, lines: List[bytes], received_ns: int) -> int:
+        stats = self.stats
+        events, malformed = decode_lines(self.decoder, lines)
+        stats.malformed += malformed
+        written = 0
+        for event in events:
+            alerts = self.engine.evaluate(event, timings=self._timings, evaluated=self._counts)
+            stats.events += 1
+            latency = time.perf_counter_ns() - received_ns
+            stats.latencies.append(latency)
+            for rule, why in alerts:
+                stats.alerts += 1
+                stats.by_rule[rule.rule_id].alerts += 1
+                self.sink.write(alert_record(rule, event, why, latency))
+                written += 1
+        if written:
+            self.sink.flush()
+        stats.add_timings(self.engine.rules, self._timings, self._counts)
+        self._timings = [0] * len(self.engine.rules)
+        self._counts = [0] * len(self.engine.rules)
+        return written
+
+
+def run_stream(
+    detector: StreamDetector,
+    source: Iterator[List[bytes]],
+    stop: threading.Event,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    max_events: int = 0,
+    idle_timeout: float = 0.0,
+    on_tick: Optional[Callable[[StreamStats, int], None]] = None,
+    tick_interval: float = 5.0,
+) -> StreamStats:
+    # The reader runs on its own thread and blocks when `queue_size` chunks are waiting,
+    # which is the backpressure towards the source; evaluation stays on this thread.
+    chunks: "queue.Queue[Optional[Chunk]]" = queue.Queue(maxsize=queue_size)
+    failure: List[BaseException] = []
+
+    def put(chunk: Optional[Chunk]) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(chunk, timeout=DEFAULT_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader() -> None:
+        try:
+            for lines in source:
+                if not put((lines, time.perf_counter_ns())):
+                    break
+        except BaseException as exc:
+            failure.append(exc)
+        finally:
+            put(None)
+
+    thread = threading.Thread(target=reader, name="stream-reader", daemon=True)
+    thread.start()
+    stats = detector.stats
+    last_input = last_tick = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            if on_tick is not None and now - last_tick >= tick_interval:
+                on_tick(stats, chunks.qsize())
+                last_tick = now
+            try:
+                chunk = chunks.get(timeout=DEFAULT_POLL_INTERVAL)
+            except queue.Empty:
+                if idle_timeout and now - last_input >= idle_timeout:
+                    break
+                continue
+            if chunk is None:
+                break
+            last_input = time.monotonic()
+            stats.queue_high_water = max(stats.queue_high_water, chunks.qsize() + 1)
+            detector.process(*chunk)
+            if max_events and stats.events >= max_events:
+                break
+    finally:
+        stop.set()
+        thread.join(timeout=1.0)
+    if failure:
+        raise failure[0]
+    return stats
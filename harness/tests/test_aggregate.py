@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import pytest
+
+from harness import columnar
+from harness.aggregate import Aggregation, CountWindow, parse_aggregation, parse_timestamp
+from harness.engine import Engine, replay_rule
+from harness.evaluate import CompiledRule
+
+
+def _push_rule(condition: str, timeframe: str = "1m", rule_id: str = "AGG") -> CompiledRule:
+    return CompiledRule(
+        {
+            "id": rule_id,
+            "detection": {
+                "selection": {"eventType": "push_rejected"},
+                "success": {"eventType": "push_accepted"},
+                "timeframe": timeframe,
+                "condition": condition,
+            },
+        }
+    )
+
+
+def _event(second: int, user: str, event_type: str = "push_rejected", ip: str = "10.0.0.1"):
+    return {
+        "@timestamp": f"2026-01-01T00:{second // 60:02d}:{second % 60:02d}Z",
+        "eventType": event_type,
+        "actor": {"alternateId": user},
+        "client": {"ipAddress": ip},
+    }
+
+
+def test_parse_aggregation():
+    assert parse_aggregation("count() by actor.alternateId > 3", "5m") == Aggregation(
+        function="count", group_by=("actor.alternateId",), op=">", threshold=3, timeframe=300
+    )
+    assert parse_aggregation("count(client.ipAddress) >= 2").field == "client.ipAddress"
+    assert parse_aggregation("near success", "30s").near == ("success",)
+    with pytest.raises(ValueError):
+        parse_aggregation("sum(x) > 1")
+    with pytest.raises(ValueError):
+        parse_aggregation("near success")
+    assert parse_timestamp("2026-01-01T00:00:01Z") == parse_timestamp(1767225601000) == 1767225601.0
+
+
+def test_count_by_group_is_windowed_and_resets_after_alert():
+    rule = _push_rule("selection | count() by actor.alternateId > 2")
+    events = [_event(s, "alice") for s in (0, 10, 20, 30)] + [_event(s, "bob") for s in (31, 100, 200)]
+    events += [_event(s, "carol") for s in (300, 330, 359)] + [_event(400, "carol", "push_accepted")]
+    tally, seen = replay_rule(rule, events)
+    # alice crosses at 20s; bob's pushes are spread beyond one minute; carol crosses at 359s.
+    assert seen == len(events)
+    assert tally.alerts == 2
+    assert tally.first_match_index == 2
+
+
+def test_distinct_count_and_near():
+    rule = _push_rule("selection | count(client.ipAddress) by actor.alternateId >= 2")
+    events = [_event(0, "alice", ip="1.1.1.1"), _event(1, "alice", ip="1.1.1.1"), _event(2, "alice", ip="2.2.2.2")]
+    assert replay_rule(rule, events)[0].first_match_index == 2
+
+    near = _push_rule("selection | near success", timeframe="30s")
+    events = [_event(0, "a"), _event(40, "a", "push_accepted"), _event(50, "a")]
+    tally, _ = replay_rule(near, events)
+    assert (tally.alerts, tally.first_match_index) == (1, 2)
+
+
+def test_window_memory_is_bounded_by_active_groups():
+    window = CountWindow(parse_aggregation("count() by user > 1000", "1m"))
+    for second in range(10_000):
+        window.observe(float(second), (f"user-{second}",))
+    assert len(window.groups) <= 61
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_engines_agree_on_aggregations(use_index: bool):
+    def rules():
+        return [
+            _push_rule("selection | count() by actor.alternateId > 2", rule_id="COUNT"),
+            _push_rule("selection | near success", timeframe="30s", rule_id="NEAR"),
+            _push_rule("selection", rule_id="PLAIN"),
+        ]
+
+    events = [_event(s * 7 % 900, f"u{s % 3}", "push_accepted" if s % 5 == 0 else "push_rejected") for s in range(300)]
+    events.sort(key=lambda e: e["@timestamp"])
+    expected = {rule.rule_id: replay_rule(rule, events)[0] for rule in rules()}
+    assert expected["COUNT"].alerts and expected["NEAR"].alerts
+
+    assert Engine(rules(), use_index=use_index).replay(events).tallies == expected
+    assert columnar.ColumnarEngine(rules(), batch_size=64).replay(events).tallies == expected
+
+    # Window state carries over when a stream is replayed in pieces.
+    engine = Engine(rules(), use_index=use_index)
+    first, second = engine.replay(events[:150]), engine.replay(events[150:])
+    first.merge(second)
+    assert first.tallies == expected
@@ -34,3 +34,8 @@ def test_generate_artifacts_validates_schemas(tmp_path: Path):
         detail = json.loads(detail_path.read_text(encoding="utf-8"))
         validate_json(detail, RULE_DETAIL_SCHEMA)
 
+    # Aggregations are split off the search; the in-browser evaluator windows them separately.
+    compiled = json.loads((rules_dir / "RULE-021.json").read_text(encoding="utf-8"))["compiled"]
+    assert compiled["condition"] == "selection"
+    assert compiled["aggregation"] == "count() by actor.alternateId >= 3"
+    assert compiled["timeframe"] == "10m"
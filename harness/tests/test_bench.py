@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+from harness.artifacts import _iter_sigma_rules, _read_jsonl
+from harness.bench import suite
+from harness.engine import Engine
+from harness.evaluate import CompiledRule
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _rule(rule_id: str):
+    return next(rf.compiled for rf in _iter_sigma_rules(REPO_ROOT) if rf.compiled.rule_id == rule_id)
+
+
+def test_bench_corpus_has_requested_match_rate():
+    rule = _rule("RULE-001")
+    events = suite.synthesize(rule, 200, 0.25, random.Random(3))
+    assert len(events) == 200
+    assert sum(1 for e in events if rule.matches(e)) == 50
+    assert events == suite.synthesize(rule, 200, 0.25, random.Random(3))
+
+    base = {"results": {"a": {"events_per_sec": 1000.0}, "b": {"events_per_sec": 1000.0}}}
+    current = {"results": {"a": {"events_per_sec": 950.0}, "b": {"events_per_sec": 500.0}}}
+    assert [r["benchmark"] for r in suite.compare(current, base, 10.0)] == ["b"]
+
+    # Memory is per benchmark: a pass holding ~800 KB reports about that, not the process peak.
+    assert 700 < suite._peak_alloc_kb(lambda: [0] * 100_000) < 1000
+    assert suite._peak_alloc_kb(lambda: None) < 10
+
+
+def test_every_pass_starts_from_empty_windows():
+    engine = Engine([_rule("RULE-021")])
+    events = list(_read_jsonl(REPO_ROOT / "tests" / "cases" / "RULE-021" / "malicious.jsonl"))
+    alerts = []
+
+    def replay() -> int:
+        alerts.append(engine.replay(events).alerts)
+        return len(events)
+
+    suite._whole(replay, 3, engine.reset_windows)
+    # Three timed passes and the untraced memory pass all see the same alert.
+    assert alerts == [1, 1, 1, 1]
+
+
+def test_match_op_calls_cover_every_expected_value():
+    rule = CompiledRule({"id": "R", "detection": {"sel": {"eventName": ["A", "B", "C"]}, "condition": "sel"}})
+    calls = suite._match_op_calls([rule], [{"eventName": "B"}, {"other": 1}])
+    assert calls == [("B", "eq", "A"), ("B", "eq", "B"), ("B", "eq", "C")]
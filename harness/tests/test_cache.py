@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from harness.artifacts import SavedResults, generate_artifacts, run_all_tests, save_results
+from harness.cache import ResultCache
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _copy_pack(dst: Path) -> Path:
+    shutil.copytree(REPO_ROOT / "rules", dst / "rules")
+    shutil.copytree(REPO_ROOT / "tests" / "cases", dst / "tests" / "cases")
+    return dst
+
+
+def test_result_cache_reuses_unchanged_rules(tmp_path: Path):
+    repo = _copy_pack(tmp_path / "repo")
+    uncached, _ = run_all_tests(repo)
+
+    cache = ResultCache(tmp_path / "cache")
+    first, _ = run_all_tests(repo, cache=cache)
+    assert (cache.hits, cache.misses) == (0, len(first["by_rule"]))
+
+    cache = ResultCache(tmp_path / "cache")
+    second, _ = run_all_tests(repo, cache=cache)
+    assert (cache.hits, cache.misses) == (len(first["by_rule"]), 0)
+    assert first == second == uncached
+
+    benign = repo / "tests" / "cases" / "RULE-001" / "benign.jsonl"
+    benign.write_text(
+        benign.read_text(encoding="utf-8") + '{"eventSource":"iam.amazonaws.com","eventName":"CreateAccessKey"}\n',
+        encoding="utf-8",
+    )
+    cache = ResultCache(tmp_path / "cache")
+    third, failures = run_all_tests(repo, cache=cache)
+    assert cache.misses == 1
+    assert [f["rule_id"] for f in failures] == ["RULE-001"]
+    assert third["by_rule"]["RULE-001"]["tests"][0]["actual_alerts"] == 1
+
+
+def test_incremental_artifacts_only_rewrite_changed_rules(tmp_path: Path):
+    repo = _copy_pack(tmp_path / "repo")
+    full = tmp_path / "full"
+    out = tmp_path / "out"
+    generate_artifacts(repo, full)
+
+    first = generate_artifacts(repo, out, incremental=True)["build"]
+    rules = first["rules_written"]
+    assert first["rules_skipped"] == 0 and first["events_copied"] == 2 * rules
+    for name in ["results.json", "coverage.json", "rules_index.json"]:
+        assert (out / name).read_bytes() == (full / name).read_bytes()
+
+    second = generate_artifacts(repo, out, incremental=True)["build"]
+    assert second == {"rules_written": 0, "rules_skipped": rules, "events_copied": 0, "events_skipped": 2 * rules}
+
+    benign = repo / "tests" / "cases" / "RULE-001" / "benign.jsonl"
+    benign.write_text(benign.read_text(encoding="utf-8") + '{"eventName":"Noop"}\n', encoding="utf-8")
+    (out / "rules" / "RULE-002.json").unlink()
+    third = generate_artifacts(repo, out, incremental=True)["build"]
+    assert third["rules_written"] == 2 and third["events_copied"] == 2
+    assert (out / "events" / "RULE-001_benign.jsonl").read_bytes() == benign.read_bytes()
+    assert (out / "rules" / "RULE-002.json").read_bytes() == (full / "rules" / "RULE-002.json").read_bytes()
+
+
+def test_saved_results_replay_only_stale_rules(tmp_path: Path):
+    repo = _copy_pack(tmp_path / "repo")
+    results, _ = run_all_tests(repo)
+    saved = tmp_path / "results.json"
+    save_results(repo, saved, results)
+
+    reused = SavedResults(saved)
+    assert run_all_tests(repo, cache=reused)[0] == results
+    assert (reused.hits, reused.misses) == (len(results["by_rule"]), 0)
+
+    sigma = next((repo / "rules" / "sigma").glob("RULE-003-*.yml"))
+    sigma.write_text(sigma.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    reused = SavedResults(saved)
+    assert run_all_tests(repo, cache=reused)[0] == results
+    assert reused.misses == 1
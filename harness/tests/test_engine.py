@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from harness import columnar
+from harness.artifacts import _iter_sigma_rules, _read_jsonl, run_all_tests
+from harness.engine import Engine, RuleTally
+from harness.evaluate import CompiledRule
+from harness.events import split_ranges
+from harness.parallel import replay_file_sharded
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _all_events():
+    events = []
+    for path in sorted((REPO_ROOT / "tests" / "cases").glob("RULE-*/*.jsonl")):
+        events.extend(_read_jsonl(path))
+    return events
+
+
+def test_single_pass_replay_matches_per_rule_evaluation():
+    rules = _iter_sigma_rules(REPO_ROOT)
+    events = _all_events()
+    result = Engine.from_rule_files(rules).replay(events)
+
+    assert result.events == len(events)
+    for rule in rules:
+        if rule.compiled.aggregation is not None:
+            # Windowed rules alert on the window, not per event; covered in test_aggregate.
+            continue
+        expected = RuleTally()
+        for idx, evt in enumerate(events):
+            expected.observe(idx, *rule.compiled.match(evt))
+        assert result.tallies[rule.compiled.rule_id] == expected
+
+
+def test_evaluate_returns_matching_rules_only():
+    engine = Engine.from_rule_files(_iter_sigma_rules(REPO_ROOT))
+    alerts = engine.evaluate({"eventSource": "iam.amazonaws.com", "eventName": "CreateAccessKey"})
+    assert [rule.rule_id for rule, _ in alerts] == ["RULE-001"]
+    assert engine.evaluate({"eventName": "Nothing"}) == []
+
+
+def test_index_prunes_rules_without_changing_results():
+    rules = _iter_sigma_rules(REPO_ROOT)
+    events = _all_events()
+    indexed = Engine.from_rule_files(rules)
+    unindexed = Engine.from_rule_files(rules, use_index=False)
+
+    assert indexed.replay(events) == unindexed.replay(events)
+    assert unindexed.index_stats is None
+
+    stats = indexed.index_stats
+    assert stats is not None
+    assert stats.events == len(events)
+    assert stats.evaluated + stats.skipped == len(events) * len(rules)
+    assert stats.pruning_ratio > 0.5
+    by_logsource = stats.as_dict()["by_logsource"]
+    assert sum(v["evaluated"] for v in by_logsource.values()) == stats.evaluated
+
+
+def test_index_key_prefers_least_shared_literal():
+    rules = _iter_sigma_rules(REPO_ROOT)
+    engine = Engine.from_rule_files(rules)
+    assert engine.index is not None
+    keys = {r.rule_id: k for r, k in zip(engine.rules, engine.index.keys)}
+    assert keys["RULE-001"] is not None and keys["RULE-001"].field == "eventName"
+    # contains-only selections still need the EventID literal.
+    assert keys["RULE-018"] is not None and keys["RULE-018"].field == "EventID"
+
+
+def test_parallel_run_all_tests_matches_serial():
+    serial, serial_failures = run_all_tests(REPO_ROOT)
+    parallel, parallel_failures = run_all_tests(REPO_ROOT, jobs=2)
+    assert parallel == serial
+    assert parallel_failures == serial_failures
+    assert list(parallel["by_rule"]) == list(serial["by_rule"])
+
+
+def test_sharded_file_replay_is_identical_to_serial(tmp_path: Path):
+    rules = _iter_sigma_rules(REPO_ROOT)
+    events = _all_events() * 5
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps(e) for e in events) + "\n\n", encoding="utf-8")
+
+    serial = Engine.from_rule_files(rules).replay(events)
+    # Windowed rules run in order in the parent while the rest are sharded.
+    assert serial.tallies["RULE-021"].alerts
+    for jobs, shards in [(1, 9), (2, 4)]:
+        engine = Engine.from_rule_files(rules)
+        assert replay_file_sharded(engine, path, jobs, shards=shards) == serial
+        assert engine.index_stats is not None and engine.index_stats.events == len(events)
+    assert replay_file_sharded(columnar.ColumnarEngine.from_rule_files(rules), path, 2, shards=4) == serial
+
+
+def test_split_ranges_are_newline_aligned(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    path.write_bytes(b'{"a": 1}\n{"a": 22}\n{"a": 333}\n')
+    ranges = split_ranges(path, 3)
+    data = path.read_bytes()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for start, end in ranges:
+        assert start == 0 or data[start - 1 : start] == b"\n"
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_columnar_replay_matches_row_engine(monkeypatch, vectorized: bool):
+    if not vectorized:
+        monkeypatch.setattr(columnar, "_np", None)
+    rules = _iter_sigma_rules(REPO_ROOT)
+    events = _all_events() + [
+        {"EventID": [4104, 1], "ScriptBlockText": ["x", "Set-MpPreference -DisableRealtimeMonitoring $true"]},
+        {"EventID": 4104.0, "ScriptBlockText": {"nested": "Set-MpPreference"}},
+    ]
+    expected = Engine.from_rule_files(rules).replay(events)
+    for batch_size in (1, 7, len(events)):
+        result = columnar.ColumnarEngine.from_rule_files(rules, batch_size=batch_size).replay(events)
+        assert result == expected
+
+
+def test_calibration_reorders_boolean_path_only():
+    sigma = {
+        "id": "R",
+        "detection": {
+            "sel": {"CommandLine|re": "x+", "CommandLine|contains": "mimikatz", "EventID": 1},
+            "other": {"EventID": 2},
+            "condition": "sel or other",
+        },
+    }
+    rule = CompiledRule(sigma)
+    assert [c.op for c in rule.selections["sel"].order] == ["eq", "contains", "re"]
+    assert [c.op for c in rule.selections["sel"].clauses] == ["re", "contains", "eq"]
+
+    events = [{"EventID": 1, "CommandLine": f"cmd {i}"} for i in range(50)] + [{"EventID": 1, "CommandLine": "mimikatz xx"}]
+    before = [rule.match(e) for e in events]
+    Engine([rule]).calibrate(events)
+    assert [c.op for c in rule.selections["sel"].order][0] == "contains"
+    # Both sides rarely pass, so the cheap eq-only selection is tried first.
+    assert rule.plan == ("or", (("sel", "other", True), ("sel", "sel", True)))
+    assert [rule.match(e) for e in events] == before
+    assert [rule.matches(e) for e in events] == [m for m, _ in before]
+
+    # Rates are keyed by rule, selection and clause position, so they apply to a fresh compile.
+    rates = Engine([rule]).calibrate(events)
+    fresh = CompiledRule(sigma)
+    fresh.replan(rates)
+    assert fresh.plan == rule.plan
+    assert [c.op for c in fresh.selections["sel"].order] == [c.op for c in rule.selections["sel"].order]
@@ -1,8 +1,20 @@
 from __future__ import annotations
 
+import pickle
+
+import pytest
 import yaml
 
-from harness.evaluate import evaluate_sigma_event
+from harness import evaluate
+from harness.evaluate import (
+    FALSE,
+    CompiledRule,
+    EventView,
+    compile_clause,
+    evaluate_sigma_event,
+    field_accessor,
+    optimize_condition,
+)
 
 
 def test_equals_and_contains_and_condition_and_not():
@@ -60,3 +72,119 @@ detection:
     matched2, _ = evaluate_sigma_event(sigma, {"bytesTransferredOut": 120000})
     assert matched2 is False
 
+
+def test_compiled_rule_matches_evaluate_sigma_event():
+    sigma = yaml.safe_load(
+        """
+title: demo
+id: RULE-Z
+logsource: {product: windows, service: sysmon}
+detection:
+  selection:
+    EventID: 1
+    Image|endswith: "\\\\rundll32.exe"
+    CommandLine|contains:
+      - comsvcs.dll
+      - MiniDump
+  condition: selection
+"""
+    )
+    rule = CompiledRule(sigma)
+    assert rule.primary == "selection"
+    clauses = rule.selections["selection"].clauses
+    assert [c.op for c in clauses] == ["eq", "endswith", "contains"]
+    assert clauses[2].needles == ("comsvcs.dll", "minidump")
+
+    events = [
+        {"EventID": 1, "Image": "C:\\Windows\\System32\\RUNDLL32.EXE", "CommandLine": "x MINIDUMP y"},
+        {"EventID": 1, "Image": "C:\\Windows\\System32\\rundll32.exe", "CommandLine": "shell32.dll"},
+        {"EventID": 1, "CommandLine": "comsvcs.dll"},
+    ]
+    for evt in events:
+        assert rule.match(evt) == evaluate_sigma_event(sigma, evt)
+    assert rule.match(events[0])[0] is True
+    assert rule.match(events[2])[1].missing_fields == ["Image"]
+
+
+def test_compiled_rule_reports_bad_condition():
+    rule = CompiledRule({"detection": {"selection": {"a": 1}, "condition": "selection and ("}})
+    matched, why = rule.match({"a": 1})
+    assert matched is False
+    assert why.failed_clause is not None and why.failed_clause.startswith("bad condition:")
+
+
+def test_regex_clauses_compile_once_and_fail_at_load():
+    sigma = {"detection": {"selection": {"ScriptBlockText|re": "(?i)-enc(odedcommand)?\\s"}, "condition": "selection"}}
+    first = CompiledRule(sigma)
+    second = CompiledRule(sigma)
+    assert first.selections["selection"].clauses[0].needles[0] is second.selections["selection"].clauses[0].needles[0]
+    assert first.match({"ScriptBlockText": "powershell -EncodedCommand SQBFAFgA"})[0] is True
+    assert first.match({"ScriptBlockText": "Get-Process"})[0] is False
+
+    with pytest.raises(ValueError, match="invalid regex for ScriptBlockText"):
+        CompiledRule({"detection": {"selection": {"ScriptBlockText|re": "([unclosed"}, "condition": "selection"}})
+
+
+def test_field_accessors_are_shared_and_prefer_literal_dotted_keys():
+    accessor = field_accessor("a.b")
+    assert field_accessor("a.b") is accessor
+    assert compile_clause("a.b|contains", "x").accessor is accessor
+
+    assert accessor.resolve({"a.b": 1, "a": {"b": 2}}) == 1
+    assert accessor.resolve({"a": {"b": 2}}) == 2
+    assert accessor.resolve({"a": {"b": None}}) is None
+    assert accessor.resolve({"a": None}) is None
+    assert accessor.resolve({"a": ["b"]}) is None
+    assert field_accessor("a").resolve({"b": 1}) is None
+
+
+def test_event_view_caches_normalized_values_within_budget(monkeypatch):
+    rule = CompiledRule(
+        {"detection": {"a": {"CommandLine|contains": "abc"}, "b": {"CommandLine|endswith": "XYZ"}, "condition": "a and b"}}
+    )
+    view = EventView({"CommandLine": "ABC-xyz"})
+    assert rule.match(view)[0]
+    assert view.lowered("CommandLine", "ABC-xyz") is view.lowered("CommandLine", "ABC-xyz")
+
+    monkeypatch.setattr(evaluate, "NORMALIZE_BUDGET", 4)
+    view = EventView({"CommandLine": "ABC-xyz"})
+    assert rule.match(view)[0]
+    assert view.lowered("CommandLine", "ABC-xyz") is not view.lowered("CommandLine", "ABC-xyz")
+
+
+def test_boolean_match_path_agrees_with_explained_match():
+    rule = CompiledRule(
+        {
+            "detection": {
+                "a": {"x": 1},
+                "b": {"y|contains": "q"},
+                "condition": "(a and not b) or b",
+            }
+        }
+    )
+    for event in [{"x": 1}, {"y": "Q"}, {"x": 1, "y": "q"}, {"x": 2, "y": "z"}, {}]:
+        assert rule.matches(event) == rule.match(event)[0]
+
+
+def test_or_reports_left_reason_when_both_sides_fail():
+    rule = CompiledRule({"detection": {"a": {"x": 1}, "b": {"y": 2}, "condition": "a or b"}})
+    matched, why = rule.match({"x": 0, "y": 0})
+    assert not matched
+    assert why.failed_clause == "x eq [1]"
+
+
+def test_condition_optimizer_folds_and_normalizes():
+    def plan(condition: str):
+        rule = CompiledRule({"detection": {"a": {"x": 1}, "b": {"y": 2}, "condition": condition}})
+        assert rule.ast is not None
+        return optimize_condition(rule.ast, rule.selections)
+
+    assert plan("not (a and b)") == ("or", (("sel", "a", False), ("sel", "b", False)))
+    assert plan("a and (a and b)") == ("and", (("sel", "a", True), ("sel", "b", True)))
+    assert plan("a and not a") == FALSE
+    assert plan("missing") == FALSE
+    assert plan("b or not missing") == ("const", True)
+
+    rule = pickle.loads(pickle.dumps(CompiledRule({"detection": {"a": {"x": 1}, "condition": "not not a"}})))
+    assert rule.plan == ("sel", "a", True)
+    assert rule.matches({"x": 1}) and not rule.matches({"x": 2})
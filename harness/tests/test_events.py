@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from harness.artifacts import _iter_sigma_rules, run_rule_case
+from harness.columnar import ColumnarEngine
+from harness.engine import Engine
+from harness.events import available_decoders, get_decoder, iter_arrow, iter_jsonl, iter_record_batches
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _write_events(path: Path, events) -> None:
+    text = "\n".join(json.dumps(e) for e in events) + "\n\n"
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        path.write_text(text, encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["events.jsonl", "events.jsonl.gz"])
+def test_iter_jsonl_streams_plain_and_gzip(tmp_path: Path, name: str):
+    events = [{"EventID": i} for i in range(5)]
+    path = tmp_path / name
+    _write_events(path, events)
+    assert list(iter_jsonl(path)) == events
+
+
+def test_iter_jsonl_reports_bad_line(tmp_path: Path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"a": 1}\n{not json}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="bad.jsonl:2"):
+        list(iter_jsonl(path))
+
+
+def test_run_rule_case_consumes_a_generator(tmp_path: Path):
+    rule = next(r for r in _iter_sigma_rules(REPO_ROOT) if r.compiled.rule_id == "RULE-016")
+    path = tmp_path / "events.jsonl.gz"
+    _write_events(path, [{"EventID": 1102}, {"EventID": 4624}, {"EventID": 1102}])
+    res = run_rule_case(rule, "malicious", iter_jsonl(path), expected_alerts=2)
+    assert res["events"] == 3
+    assert res["actual_alerts"] == 2
+    assert res["passed"] is True
+
+
+def test_iter_jsonl_reads_zstd_when_available(tmp_path: Path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "events.jsonl.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(b'{"a": 1}\n{"b": 2}\n'))
+    assert list(iter_jsonl(path)) == [{"a": 1}, {"b": 2}]
+
+
+@pytest.mark.parametrize("name", available_decoders())
+def test_every_available_decoder_yields_identical_events(tmp_path: Path, name: str):
+    path = tmp_path / "events.jsonl"
+    events = [{"EventID": i, "CommandLine": f"cmd /c echo {i}", "nested": {"ok": i % 2 == 0}} for i in range(2500)]
+    _write_events(path, events)
+    assert list(iter_jsonl(path, decoder=name, batch_size=1000)) == events
+    assert get_decoder(name).decode_batch([b'{"a": 1}', b'{"b": [2]}']) == [{"a": 1}, {"b": [2]}]
+
+
+def test_unknown_decoder_is_rejected():
+    with pytest.raises(ValueError, match="not available"):
+        get_decoder("simdjson")
+
+
+@pytest.mark.parametrize("name", ["events.parquet", "events.arrow", "events.arrows"])
+def test_arrow_inputs_replay_like_jsonl(tmp_path: Path, name: str):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    events = [e for p in sorted((REPO_ROOT / "tests" / "cases").glob("RULE-*/*.jsonl")) for e in iter_jsonl(p)]
+    keys = sorted({k for e in events for k in e})
+    table = pa.Table.from_pydict({k: [e.get(k) for e in events] for k in keys + ["unused"]})
+    path = tmp_path / name
+    if name.endswith(".parquet"):
+        pyarrow.parquet.write_table(table, path, row_group_size=17)
+    else:
+        writer = pyarrow.ipc.new_file if name.endswith(".arrow") else pyarrow.ipc.new_stream
+        with writer(path, table.schema) as w:
+            w.write_table(table, max_chunksize=13)
+
+    rules = _iter_sigma_rules(REPO_ROOT)
+    engine = Engine.from_rule_files(rules)
+    batches = list(iter_record_batches(path, engine.fields, batch_size=10))
+    assert "unused" not in batches[0].schema.names
+    assert "userIdentity" in batches[0].schema.names
+    assert sum(b.num_rows for b in batches) == len(events)
+
+    expected = Engine.from_rule_files(rules).replay(events)
+    assert engine.replay(iter_arrow(path, engine.fields)) == expected
+    assert ColumnarEngine.from_rule_files(rules).replay_record_batches(batches) == expected
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from harness.aggregate import parse_timestamp
+from harness.engine import Engine
+from harness.evaluate import CompiledRule
+from harness.events import iter_arrow, iter_jsonl
+from harness.generate import (
+    DEFAULT_START,
+    Generator,
+    LogsourceModel,
+    learn,
+    parquet_schema,
+    search_hit,
+    write_jsonl,
+    write_parquet,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_generator_is_deterministic_and_only_injected_events_are_search_hits():
+    models, engine = learn(REPO_ROOT)
+    events = list(Generator(models, engine, seed=5, malicious_rate=0.1).events(2000))
+    again = Generator(models, engine, seed=5, malicious_rate=0.1)
+    assert list(again.events(2000)) == events
+    assert list(Generator(models, engine, seed=6, malicious_rate=0.1).events(2000)) != events
+
+    stats = again.stats
+    assert stats.events == 2000 and 100 < stats.malicious < 300
+    assert set(stats.by_logsource) == {m.name for m in models}
+    assert sum(1 for e in events if search_hit(engine, e)) == stats.malicious
+
+    times = [parse_timestamp(e["@timestamp"]) for e in events]
+    assert times == sorted(times)
+
+
+def test_generator_selects_logsources_and_bounds_disorder():
+    models, engine = learn(REPO_ROOT, ["sysmon", "aws/cloudtrail"])
+    assert [m.name for m in models] == ["aws/cloudtrail", "windows/sysmon"]
+    events = list(Generator(models, engine, seed=1, events_per_second=10, disorder=2.0).events(500))
+    times = [parse_timestamp(e["@timestamp"]) for e in events]
+    assert times != sorted(times)
+    start = parse_timestamp(DEFAULT_START)
+    assert all(-2.0 <= t - (start + n / 10) <= 0.0 for n, t in enumerate(times))
+    with pytest.raises(ValueError):
+        learn(REPO_ROOT, ["nosuchsource"])
+
+
+@pytest.mark.parametrize("name", ["events.jsonl", "events.jsonl.gz", "events.parquet"])
+def test_generated_files_replay_with_the_same_alerts(tmp_path: Path, name: str):
+    if name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    models, engine = learn(REPO_ROOT)
+    generator = Generator(models, engine, seed=2, malicious_rate=0.05)
+    path = str(tmp_path / name)
+    if name.endswith(".parquet"):
+        assert write_parquet(generator.events(1500), path, parquet_schema(models), batch_size=400) == 1500
+        events = iter_arrow(path)
+    else:
+        assert write_jsonl(generator.events(1500), path) == 1500
+        events = iter_jsonl(path)
+    # Windowed rules may add alerts when injected hits cluster; every injected event fires one plain rule.
+    result = Engine([r for r in engine.rules if r.aggregation is None]).replay(events)
+    assert result.events == 1500
+    assert result.alerts == generator.stats.malicious
+
+
+def test_flat_dotted_fields_count_as_read():
+    engine = Engine([CompiledRule({"id": "R", "detection": {"sel": {"proc.id": 1234}, "condition": "sel"}})])
+    benign = [{"proc.id": 1000, "host": "h1"}, {"proc.id": 2000, "host": "h2"}]
+    model = LogsourceModel(name="test", rule_ids=["R"], benign=benign)
+    model.values = {("proc.id",): [1000, 2000], ("host",): ["h1", "h2"]}
+    generator = Generator([model], engine, seed=4, malicious_rate=0.0)
+    assert generator._is_read(("proc.id",)) and generator._is_read(("proc", "id"))
+    # Read fields are redrawn from observed values only, never from the shape variants.
+    assert {e["proc.id"] for e in generator.events(300)} == {1000, 2000}
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from harness.evaluate import CompiledRule
+from harness.multipattern import PatternRegistry, PatternSet
+
+
+def test_pattern_set_reports_contains_prefix_and_suffix_hits():
+    ps = PatternSet(["he", "she", "his", "hers", "", "e"], backend="python")
+    contains, prefix, suffix = ps.scan(["ushers", "he"])
+    assert contains == {0, 1, 3, 4, 5}
+    assert prefix == {0, 4}
+    assert suffix == {0, 3, 4, 5}
+
+
+def test_shared_registry_automaton_agrees_with_per_value_loop():
+    sigma = {
+        "detection": {
+            "selection": {
+                "CommandLine|contains": ["comsvcs.dll", "MiniDump", "-enc"],
+                "CommandLine|endswith": [".EXE", "\\lsass.dmp"],
+            },
+            "filter": {"CommandLine|startswith": ["C:\\Program Files\\", "\"C:\\Tools"]},
+            "condition": "selection and not filter",
+        }
+    }
+    automaton = CompiledRule(sigma, patterns=PatternRegistry(backend="python", min_patterns=1))
+    loop = CompiledRule(sigma, patterns=PatternRegistry(backend="python", min_patterns=10_000))
+    assert automaton.patterns.pattern_set("CommandLine") is not None
+    assert loop.patterns.pattern_set("CommandLine") is None
+
+    events = [
+        {"CommandLine": "rundll32.exe C:\\Windows\\System32\\COMSVCS.DLL MiniDump 624 C:\\t\\lsass.dmp"},
+        {"CommandLine": "C:\\Program Files\\x\\rundll32.exe comsvcs.dll minidump.exe"},
+        {"CommandLine": ["powershell -enc AAA", "other.exe"]},
+        {"CommandLine": "notepad.txt"},
+        {"Image": "x"},
+    ]
+    for evt in events:
+        assert automaton.match(evt) == loop.match(evt)
+    assert [automaton.match(e)[0] for e in events] == [True, False, True, False, False]
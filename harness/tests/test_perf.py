@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from harness.artifacts import _iter_sigma_rules, _read_jsonl, run_all_tests
+from harness.engine import Engine
+from harness.evaluate import CompiledRule
+from harness.perf import PERF_NAME, Profiler, save_perf
+from harness.run import cmd_test
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_profiler_counts_the_boolean_path():
+    rule = CompiledRule(
+        {
+            "id": "R",
+            "detection": {
+                "sel": {"EventID": 1, "CommandLine|contains": "mimikatz", "Image|re": ".*\\\\cmd\\.exe"},
+                "condition": "sel",
+            },
+        }
+    )
+    events = [{"EventID": 2}, {"EventID": 1, "CommandLine": "dir"}, {"EventID": 1, "CommandLine": "mimikatz", "Image": "c:\\cmd.exe"}]
+    profiler = Profiler(budget_us=1e-6)
+    test = profiler.instrument(rule)
+    assert [test(e) for e in events] == [rule.matches(e) for e in events] == [False, False, True]
+
+    profile = profiler.rules["R"]
+    assert (profile.evaluations, profile.rejections) == (3, 2)
+    clauses = {c.op: c for c in profile.selections["sel"].clauses}
+    assert (clauses["eq"].evaluations, clauses["eq"].rejections) == (3, 1)
+    assert (clauses["contains"].evaluations, clauses["contains"].rejections) == (2, 1)
+    assert (clauses["re"].evaluations, clauses["re"].rejections) == (1, 0)
+    assert 0 < profile.share(("re",)) < 1 and 0 < profile.share(("contains",)) < 1
+    assert profiler.over_budget() == ["R"]
+
+
+def test_profiled_run_all_tests_matches_and_writes_perf(tmp_path: Path):
+    plain, _ = run_all_tests(REPO_ROOT)
+    profiler = Profiler()
+    profiled, _ = run_all_tests(REPO_ROOT, jobs=2, profiler=profiler)
+    assert profiled == plain
+
+    events = {rid: sum(t["events"] for t in rr["tests"]) for rid, rr in plain["by_rule"].items()}
+    assert {rid: p.evaluations for rid, p in profiler.rules.items()} == events
+    report = save_perf(tmp_path / "perf.json", profiler)
+    assert (tmp_path / "perf.json").exists()
+    assert set(report["rules"]) == set(events)
+
+
+def test_profiled_engine_replays_identically():
+    rules = _iter_sigma_rules(REPO_ROOT)
+    events = [e for path in sorted((REPO_ROOT / "tests" / "cases").glob("RULE-*/*.jsonl")) for e in _read_jsonl(path)]
+    profiler = Profiler()
+    engine = Engine.from_rule_files(rules, profiler=profiler)
+    assert engine.replay(events) == Engine.from_rule_files(rules).replay(events)
+    stats = engine.index_stats
+    assert stats is not None
+    assert sum(p.evaluations for p in profiler.rules.values()) == stats.evaluated
+
+
+def test_profiled_test_run_never_defaults_into_the_site_bundle(tmp_path: Path):
+    tracked = REPO_ROOT / "site" / "public" / "data" / PERF_NAME
+    before = tracked.read_bytes() if tracked.exists() else None
+    with pytest.raises(ValueError):
+        cmd_test("RULE-001", profile=True)
+    assert cmd_test("RULE-001", profile=True, profile_to=str(tmp_path / "costs.json")) == 0
+    assert cmd_test("RULE-001", save_to=str(tmp_path / "results.json"), profile=True) == 0
+    assert (tmp_path / "costs.json").exists() and (tmp_path / PERF_NAME).exists()
+    assert (tracked.read_bytes() if tracked.exists() else None) == before
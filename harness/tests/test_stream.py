@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import io
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from harness.engine import Engine
+from harness.evaluate import CompiledRule
+from harness.pipeline import Pipeline
+from harness.stream import StreamDetector, listen_tcp, run_stream, tail_file
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+RULE = CompiledRule(
+    {
+        "id": "R-KEY",
+        "detection": {"selection": {"eventName": "CreateAccessKey"}, "condition": "selection"},
+    }
+)
+HIT = json.dumps({"eventName": "CreateAccessKey", "n": 1}).encode()
+MISS = json.dumps({"eventName": "ListUsers"}).encode()
+
+
+def test_tail_follows_appends_partial_lines_and_truncation(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    path.write_bytes(HIT + b"\n" + MISS[:5])
+    stop = threading.Event()
+    source = tail_file(path, stop, poll_interval=0.01)
+
+    assert next(source) == [HIT]
+    with path.open("ab") as fh:
+        fh.write(MISS[5:] + b"\n")
+    assert next(source) == [MISS]
+    path.write_bytes(HIT + b"\n")  # truncated and rewritten
+    assert next(source) == [HIT]
+    stop.set()
+
+
+def test_stream_from_open_stdin_exits_on_idle_timeout():
+    proc = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "harness" / "run.py"), "stream", "-", "--rule", "RULE-001", "--idle-timeout", "1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert proc.stdin is not None and proc.stdout is not None
+    try:
+        proc.stdin.write(json.dumps({"eventSource": "iam.amazonaws.com", "eventName": "CreateAccessKey"}).encode() + b"\n")
+        proc.stdin.flush()
+        # stdin stays open: the reader has to give up on its own.
+        assert proc.wait(timeout=30) == 0
+        assert [json.loads(line)["rule_id"] for line in proc.stdout.read().splitlines()] == ["RULE-001"]
+    finally:
+        proc.stdin.close()
+        proc.kill()
+        proc.wait()
+        proc.stdout.close()
+        assert proc.stderr is not None
+        proc.stderr.close()
+
+
+def test_stream_over_tcp_writes_alerts_and_reports_latency():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    stop, ready = threading.Event(), threading.Event()
+    sink = io.StringIO()
+    detector = StreamDetector(Engine([RULE]), sink)
+    source = listen_tcp("127.0.0.1", port, stop, ready)
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(stats=run_stream(detector, source, stop, queue_size=2, max_events=4)))
+    worker.start()
+    assert ready.wait(5)
+
+    with socket.create_connection(("127.0.0.1", port)) as client:
+        client.sendall(HIT + b"\n<14>Jan 1 host app: " + HIT + b"\nnot json\n" + MISS + b"\n" + HIT)
+    worker.join(timeout=10)
+
+    stats = result["stats"]
+    alerts = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [a["rule_id"] for a in alerts] == ["R-KEY"] * 3
+    assert alerts[0]["event"] == json.loads(HIT) and alerts[0]["why"]["failed_clause"] is None
+    assert (stats.events, stats.alerts, stats.malformed) == (4, 3, 1)
+    # The ListUsers event is pruned by the index before the rule is tested.
+    assert stats.by_rule["R-KEY"].evaluations == 3 and stats.percentile_ms(0.99) > 0
+
+
+def test_pipeline_matches_in_process_stream_and_reports_stages():
+    burst = CompiledRule(
+        {
+            "id": "R-BURST",
+            "detection": {
+                "selection": {"eventName": "CreateAccessKey"},
+                "timeframe": "1m",
+                "condition": "selection | count() > 2",
+            },
+        }
+    )
+    chunks = [[HIT, MISS, b"junk"], [HIT] * 5, [MISS, HIT]]
+
+    expected = io.StringIO()
+    detector = StreamDetector(Engine([RULE, burst]), expected)
+    for lines in chunks:
+        detector.process(lines, 0)
+
+    sink = io.StringIO()
+    pipeline = Pipeline(Engine([RULE, burst]), sink, workers=2, batch_size=3)
+    stats = pipeline.run(iter(chunks), threading.Event())
+
+    def alerts(text: str):
+        return [(a["rule_id"], a["event"]) for a in map(json.loads, text.splitlines())]
+
+    assert alerts(sink.getvalue()) == alerts(expected.getvalue())
+    assert (stats.events, stats.alerts, stats.malformed) == (9, 9, 1)
+    assert stats.by_rule["R-BURST"].alerts == 2
+    stages = stats.as_dict()["stages"]
+    assert [stages[name]["events"] for name in ("decode", "evaluate", "sink")] == [9, 9, 9]
+    assert stats.bottleneck in stages
+
+
+def test_pipeline_stops_on_idle_timeout_while_the_source_blocks():
+    forever = threading.Event()
+
+    def source():
+        yield [HIT, MISS]
+        # Like stdin left open: never yields again and ignores the stop event.
+        forever.wait()
+
+    sink = io.StringIO()
+    pipeline = Pipeline(Engine([RULE]), sink, workers=2)
+    try:
+        stats = pipeline.run(source(), threading.Event(), idle_timeout=0.5)
+    finally:
+        forever.set()
+    assert (stats.events, stats.alerts) == (2, 1)
+    assert [json.loads(line)["rule_id"] for line in sink.getvalue().splitlines()] == ["R-KEY"]
+
+
+def test_pipeline_reports_a_slow_source_as_the_bottleneck():
+    def source():
+        for _ in range(3):
+            time.sleep(0.2)
+            yield [HIT, MISS]
+
+    pipeline = Pipeline(Engine([RULE]), io.StringIO(), workers=1)
+    stats = pipeline.run(source(), threading.Event())
+    assert stats.events == 6 and stats.stages["read"].busy >= 0.5
+    assert stats.bottleneck == "read"
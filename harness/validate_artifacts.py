@@ -9,7 +9,7 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from harness.schemas import RULE_DETAIL_SCHEMA, SCHEMAS, validate_json
+from harness.schemas import PERF_SCHEMA, RULE_DETAIL_SCHEMA, SCHEMAS, validate_json
 
 
 def _read_json(path: Path) -> Any:
@@ -39,6 +39,9 @@ def validate_artifacts_dir(data_dir: Path) -> Dict[str, Any]:
     validate_json(results, SCHEMAS.results)
     validate_json(coverage, SCHEMAS.coverage)
     validate_json(rules_index, SCHEMAS.rules_index)
+    # perf.json is only written by profiled runs.
+    if (data_dir / "perf.json").exists():
+        validate_json(_read_json(data_dir / "perf.json"), PERF_SCHEMA)
 
     rules: List[Dict[str, Any]] = rules_index["rules"]
     _assert(len(rules) >= 20, f"rules_index has <20 rules: {len(rules)}")
@@ -4,7 +4,7 @@ import Link from "next/link";
 import { useEffect, useMemo, useState } from "react";
 
 import type { RuleIndexItem, RuleDetail, Results } from "../../lib/types";
-import { evaluateCompiledRule } from "../../lib/eval";
+import { RuleEvaluator } from "../../lib/eval";
 import { PROFILES, type EnvironmentProfile, isSuppressedByProfile } from "../../lib/profiles";
 import { fetchRuleDetail } from "../../lib/clientData";
 import ProfileSelector from "../../components/ProfileSelector";
@@ -97,8 +97,9 @@ export default function NoiseClient({
 
         let baseline = 0;
         let suppressed = 0;
+        const evaluator = new RuleEvaluator(baselineCompiled);
         for (const e of events) {
-          const baseMatch = evaluateCompiledRule(baselineCompiled, e).matched;
+          const baseMatch = evaluator.evaluate(e).matched;
           if (baseMatch) baseline += 1;
           if (baseMatch && isSuppressedByProfile(profile, e)) suppressed += 1;
         }
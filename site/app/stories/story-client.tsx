@@ -3,7 +3,7 @@
 import Link from "next/link";
 import { useEffect, useMemo, useRef, useState } from "react";
 
-import { evaluateCompiledRule } from "../../lib/eval";
+import { RuleEvaluator } from "../../lib/eval";
 import { fetchRuleDetail } from "../../lib/clientData";
 import type { EnvironmentProfile } from "../../lib/profiles";
 import { PROFILES, isSuppressedByProfile } from "../../lib/profiles";
@@ -89,9 +89,12 @@ export default function StoryClient() {
       }
       rows.sort((a, b) => a.ts.localeCompare(b.ts));
 
+      // One evaluator per rule, fed in timeline order, so aggregation windows see the story as it unfolds.
+      const evaluators: Record<string, RuleEvaluator> = {};
       const enriched = rows.map((r) => {
         const compiled = map[r.rule]?.compiled;
-        const res = compiled ? evaluateCompiledRule(compiled, r.event) : { matched: false, why: null };
+        if (compiled && !evaluators[r.rule]) evaluators[r.rule] = new RuleEvaluator(compiled);
+        const res = compiled ? evaluators[r.rule].evaluate(r.event) : { matched: false, why: null };
         const suppressed = isSuppressedByProfile(profile, r.event);
         return { ...r, matched: !!res.matched, suppressed };
       });
@@ -3,7 +3,7 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 
 import type { RuleDetail } from "../lib/types";
-import { evaluateCompiledRule } from "../lib/eval";
+import { RuleEvaluator } from "../lib/eval";
 import type { EnvironmentProfile } from "../lib/profiles";
 import { isSuppressedByProfile } from "../lib/profiles";
 
@@ -74,9 +74,11 @@ export default function ReplayPlayer({
 
   const evaluations = useMemo(() => {
     if (!compiled) return [];
+    // Aggregation rules keep window state across the case, so events are evaluated in order.
+    const evaluator = new RuleEvaluator(compiled);
     return events.map((e) => {
       const suppressed = isSuppressedByProfile(profile, e);
-      const res = evaluateCompiledRule(compiled, e);
+      const res = evaluator.evaluate(e);
       return { suppressed, ...res };
     });
   }, [compiled, events, profile]);
@@ -110,6 +112,7 @@ export default function ReplayPlayer({
       <div className="row" style={{ justifyContent: "space-between", alignItems: "center" }}>
         <div className="pill">
           replay • {caseName} • {events.length} events • alerts (profile): {alertCount}
+          {compiled?.aggregation ? ` • window: ${compiled.aggregation}${compiled.timeframe ? ` in ${compiled.timeframe}` : ""}` : ""}
         </div>
         <div className="row">
           <button className="btn" onClick={() => setPlaying((p) => !p)} disabled={!events.length}>
@@ -173,7 +176,7 @@ export default function ReplayPlayer({
             <div className="pill">event {idx + 1}</div>
             {curEval ? (
               <span className="pill">
-                {curEval.suppressed ? "suppressed" : curEval.matched ? "matched" : "no match"}
+                {curEval.suppressed ? "suppressed" : curEval.matched ? "matched" : curEval.search ? "search hit" : "no match"}
               </span>
             ) : null}
           </div>
@@ -3,7 +3,7 @@
 import { useEffect, useMemo, useState } from "react";
 
 import type { RuleDetail } from "../lib/types";
-import { evaluateCompiledRule } from "../lib/eval";
+import { evaluateCompiledEvents } from "../lib/eval";
 import DiffViewer from "./DiffViewer";
 
 function parseJsonl(text: string) {
@@ -51,7 +51,7 @@ export default function RuleSnapshotDiff({ current }: { current: RuleDetail }) {
   const impact = useMemo(() => {
     if (!prev?.compiled || !current.compiled) return null;
     const count = (events: Array<Record<string, any>>, compiled: NonNullable<RuleDetail["compiled"]>) =>
-      events.reduce((acc, e) => acc + (evaluateCompiledRule(compiled, e).matched ? 1 : 0), 0);
+      evaluateCompiledEvents(compiled, events).filter((res) => res.matched).length;
 
     const prevBen = count(benignEvents, prev.compiled);
     const curBen = count(benignEvents, current.compiled);
@@ -3,7 +3,7 @@
 import { useEffect, useMemo, useState } from "react";
 
 import type { RuleDetail, Results } from "../lib/types";
-import { evaluateCompiledRule } from "../lib/eval";
+import { RuleEvaluator } from "../lib/eval";
 import { PROFILES, type EnvironmentProfile, isSuppressedByProfile } from "../lib/profiles";
 import ProfileSelector from "./ProfileSelector";
 
@@ -49,8 +49,9 @@ export default function RuleTuningSimulator({
     // Estimate noise reduction by simulating profile suppressions on the benign stream.
     let baseline = 0;
     let suppressed = 0;
+    const evaluator = new RuleEvaluator(compiled);
     for (const e of events) {
-      const res = evaluateCompiledRule(compiled, e);
+      const res = evaluator.evaluate(e);
       if (res.matched) baseline += 1;
       if (res.matched && isSuppressedByProfile(profile, e)) suppressed += 1;
     }
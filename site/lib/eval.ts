@@ -121,7 +121,9 @@ type Node =
   | { t: "or"; left: Node; right: Node };
 
 function tokenizeCondition(text: string): string[] {
-  const raw = text.match(/\(|\)|[A-Za-z0-9_]+/g) || [];
+  // Bundles carry the aggregation separately (see RuleEvaluator); older snapshots may still inline it.
+  const search = text.split("|")[0];
+  const raw = search.match(/\(|\)|[A-Za-z0-9_]+/g) || [];
   return raw.map((t) => {
     const low = t.toLowerCase();
     return low === "and" || low === "or" || low === "not" ? low : t;
@@ -254,3 +256,201 @@ export function evaluateCompiledRule(compiled: CompiledRule, event: Record<strin
   }
 }
 
+
+// Client port of harness/aggregate.py: `count([field]) [by a, b] <op> N` and `near a and b`
+// over the rule's timeframe, with the same 60 time buckets, watermark and late-event rules.
+const BUCKETS = 60;
+const UNITS: Record<string, number> = { s: 1, m: 60, h: 3600, d: 86400 };
+const COUNT_RE = /^count\(\s*([^\s()]*)\s*\)(?:\s+by\s+([^<>=]+?))?\s*(>=|<=|==|=|>|<)\s*(\d+(?:\.\d+)?)$/i;
+const NEAR_RE = /^near\s+(.+)$/i;
+
+type Aggregation =
+  | { fn: "count"; field: string | null; groupBy: string[]; op: string; threshold: number; timeframe: number | null }
+  | { fn: "near"; near: string[]; timeframe: number };
+
+function parseTimeframe(value: string | undefined): number | null {
+  if (value == null) return null;
+  const m = /^\s*(\d+)\s*([smhd])\s*$/.exec(value);
+  if (!m || Number(m[1]) <= 0) throw new Error(`bad timeframe: ${value}`);
+  return Number(m[1]) * UNITS[m[2]];
+}
+
+function parseAggregation(text: string, timeframe: string | undefined): Aggregation {
+  const window = parseTimeframe(timeframe);
+  const count = COUNT_RE.exec(text.trim());
+  if (count) {
+    const groupBy = count[2] ? count[2].split(",").map((g) => g.trim()) : [];
+    return { fn: "count", field: count[1] || null, groupBy, op: count[3], threshold: Number(count[4]), timeframe: window };
+  }
+  const near = NEAR_RE.exec(text.trim());
+  if (near && window != null) return { fn: "near", near: near[1].trim().split(/\s+and\s+/i), timeframe: window };
+  throw new Error(`unsupported aggregation: ${text}`);
+}
+
+function compare(op: string, size: number, threshold: number): boolean {
+  if (op === ">") return size > threshold;
+  if (op === ">=") return size >= threshold;
+  if (op === "<") return size < threshold;
+  if (op === "<=") return size <= threshold;
+  return size === threshold;
+}
+
+function parseTimestamp(value: any): number | null {
+  // Epoch seconds (or milliseconds) and ISO 8601 strings; naive times are taken as UTC.
+  if (value == null || typeof value === "boolean") return null;
+  if (typeof value === "number") return Math.abs(value) >= 1e11 ? value / 1000 : value;
+  const text = String(value).trim();
+  if (text !== "" && Number.isFinite(Number(text))) return parseTimestamp(Number(text));
+  const iso = text.replace(" ", "T");
+  const zoned = /(Z|[+-]\d{2}:?\d{2})$/i.test(iso) || !iso.includes("T");
+  const ms = Date.parse(zoned ? iso : `${iso}Z`);
+  return Number.isNaN(ms) ? null : ms / 1000;
+}
+
+type Bucket = { key: number; count: number; values: Set<string> };
+type Group = { buckets: Bucket[]; total: number; distinct: Map<string, number> };
+
+class CountWindow {
+  private width: number | null;
+  private groups = new Map<string, Group>();
+  private watermark = -Infinity;
+
+  constructor(private spec: Extract<Aggregation, { fn: "count" }>) {
+    this.width = spec.timeframe ? spec.timeframe / BUCKETS : null;
+  }
+
+  private horizon(): number {
+    return Math.floor((this.watermark - (this.spec.timeframe as number)) / (this.width as number));
+  }
+
+  private evict(group: Group, horizon: number) {
+    while (group.buckets.length && group.buckets[0].key <= horizon) {
+      const bucket = group.buckets.shift() as Bucket;
+      group.total -= bucket.count;
+      bucket.values.forEach((v) => {
+        const left = (group.distinct.get(v) || 0) - 1;
+        if (left) group.distinct.set(v, left);
+        else group.distinct.delete(v);
+      });
+    }
+  }
+
+  observe(timestamp: number | null, group: string, value: any): boolean {
+    const distinct = this.spec.field != null;
+    if (distinct && value == null) return false;
+    let key = 0;
+    if (this.width != null) {
+      if (timestamp == null) timestamp = this.watermark > -Infinity ? this.watermark : 0;
+      if (timestamp > this.watermark) {
+        this.watermark = timestamp;
+        const horizon = this.horizon();
+        // Groups are kept least recently updated first; drop those with nothing left in the window.
+        for (const [k, g] of this.groups) {
+          if (g.buckets.length && g.buckets[g.buckets.length - 1].key > horizon) break;
+          this.groups.delete(k);
+        }
+      }
+      key = Math.floor(timestamp / this.width);
+      if (key <= this.horizon()) return false;
+    }
+
+    const state = this.groups.get(group) || { buckets: [], total: 0, distinct: new Map<string, number>() };
+    this.groups.delete(group);
+    this.groups.set(group, state);
+    let bucket = state.buckets.find((b) => b.key === key);
+    if (!bucket) {
+      bucket = { key, count: 0, values: new Set<string>() };
+      state.buckets.push(bucket);
+      state.buckets.sort((a, b) => a.key - b.key);
+    }
+    if (!distinct) {
+      bucket.count += 1;
+      state.total += 1;
+    } else {
+      const v = JSON.stringify(value);
+      if (!bucket.values.has(v)) {
+        bucket.values.add(v);
+        state.distinct.set(v, (state.distinct.get(v) || 0) + 1);
+      }
+    }
+    if (this.width != null) this.evict(state, this.horizon());
+    // A group that crosses the threshold raises one alert and starts counting afresh.
+    if (compare(this.spec.op, distinct ? state.distinct.size : state.total, this.spec.threshold)) {
+      this.groups.delete(group);
+      return true;
+    }
+    return false;
+  }
+}
+
+class NearWindow {
+  private last: Array<number | null>;
+  private watermark = -Infinity;
+
+  constructor(private spec: Extract<Aggregation, { fn: "near" }>) {
+    this.last = new Array(1 + spec.near.length).fill(null);
+  }
+
+  observe(timestamp: number | null, hits: boolean[]): boolean {
+    if (timestamp == null) timestamp = this.watermark > -Infinity ? this.watermark : 0;
+    this.watermark = Math.max(this.watermark, timestamp);
+    hits.forEach((hit, pos) => {
+      if (hit) this.last[pos] = this.last[pos] == null ? timestamp : Math.max(this.last[pos] as number, timestamp as number);
+    });
+    const oldest = this.watermark - this.spec.timeframe;
+    if (this.last.every((seen) => seen != null && seen > oldest)) {
+      this.last = this.last.map(() => null);
+      return true;
+    }
+    return false;
+  }
+}
+
+// Evaluates a rule over events in order. Rules without an aggregation alert on every
+// search hit; aggregation rules alert only when their window fires, like the harness.
+export class RuleEvaluator {
+  readonly aggregation: Aggregation | null = null;
+  private window: CountWindow | NearWindow | null = null;
+  private error: string | null = null;
+
+  constructor(private compiled: CompiledRule) {
+    try {
+      this.aggregation = compiled.aggregation ? parseAggregation(compiled.aggregation, compiled.timeframe) : null;
+    } catch (e: any) {
+      this.error = `bad aggregation: ${String(e?.message || e)}`;
+    }
+    if (this.aggregation) {
+      this.window = this.aggregation.fn === "count" ? new CountWindow(this.aggregation) : new NearWindow(this.aggregation);
+    }
+  }
+
+  evaluate(event: Record<string, any>): { matched: boolean; search: boolean; why: Why } {
+    const res = evaluateCompiledRule(this.compiled, event);
+    if (this.error) {
+      return { matched: false, search: res.matched, why: { matched_fields: [], failed_clause: this.error, missing_fields: [] } };
+    }
+    const agg = this.aggregation;
+    if (!agg || !this.window) return { ...res, search: res.matched };
+    const timestamp = parseTimestamp(getPath(event, "@timestamp"));
+    let fired: boolean;
+    if (agg.fn === "near") {
+      const hits = [res.matched, ...agg.near.map((name) => evaluateSelection(this.compiled, name, event).matched)];
+      fired = hits.some(Boolean) && (this.window as NearWindow).observe(timestamp, hits);
+    } else {
+      const group = JSON.stringify(agg.groupBy.map((f) => getPath(event, f) ?? null));
+      const value = agg.field ? getPath(event, agg.field) : null;
+      fired = res.matched && (this.window as CountWindow).observe(timestamp, group, value);
+    }
+    if (fired || !res.matched) return { matched: fired, search: res.matched, why: res.why };
+    return {
+      matched: false,
+      search: true,
+      why: { ...res.why, failed_clause: `aggregation not reached: ${this.compiled.aggregation}` },
+    };
+  }
+}
+
+export function evaluateCompiledEvents(compiled: CompiledRule, events: Array<Record<string, any>>) {
+  const evaluator = new RuleEvaluator(compiled);
+  return events.map((e) => evaluator.evaluate(e));
+}
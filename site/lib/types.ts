@@ -93,6 +93,8 @@ export type RuleDetail = {
   score_breakdown?: Record<string, any>;
   compiled?: {
     condition: string;
+    aggregation?: string;
+    timeframe?: string;
     selections: Record<
       string,
       Array<{